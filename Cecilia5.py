@@ -19,11 +19,9 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 """
-import os, sys, random
+import os, sys, random, multiprocessing
 import wx
 from Resources.constants import *
-from Resources import audio, CeciliaMainFrame
-from Resources.splash import CeciliaSplashScreen
 import Resources.CeciliaLib as CeciliaLib
 
 
@@ -67,6 +65,7 @@ def onStart():
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
 
     if not os.path.isdir(TMP_PATH):
         os.mkdir(TMP_PATH)
@@ -76,15 +75,18 @@ if __name__ == '__main__':
     if not os.path.isdir(AUTOMATION_SAVE_PATH):
         os.mkdir(AUTOMATION_SAVE_PATH)
 
+    if "--render" in sys.argv:
+        from Resources import Headless
+        sys.exit(Headless.main(sys.argv[1:]))
+
+    from Resources import audio, CeciliaMainFrame
+    from Resources.splash import CeciliaSplashScreen
+
     audioServer = audio.AudioServer()
     CeciliaLib.setVar("audioServer", audioServer)
 
-    try:
-        CeciliaLib.queryAudioMidiDrivers()
-    except:
-        pass
-
     app = CeciliaApp(redirect=False)
+    CeciliaLib.startDeviceQuery()
     wx.Log.SetLogLevel(0)
     if sys.version_info[0] < 3:
         wx.SetDefaultPyEncoding('utf-8')
@@ -18,13 +18,16 @@ You should have received a copy of the GNU General Public License
 along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import os, sys, wx, time, math, copy, codecs
+import os, sys, wx, time, math, copy, codecs, threading, marshal, traceback
 import pprint as pp
+import numpy as _Numeric
 import unicodedata
 from subprocess import Popen
 from .constants import *
 from .API_interface import *
 import Resources.Variables as vars
+from .PresetStore import PresetStore
+from .ModuleCatalog import ModuleCatalog
 import wx.lib.agw.supertooltip as STT
 
 if sys.version_info[0] < 3:
@@ -45,6 +48,11 @@ def buildFileTree():
                     files[dir].append(f)
     return root, directories, files
 
+def getModuleCatalog():
+    if getVar("moduleCatalog") is None:
+        setVar("moduleCatalog", ModuleCatalog(MODULE_CATALOG_FILE))
+    return getVar("moduleCatalog")
+
 def setVar(var, value):
     vars.CeciliaVar[var] = value
 
@@ -187,6 +195,53 @@ def updateTooltips():
     for tooltip in getVar("tooltips"):
         tooltip.update()
 
+### GUI update bus ###
+class GuiUpdateBus(wx.Timer):
+    """
+    Audio callbacks post their latest value under a key, only the last
+    value of each key is kept. The timer hands the pending values to the
+    registered GUI handlers at the "guiFrameRate" preference. The timer
+    only runs while the audio server is playing.
+    """
+    def __init__(self):
+        wx.Timer.__init__(self)
+        self.slots = {}
+        self.handlers = {}
+
+    def register(self, key, handler):
+        self.handlers[key] = handler
+
+    def post(self, key, value):
+        # Called from the audio thread, a dict assignment doesn't need a lock.
+        self.slots[key] = value
+
+    def start(self):
+        self.Start(int(1000 / max(1, getVar("guiFrameRate"))))
+
+    def stop(self):
+        self.Stop()
+        # shows the values posted before the server stopped
+        self.Notify()
+
+    def Notify(self):
+        for key in list(self.slots.keys()):
+            try:
+                value = self.slots.pop(key)
+            except KeyError:
+                # already handled by a nested call
+                continue
+            if key in self.handlers:
+                try:
+                    self.handlers[key](value)
+                except Exception:
+                    # the widget may have been destroyed with its interface
+                    if getVar("DEBUG"):
+                        traceback.print_exc()
+
+def postGuiUpdate(key, value):
+    if getVar("updateBus") is not None:
+        getVar("updateBus").post(key, value)
+
 ###### Start / Stop / Drivers ######
 def startCeciliaSound(timer=True, rec=False):
     # Check if soundfile is loaded
@@ -204,9 +259,7 @@ def startCeciliaSound(timer=True, rec=False):
                     wx.CallAfter(getVar("grapher").toolbar.loadingMsg.Refresh)
                     return
     getControlPanel().resetMeter()
-    getVar("audioServer").shutdown()
-    getVar("audioServer").reinit()
-    getVar("audioServer").boot()
+    getVar("audioServer").prepare()
     if getVar("currentModuleRef") is not None:
         if not getVar("audioServer").loadModule(getVar("currentModuleRef")):
             return
@@ -214,9 +267,10 @@ def startCeciliaSound(timer=True, rec=False):
         showErrorDialog("Wow...!", "No module to load.")
         return
     getVar("grapher").toolbar.convertSlider.Hide()
-    getVar("presetPanel").presetChoice.setEnable(False)
     getControlPanel().durationSlider.Disable()
     getVar("audioServer").start(timer=timer, rec=rec)
+    if getVar("updateBus") is not None:
+        getVar("updateBus").start()
     if getVar('showSpectrum'):
         getVar('mainFrame').openSpectrumWindow()
     getVar("grapher").toolbar.loadingMsg.SetForegroundColour(TITLE_BACK_COLOUR)
@@ -238,6 +292,8 @@ def stopCeciliaSound():
             getVar("currentModule")._checkForAutomation()
             getVar("grapher").checkForAutomation()
         time.sleep(.25)
+    if getVar("updateBus") is not None:
+        getVar("updateBus").stop()
     resetControls()
 
 def resetControls():
@@ -250,8 +306,79 @@ def resetControls():
             getControlPanel().setTotalTime(getControlPanel().tmpTotalTime, True)
         wx.CallAfter(getControlPanel().vuMeter.reset)
 
-def queryAudioMidiDrivers():
-    inputs, inputIndexes, defaultInput, outputs, outputIndexes, defaultOutput, midiInputs, midiInputIndexes, defaultMidiInput = getVar("audioServer").getAvailableAudioMidiDrivers()
+def pruneCacheFolder(path, maxSize, group=None):
+    """
+    Removes the least recently used files of a cache folder until it holds
+    at most `maxSize` bytes. `group`, if given, maps a file name to a key,
+    files with the same key are removed together.
+
+    """
+    groups = {}
+    try:
+        for name in os.listdir(path):
+            stat = os.stat(os.path.join(path, name))
+            key = name
+            if group is not None:
+                key = group(name)
+            used, size, names = groups.get(key, (0, 0, []))
+            groups[key] = (max(used, stat.st_atime, stat.st_mtime), size + stat.st_size, names + [name])
+    except:
+        return
+    total = sum([g[1] for g in groups.values()])
+    for used, size, names in sorted(groups.values()):
+        if total <= maxSize:
+            break
+        for name in names:
+            try:
+                os.remove(os.path.join(path, name))
+            except:
+                pass
+        total -= size
+
+def readDeviceCache(fingerprint):
+    "Returns the cached device lists, or None if the cache was made with another audio setup."
+    try:
+        with open(DEVICE_CACHE_FILE, "rb") as f:
+            cacheFingerprint, drivers = marshal.load(f)
+        if cacheFingerprint == fingerprint:
+            return drivers
+    except:
+        pass
+    return None
+
+def writeDeviceCache(fingerprint, drivers):
+    try:
+        with open(DEVICE_CACHE_FILE + ".tmp", "wb") as f:
+            marshal.dump((fingerprint, drivers), f)
+        os.replace(DEVICE_CACHE_FILE + ".tmp", DEVICE_CACHE_FILE)
+    except:
+        print("Unable to write the audio devices cache.")
+
+def getAudioMidiDrivers(refresh=False):
+    """
+    Returns the available audio and midi devices. They are read from the cache
+    unless `refresh` is True or the cache was made with another audio setup.
+    """
+    server = getVar("audioServer")
+    fingerprint = server.getDeviceFingerprint()
+    drivers = None
+    if not refresh:
+        drivers = readDeviceCache(fingerprint)
+    if drivers is None:
+        drivers = list(server.getAvailableAudioMidiDrivers()) + [server.getHostDefaultDevices()]
+        writeDeviceCache(fingerprint, drivers)
+    return drivers
+
+def queryAudioMidiDrivers(refresh=False):
+    applyAudioMidiDrivers(getAudioMidiDrivers(refresh))
+
+def applyAudioMidiDrivers(drivers):
+    inputs, inputIndexes, defaultInput, outputs, outputIndexes, defaultOutput, midiInputs, midiInputIndexes, defaultMidiInput, hostDefaults = drivers
+    if getVar("audioInput") == -1:
+        setVar("audioInput", hostDefaults[0])
+    if getVar("audioOutput") == -1:
+        setVar("audioOutput", hostDefaults[1])
+
     setVar("availableAudioOutputs", outputs)
     setVar("availableAudioOutputIndexes", outputIndexes)
     if getVar("audioOutput") not in outputIndexes:
@@ -280,6 +407,38 @@ def queryAudioMidiDrivers():
         except:
             setVar("midiDeviceIn", 0)
 
+def startDeviceQuery():
+    """
+    Gets the devices in a background thread. The thread only reads the
+    devices, they are applied on the GUI thread.
+    """
+    query = {'drivers': None}
+    def run():
+        try:
+            query['drivers'] = getAudioMidiDrivers()
+        except:
+            pass
+        wx.CallAfter(applyDeviceQuery)
+    query['thread'] = threading.Thread(target=run)
+    query['thread'].daemon = True
+    setVar("deviceQuery", query)
+    query['thread'].start()
+
+def applyDeviceQuery():
+    query = getVar("deviceQuery")
+    if query is None:
+        return
+    setVar("deviceQuery", None)
+    if query['drivers'] is not None:
+        applyAudioMidiDrivers(query['drivers'])
+
+def waitDeviceQuery():
+    "Waits for the devices queried at startup, needed before booting the server or showing them."
+    query = getVar("deviceQuery")
+    if query is not None:
+        query['thread'].join()
+        applyDeviceQuery()
+
 def openAudioFileDialog(parent, wildcard, type='open', defaultPath=os.path.expanduser('~')):
     openDialog = wx.FileDialog(parent, message='Choose a file to %s' % type,
                                 defaultDir=defaultPath, wildcard=wildcard,
@@ -339,6 +498,9 @@ def saveBeforeClose(parent):
     return result
 
 def showErrorDialog(title, msg):
+    if getVar("headless"):
+        print("%s\n%s" % (title, msg))
+        return
     if getVar("mainFrame") is not None:
         dlg = wx.MessageDialog(getVar("mainFrame"), msg, title, wx.OK)
     else:
@@ -441,6 +603,13 @@ def openCurrentFileAsText(curfile):
 def deletePreset(preset):
     del vars.CeciliaVar['presets'][preset]
 
+def loadPresetGraph(preset):
+    "Returns a preset, with its graph data read from the sidecar store if not loaded yet."
+    presetData = getVar("presets")[preset]
+    if 'userGraph' not in presetData and getVar("presetStore") is not None:
+        presetData['userGraph'] = getVar("presetStore").loadGraph(preset)
+    return presetData
+
 def loadPresetFromDict(preset):
     currentModule = getVar("currentModule")
     setVar("currentModule", None)
@@ -448,7 +617,7 @@ def loadPresetFromDict(preset):
         if preset == "init":
             presetData = getVar("initPreset")
         else:
-            presetData = getVar("presets")[preset]
+            presetData = loadPresetGraph(preset)
 
         for data in presetData.keys():
             if data == 'userInputs':
@@ -487,6 +656,8 @@ def loadPresetFromDict(preset):
                 pluginsDict = copy.deepcopy(presetData[data])
                 wx.CallAfter(getControlPanel().setPlugins, pluginsDict)
                 del pluginsDict
+            elif data == 'morphPresets':
+                setMorphPresets(presetData[data])
             elif data == 'userTogglePopups':
                 togDict = presetData[data]
                 for widget in getVar("userTogglePopups"):
@@ -503,17 +674,17 @@ def loadPresetFromDict(preset):
                     pass
         elif 'userGraph' in presetData:
             graphDict = presetData['userGraph']
+            plotter = getVar("grapher").getPlotter()
             ends = ['min', 'max']
             for line in graphDict:
-                for i, graphLine in enumerate(getVar("grapher").getPlotter().getData()):
-                    if line == graphLine.getName():
-                        graphLine.setLineState(copy.deepcopy(graphDict[line]))
-                        break
-                    else:
-                        for end in ends:
-                            if graphLine.getLabel().endswith(end) and line.endswith(end) and line.startswith(graphLine.getName()):
-                                graphLine.setLineState(copy.deepcopy(graphDict[line]))
-                                break
+                graphLine = plotter.getLineFromName(line)
+                if graphLine is None:
+                    for end in ends:
+                        if line.endswith(end):
+                            graphLine = plotter.getLineFromName(line[:-len(end)], end)
+                            break
+                if graphLine is not None:
+                    graphLine.setLineState(copy.deepcopy(graphDict[line]))
             del graphDict
 
         setVar("totalTime", presetData["totalTime"])
@@ -533,16 +704,109 @@ def loadPresetFromDict(preset):
 def againForPluginKnobs(presetData):
     if 'userGraph' in presetData:
         graphDict = presetData['userGraph']
+        plotter = getVar("grapher").getPlotter()
         for line in graphDict:
-            for i, graphLine in enumerate(getVar("grapher").getPlotter().getData()):
-                if line == graphLine.getName():
-                    graphLine.setLineState(copy.deepcopy(graphDict[line]))
-                    break
+            graphLine = plotter.getLineFromName(line)
+            if graphLine is not None:
+                graphLine.setLineState(copy.deepcopy(graphDict[line]))
         del graphDict
         getVar("grapher").getPlotter().draw()
         getVar("grapher").setTotalTime(getVar("totalTime"))
 
-def savePresetToDict(presetName):
+def loadPresetLive(preset):
+    """
+    Recalls a preset while the audio server is running. Only the values
+    that differ from the current state are sent to the running module,
+    inputs, number of channels and total time are left untouched.
+    """
+    if preset == "init":
+        presetData = getVar("initPreset")
+    elif preset in getVar("presets"):
+        presetData = loadPresetGraph(preset)
+    else:
+        return
+
+    slidersDict = presetData.get('userSliders', {})
+    for slider in getVar("userSliders"):
+        name = slider.getName()
+        if name in slidersDict:
+            value = slidersDict[name][0]
+            if value != slider.getValue():
+                slider.setValue(value)
+                slider.sendValue(value)
+
+    togDict = presetData.get('userTogglePopups', {})
+    for widget in getVar("userTogglePopups"):
+        name = widget.getName()
+        if name in togDict and hasattr(widget, "setValue"):
+            if togDict[name] != widget.getValue():
+                widget.setValue(togDict[name], True)
+
+    if 'plugins' in presetData:
+        controlPanel = getControlPanel()
+        pluginsDict = presetData['plugins']
+        for i in range(NUM_OF_PLUGINS):
+            name, params, states = pluginsDict.get(i, ["None", [0, 0, 0, 0], None])
+            plugin = controlPanel.plugins[i]
+            if plugin.getName() != name:
+                # Only the plugin in this slot is replaced in the running graph.
+                controlPanel.replacePlugin(i, name)
+                plugin = controlPanel.plugins[i]
+                plugin.setParams(params)
+                if states is not None:
+                    plugin.setStates(states)
+                continue
+            if name == "None":
+                continue
+            current = plugin.getParams()
+            knobs = plugin.getKnobs()
+            for j in range(3):
+                if params[j] != current[j]:
+                    knobs[j].SetValue(params[j])
+                    getattr(plugin, "onChangeKnob%d" % (j + 1))(params[j])
+            if params[3] != current[3]:
+                plugin.preset.setByIndex(params[3])
+                plugin.onChangePreset(params[3])
+
+    plotter = getVar("grapher").getPlotter()
+    if preset == "init":
+        for line in plotter.getData():
+            state = line.getLineState()
+            try:
+                line.reinit()
+            except:
+                continue
+            if line.getLineState() != state:
+                plotter.sendLineData(line)
+    elif 'userGraph' in presetData:
+        graphDict = presetData['userGraph']
+        ends = ['min', 'max']
+        for name in graphDict:
+            line = plotter.getLineFromName(name)
+            if line is None:
+                for end in ends:
+                    if name.endswith(end):
+                        line = plotter.getLineFromName(name[:-len(end)], end)
+                        break
+            if line is not None and line.getLineState() != graphDict[name]:
+                line.setLineState(graphDict[name])
+                plotter.sendLineData(line)
+
+    if 'morphPresets' in presetData and presetData['morphPresets'] != getVar("morphPresets"):
+        setMorphPresets(presetData['morphPresets'])
+
+    if presetData["gainSlider"] != getVar("gainSlider").GetValue():
+        getVar("gainSlider").SetValue(presetData["gainSlider"])
+    getVar("presetPanel").setLabel(preset)
+    plotter.draw()
+
+def setMorphPresets(names):
+    setVar("morphPresets", list(names))
+    if getVar("presetPanel") is not None:
+        getVar("presetPanel").setMorphPresets(names)
+    getVar("audioServer").updateMorph()
+
+def getPresetDict():
     presetDict = dict()
     presetDict['nchnls'] = getVar("nchnls")
     presetDict['totalTime'] = getVar("totalTime")
@@ -594,6 +858,13 @@ def savePresetToDict(presetName):
         presetDict['userGraph'] = copy.deepcopy(graphDict)
         del graphDict
 
+        if getVar("morphPresets"):
+            presetDict['morphPresets'] = list(getVar("morphPresets"))
+
+    return presetDict
+
+def savePresetToDict(presetName):
+    presetDict = getPresetDict()
     if presetName == "init":
         setVar("initPreset", copy.deepcopy(presetDict))
     else:
@@ -687,14 +958,28 @@ def saveCeciliaFile(parent, showDialog=True):
             dlg.Destroy()
             return
 
+    store = getVar("presetStore")
     file.write(curtext.rstrip())
-    file.write("\n\n\n")
-    file.write(PRESETS_DELIMITER)
-    file.write("\n\n")
-    preset = pp.pformat(getVar("presets"), width=160)
-    preset = "CECILIA_PRESETS = " + preset
-    preset = ensureNFD(preset)
-    file.write(preset)
+    if getVar("sidecarPresets"):
+        # presets go to <module>.presets, only the changed ones are appended
+        file.write("\n")
+        if store is None:
+            store = PresetStore(fileToSave)
+        store.save(getVar("presets"), fileToSave)
+        setVar("presetStore", store)
+    else:
+        if store is not None:
+            store.loadAllGraphs(getVar("presets"))
+            if fileToSave == store.path:
+                store.remove()
+            setVar("presetStore", None)
+        file.write("\n\n\n")
+        file.write(PRESETS_DELIMITER)
+        file.write("\n\n")
+        preset = pp.pformat(getVar("presets"), width=160)
+        preset = "CECILIA_PRESETS = " + preset
+        preset = ensureNFD(preset)
+        file.write(preset)
 
     file.close()
 
@@ -828,6 +1113,32 @@ def toLog(t, v1, v2):
 def toExp(t, v1, v2):
     return math.pow(10, t * (math.log10(v2) - math.log10(v1)) + math.log10(v1))
 
+def automationToPoints(data, automationlength, minval, maxval, log=False, fillZeros=False):
+    """
+    Converts recorded automation values to normalized [pos, value] breakpoints.
+
+    The recording is padded with its last value up to the total time, zeros
+    are replaced by the previous value if `fillZeros` is True, then values are
+    normalized between `minval` and `maxval` (lin or log).
+    """
+    data = _Numeric.asarray(data, dtype=_Numeric.float64)
+    frac = automationlength / getVar("totalTime")
+    pad = int((1 - frac) * (len(data) / frac))
+    if pad > 0:
+        data = _Numeric.concatenate((data, _Numeric.full(pad, data[-1])))
+    if fillZeros:
+        indexes = _Numeric.where(data != 0, _Numeric.arange(len(data)), 0)
+        data = data[_Numeric.maximum.accumulate(indexes)]
+    if log:
+        data = _Numeric.log10(data / minval) / math.log10(maxval / minval)
+    else:
+        data = (data - minval) / (maxval - minval)
+    points = _Numeric.empty((len(data) + 1, 2))
+    points[0] = [0.0, data[0]]
+    points[1:, 0] = _Numeric.arange(len(data)) / float(len(data))
+    points[1:, 1] = data
+    return points.tolist()
+
 ###### Utility functions #######
 def autoRename(path, index=0, wrap=False):
     if os.path.exists(path):
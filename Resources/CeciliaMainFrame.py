@@ -22,6 +22,7 @@ import os, time, random
 import wx
 from .constants import *
 import Resources.CeciliaLib as CeciliaLib
+import Resources.Headless as Headless
 import Resources.PreferencePanel as PreferencePanel
 import Resources.CeciliaInterface as CeciliaInterface
 from .menubar import InterfaceMenuBar
@@ -38,6 +39,9 @@ class CeciliaMainFrame(wx.Frame):
         self.time = 0
         self.api_doc_frame = ManualFrame(kind="api")
         self.mod_doc_frame = ManualFrame(kind="modules")
+        self.updateBus = CeciliaLib.GuiUpdateBus()
+        self.updateBus.register("time", CeciliaLib.getVar("audioServer").showTime)
+        CeciliaLib.setVar("updateBus", self.updateBus)
 
     def setTime(self, curTime=0):
         self.time = curTime
@@ -74,50 +78,62 @@ class CeciliaMainFrame(wx.Frame):
         folderName = value
         if folderName == "":
             return
-        old_file_type = CeciliaLib.getVar("audioFileType")
         cfileins = CeciliaLib.getControlPanel().getCfileinList()
-        num_snds = len(cfileins[0].fileMenu.choice)
-        dlg = wx.ProgressDialog("Batch processing on sound folder", "", maximum=num_snds, parent=self,
-                               style=wx.PD_APP_MODAL | wx.PD_AUTO_HIDE | wx.PD_SMOOTH)
-        dlg.SetMinSize((600, -1))
-        dlg.SetClientSize((600, 100))
-        count = 0
-        totaltime = CeciliaLib.getVar("totalTime")
+        inputName = cfileins[0].getName()
+        presetData = CeciliaLib.getPresetDict()
+        variables = dict([(key, CeciliaLib.getVar(key)) for key in Headless.JOB_VARS])
+        jobs = []
+        cfileins[0].finishScan()
         for snd in cfileins[0].fileMenu.choice:
-            cfileins[0].onSelectSound(-1, snd)
-            if CeciliaLib.getVar("useSoundDur"):
-                cfileins[0].setTotalTime()
-            path, dump = os.path.split(cfileins[0].filePath)
+            info = cfileins[0].folderInfo[CeciliaLib.ensureNFD(snd)]
+            path, dump = os.path.split(info['path'])
             name, ext = os.path.splitext(snd)
-            lext = ext.lower()
-            if lext in [".wav", ".wave"]:
-                CeciliaLib.setVar('audioFileType', "wav")
-            elif lext in [".aif", ".aiff", ".aifc"]:
-                CeciliaLib.setVar('audioFileType', "aif")
-            elif lext in [".ogg"]:
-                CeciliaLib.setVar('audioFileType', "ogg")
-            elif lext in [".flac"]:
-                CeciliaLib.setVar('audioFileType', "flac")
-            elif lext in [".au"]:
-                CeciliaLib.setVar('audioFileType', "au")
-            elif lext in [".sd2"]:
-                CeciliaLib.setVar('audioFileType', "sd2")
-            elif lext in [".caf"]:
-                CeciliaLib.setVar('audioFileType', "caf")
             if not os.path.isdir(os.path.join(path, folderName)):
                 os.mkdir(os.path.join(path, folderName))
             filename = os.path.join(path, folderName, "%s-%s%s" % (name, folderName, ext))
-            count += 1
-            (keepGoing, skip) = dlg.Update(count, "Exporting %s" % filename)
-            CeciliaLib.getControlPanel().onBatchProcessing(filename)
-            while (CeciliaLib.getVar("audioServer").isAudioServerRunning()):
-                time.sleep(.1)
-        if CeciliaLib.getVar("useSoundDur"):
-            CeciliaLib.getControlPanel().setTotalTime(totaltime)
-            CeciliaLib.getControlPanel().updateDurationSlider()
-
-        dlg.Destroy()
-        CeciliaLib.setVar('audioFileType', old_file_type)
+            dur = CeciliaLib.getVar("totalTime")
+            if CeciliaLib.getVar("useSoundDur"):
+                dur = info['dur']
+            jobs.append({"module": CeciliaLib.getVar("currentCeciliaFile"), "output": filename, "preset": presetData,
+                         "inputs": ["%s=%s" % (inputName, info['path'])], "dur": dur, "vars": variables})
+        if not jobs:
+            return
+        dlg = wx.ProgressDialog("Batch processing on sound folder", "", maximum=len(jobs), parent=self,
+                               style=wx.PD_APP_MODAL | wx.PD_AUTO_HIDE | wx.PD_SMOOTH | wx.PD_CAN_ABORT)
+        dlg.SetMinSize((600, -1))
+        dlg.SetClientSize((600, 100))
+        # The pool calls back from its own thread, the timer reads the results on the GUI thread.
+        results = []
+        pool = Headless.startRenderJobs(jobs, CeciliaLib.getVar("batchProcesses"), results.append)
+        self.batchState = {'dlg': dlg, 'pool': pool, 'results': results, 'count': 0, 'total': len(jobs), 'failed': []}
+        self.batchTimer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.onBatchTimer, self.batchTimer)
+        self.batchTimer.Start(100)
+
+    def onBatchTimer(self, evt):
+        state = self.batchState
+        message = ""
+        while state['count'] < len(state['results']):
+            filename, status = state['results'][state['count']]
+            state['count'] += 1
+            if not status:
+                state['failed'].append(os.path.split(filename)[1])
+            message = "Exported %s" % filename
+        if message:
+            keepGoing, skip = state['dlg'].Update(state['count'], message)
+        else:
+            keepGoing, skip = state['dlg'].Update(state['count'])
+        if keepGoing and state['count'] < state['total']:
+            return
+        self.batchTimer.Stop()
+        if not keepGoing:
+            state['pool'].terminate()
+        state['pool'].join()
+        state['dlg'].Destroy()
+        self.batchState = None
+        if state['failed']:
+            CeciliaLib.showErrorDialog("Batch processing on sound folder",
+                                       "These sounds could not be processed:\n\n%s" % "\n".join(state['failed']))
 
     def applyBatchProcessingPreset(self, value):
         folderName = value
@@ -234,11 +250,14 @@ class CeciliaMainFrame(wx.Frame):
             CeciliaLib.openCeciliaFile(self, event, builtin)
 
     def onOpenRandom(self, event):
-        categories = [folder for folder in os.listdir(MODULES_PATH) if not folder.startswith(".")]
-        category = random.choice(categories)
-        files = [f for f in os.listdir(os.path.join(MODULES_PATH, category)) if f.endswith(FILE_EXTENSION)]
-        file = random.choice(files)
-        self.onOpen(os.path.join(MODULES_PATH, category, file), True)
+        # Only modules that the catalog finds valid, this is also the fallback when a module fails
+        catalog = CeciliaLib.getModuleCatalog()
+        root, directories, files = CeciliaLib.buildFileTree()
+        modules = [os.path.join(root, dir, f) for dir in directories for f in files[dir] if f.endswith(FILE_EXTENSION)]
+        modules = [path for path in modules if catalog.isValid(path)]
+        catalog.save()
+        if modules:
+            self.onOpen(random.choice(modules), True)
 
     def openRecent(self, event):
         menu = self.GetMenuBar()
@@ -103,12 +103,51 @@ except:
     for information on downloading source or binaries."""
     raise ImportError("NumPy not found. \n" + msg)
 
+def decimate(scaled):
+    """Min/max per pixel column decimation of screen coordinates.
+
+    For every integer x column, keeps the first, the lowest, the highest and
+    the last point, in their original order. The polyline drawn from the result
+    covers the same pixels as the full one, but its size depends on the canvas
+    width instead of the number of points.
+    """
+    n = len(scaled)
+    if n < 8:
+        return scaled
+    cols = _Numeric.floor(scaled[:, 0])
+    starts = _Numeric.concatenate(([0], _Numeric.flatnonzero(cols[1:] != cols[:-1]) + 1))
+    if len(starts) * 4 >= n:
+        return scaled
+    ends = _Numeric.append(starts[1:], n) - 1
+    seg = _Numeric.repeat(_Numeric.arange(len(starts)), _Numeric.diff(_Numeric.append(starts, n)))
+    order = _Numeric.lexsort((scaled[:, 1], seg))
+    keep = _Numeric.unique(_Numeric.concatenate((starts, ends, order[starts], order[ends])))
+    return scaled[keep]
+
+def cull(scaled, clip=None, spacing=1.0):
+    """Removes markers that fall outside the clip rectangle (x, y, w, h) or
+    that land on the same `spacing` pixels cell as a previous marker."""
+    if len(scaled) < 2:
+        return scaled
+    if clip is not None:
+        x, y, w, h = clip
+        inside = (scaled[:, 0] >= x) & (scaled[:, 0] <= x + w) & (scaled[:, 1] >= y) & (scaled[:, 1] <= y + h)
+        scaled = scaled[inside]
+        if len(scaled) < 2:
+            return scaled
+    cells = _Numeric.floor(scaled / spacing)
+    same = _Numeric.all(cells[1:] == cells[:-1], axis=1)
+    return scaled[_Numeric.concatenate(([True], ~same))]
+
 class PolyPoints:
     """Base Class for lines and markers
         - All methods are private.
     """
     def __init__(self, points, attr):
-        self._points = _Numeric.array(points).astype(_Numeric.float32)
+        # float64 arrays (e.g. Line.getArray()) are used without any copy
+        self._source = points
+        self._points = _Numeric.asarray(points, dtype=_Numeric.float64)
+        self.clip = None
         self._logscale = (False, False)
         self.currentScale = (1, 1)
         self.currentShift = (0, 0)
@@ -126,7 +165,8 @@ class PolyPoints:
     def __getattr__(self, name):
         if name == 'points':
             if len(self._points) > 0:
-                data = _Numeric.array(self._points, copy=True)
+                # log10() works on a compressed copy, the points are never modified
+                data = self._points
                 if self._logscale[0]:
                     data = self.log10(data, 0)
                 if self._logscale[1]:
@@ -197,7 +237,8 @@ class PolyLine(PolyPoints):
     _attributes = {'colour': 'black',
                    'width': 1,
                    'style': wx.SOLID,
-                   'legend': ''}
+                   'legend': '',
+                   'lod': None}
 
     def __init__(self, points, **attr):
         """Creates PolyLine object
@@ -208,9 +249,24 @@ class PolyLine(PolyPoints):
                     'width'= 1,                 - Pen width
                     'style'= wx.SOLID,          - wx.Pen style
                     'legend'= ''                - Line Legend to display
+                    'lod'= None                 - dict used to cache the decimated
+                                                  line between draws (None = no decimation)
         """
         PolyPoints.__init__(self, points, attr)
 
+    def getDrawPoints(self):
+        """Returns the decimated screen points, reusing the cached ones
+        while the source points, the scale and the shift are unchanged."""
+        lod = self.attributes['lod']
+        if lod is None:
+            return self.scaled
+        key = (tuple(self.currentScale), tuple(self.currentShift), self._logscale, len(self._points))
+        if lod.get('source') is not self._source or lod.get('key') != key:
+            lod['source'] = self._source
+            lod['key'] = key
+            lod['points'] = decimate(self.scaled)
+        return lod['points']
+
     def draw(self, gc, coord=None):
         colour = self.attributes['colour']
         width = self.attributes['width']
@@ -222,7 +278,7 @@ class PolyLine(PolyPoints):
         gc.SetPen(pen)
         if coord is None:
             if len(self.scaled) >= 2:
-                gc.DrawLines(self.scaled.tolist())
+                gc.DrawLines(self.getDrawPoints().tolist())
         else:
             gc.DrawLines(coord.tolist()) # draw legend line, not used in Cecilia
 
@@ -261,7 +317,8 @@ class PolyMarker(PolyPoints):
                    'fillcolour': None,
                    'fillstyle': wx.SOLID,
                    'marker': 'circle',
-                   'legend': ''}
+                   'legend': '',
+                   'cull': False}
 
     def __init__(self, points, **attr):
         """Creates PolyMarker object
@@ -275,6 +332,7 @@ class PolyMarker(PolyPoints):
                 'fillstyle'= wx.SOLID,      - wx.Brush fill style (use wx.TRANSPARENT for no fill)
                 'marker'= 'circle'          - Marker shape
                 'legend'= ''                - Marker Legend to display
+                'cull'= False               - Skip off-screen and overlapping markers
 
             Marker Shapes:
                 - 'circle'
@@ -312,7 +370,10 @@ class PolyMarker(PolyPoints):
         else:
             gc.SetBrush(wx.Brush(colour, fillstyle))
         if coord is None:
-            self._drawmarkers(gc, self.scaled, marker, size)
+            if self.attributes['cull']:
+                self._drawmarkers(gc, cull(self.scaled, self.clip), marker, size)
+            else:
+                self._drawmarkers(gc, self.scaled, marker, size)
         else:
             self._drawmarkers(gc, coord, marker, size) # draw legend marker
 
@@ -370,6 +431,16 @@ class PlotGraphics:
         self.title = title
         self.xLabel = xLabel
         self.yLabel = yLabel
+        self.background = []
+        self.backgroundKey = None
+
+    def setBackground(self, objects, key):
+        """Sets the objects drawn in the cached background layer of the canvas.
+        objects - subset of the graph objects that rarely change
+        key - the layer is redrawn only when this value changes
+        """
+        self.background = objects
+        self.backgroundKey = key
 
     def setLogScale(self, logscale):
         if type(logscale) != tuple:
@@ -415,8 +486,19 @@ class PlotGraphics:
         """Get the title at the top of graph"""
         return self.title
 
+    def setClip(self, clip):
+        """Sets the visible rectangle (x, y, w, h), in screen coords, on every object."""
+        for o in self.objects:
+            o.clip = clip
+
     def draw(self, gc):
+        background = set([id(o) for o in self.background])
         for o in self.objects:
+            if id(o) not in background:
+                o.draw(gc)
+
+    def drawBackground(self, gc):
+        for o in self.background:
             o.draw(gc)
 
     def getSymExtent(self):
@@ -534,6 +616,8 @@ class PlotCanvas(wx.Panel):
         self._logscale = (False, False)
         self._background_bitmap = None
         self._oldSize = wx.Size(0, 0)
+        self._layer = None
+        self._layerKey = None
 
         # Zooming variables
         self._zoomInFactor = 0.5
@@ -1034,22 +1118,40 @@ class PlotCanvas(wx.Panel):
         self._pointShift = shift
 
         size = dc.GetSize()
-        dc.SetPen(wx.Pen(self._backColour, 1))
-        dc.SetBrush(wx.Brush(self._backColour))
-        dc.DrawRectangle(0, 0, size[0], size[1])
         ptx, pty, rectWidth, rectHeight = self._point2ClientCoord(p1, p2)
-        if self._background_bitmap is not None and CeciliaLib.getVar("graphTexture"):
-            if size != self._oldSize:
-                self._scaled_background_bitmap = self._background_bitmap.GetSubBitmap(wx.Rect(0, 0, rectWidth, rectHeight))
-                self._oldSize = size
-            dc.DrawBitmap(self._scaled_background_bitmap, ptx, pty)
-
-        self._drawAxes(dc, p1, p2, scale, shift, xticks, yticks)
-
         graphics.scaleAndShift(scale, shift)
+        graphics.setClip((ptx - 5, pty - 5, rectWidth + 10, rectHeight + 10))
+
+        # Background layer (texture, axes and background objects) is cached
+        # in a bitmap and only redrawn when the view or its objects change.
+        layerKey = (size[0], size[1], tuple(p1), tuple(p2), tuple(scale), tuple(shift), self.getLogScale(),
+                    CeciliaLib.getVar("graphTexture"), graphics.backgroundKey)
+        if self._layer is None or graphics.backgroundKey is None or layerKey != self._layerKey:
+            self._layer = wx.EmptyBitmap(size[0], size[1])
+            ldc = wx.MemoryDC(self._layer)
+            ldc.SetFont(self._getFont(self._fontSizeAxis))
+            ldc.SetPen(wx.Pen(self._backColour, 1))
+            ldc.SetBrush(wx.Brush(self._backColour))
+            ldc.DrawRectangle(0, 0, size[0], size[1])
+            if self._background_bitmap is not None and CeciliaLib.getVar("graphTexture"):
+                if size != self._oldSize:
+                    self._scaled_background_bitmap = self._background_bitmap.GetSubBitmap(wx.Rect(0, 0, rectWidth, rectHeight))
+                    self._oldSize = size
+                ldc.DrawBitmap(self._scaled_background_bitmap, ptx, pty)
+
+            self._drawAxes(ldc, p1, p2, scale, shift, xticks, yticks)
+
+            if graphics.background:
+                ldc.SetClippingRegion(ptx - 5, pty - 5, rectWidth + 10, rectHeight + 10)
+                lgc = wx.GraphicsContext_Create(ldc)
+                graphics.drawBackground(lgc)
+                del lgc
+                ldc.DestroyClippingRegion()
+            ldc.SelectObject(wx.NullBitmap)
+            self._layerKey = layerKey
+        dc.DrawBitmap(self._layer, 0, 0)
 
         # set clipping area so drawing does not occur outside axis box
-        ptx, pty, rectWidth, rectHeight = self._point2ClientCoord(p1, p2)
         dc.SetClippingRegion(ptx - 5, pty - 5, rectWidth + 10, rectHeight + 10)
 
         # Draw the lines and markers
@@ -18,7 +18,7 @@ You should have received a copy of the GNU General Public License
 along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import wx, os, math, copy
+import wx, os, copy
 import wx.lib.scrolledpanel as scrolled
 import Resources.CeciliaLib as CeciliaLib
 from .constants import *
@@ -198,7 +198,7 @@ class CECControl(scrolled.ScrolledPanel):
             self.plugins[i].setKnobLabels()
             self.plugins[i].checkArrows()
 
-        graphData = CeciliaLib.getVar("grapher").getPlotter().getData()
+        plotter = CeciliaLib.getVar("grapher").getPlotter()
 
         if self.plugins[i1].pluginName == 'None':
             CeciliaLib.setPlugins(None, i1)
@@ -206,10 +206,9 @@ class CECControl(scrolled.ScrolledPanel):
             oldKnobNames = self.plugins[i1].getKnobNames()
             self.plugins[i1].setKnobNames()
             for i, old in enumerate(oldKnobNames):
-                for line in graphData:
-                    if line.name == old:
-                        line.name = self.plugins[i1].getKnobNames()[i]
-                        break
+                line = plotter.getLineFromName(old)
+                if line is not None:
+                    plotter.renameLine(line, self.plugins[i1].getKnobNames()[i])
             CeciliaLib.setPlugins(self.plugins[i1], i1)
             choice.extend(self.plugins[i1].getKnobLongLabels())
 
@@ -219,10 +218,9 @@ class CECControl(scrolled.ScrolledPanel):
             oldKnobNames = self.plugins[i2].getKnobNames()
             self.plugins[i2].setKnobNames()
             for i, old in enumerate(oldKnobNames):
-                for line in graphData:
-                    if line.name == old:
-                        line.name = self.plugins[i2].getKnobNames()[i]
-                        break
+                line = plotter.getLineFromName(old)
+                if line is not None:
+                    plotter.renameLine(line, self.plugins[i2].getKnobNames()[i])
             CeciliaLib.setPlugins(self.plugins[i2], i2)
             choice.extend(self.plugins[i2].getKnobLongLabels())
 
@@ -403,6 +401,8 @@ class CECControl(scrolled.ScrolledPanel):
         self.vuMeter = VuMeter(self.outputPanel)
         self.meterSizer.Add(self.vuMeter, 0, wx.EXPAND | wx.ALIGN_LEFT | wx.LEFT | wx.BOTTOM, 8)
         CeciliaLib.getVar("audioServer").setAmpCallable(self.vuMeter)
+        if CeciliaLib.getVar("updateBus") is not None:
+            CeciliaLib.getVar("updateBus").register("rms", self.vuMeter.showRms)
 
         # Channels choice
         self.lineSizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -665,6 +665,8 @@ class CInputBase(wx.Panel):
         self.bitrate = 0
         self.filePath = ''
         self.folderInfo = None
+        self.scanStop = None
+        self.scanPending = []
         self.mode = 0
 
         mainSizer = wx.FlexGridSizer(4, 1, 0, 0)
@@ -811,10 +813,20 @@ class CInputBase(wx.Panel):
             root = path
             isfile = False
 
+        self.stopScan()
         pathList = []
-        for p in os.listdir(root):
+        for p in sorted(os.listdir(root)):
             pathList.append(os.path.join(root, p))
-        self.folderInfo = CeciliaLib.getVar("audioServer").getSoundsFromList(pathList)
+        # Sounds missing from the metadata cache are read in the background,
+        # except the one needed right now for the menu label.
+        server = CeciliaLib.getVar("audioServer")
+        pending = []
+        self.folderInfo = server.getSoundsFromList(pathList, pending)
+        if isfile and path in pending:
+            pending.remove(path)
+            self.folderInfo.update(server.getSoundsFromList([path]))
+        while not self.folderInfo and pending:
+            self.folderInfo.update(server.getSoundsFromList([pending.pop(0)]))
         files = list(self.folderInfo.keys())
         files.sort()
 
@@ -824,6 +836,32 @@ class CInputBase(wx.Panel):
         else:
             self.fileMenu.setLabel(CeciliaLib.ensureNFD(files[0]))
 
+        if pending:
+            self.scanPending = pending
+            self.scanStop = server.scanSounds(pending, lambda sounds, stop: wx.CallAfter(self.addScannedSounds, sounds, stop))
+
+    def addScannedSounds(self, sounds, stop=None):
+        if stop is not None and stop.is_set():
+            return
+        for file in sounds:
+            if file not in self.folderInfo:
+                self.folderInfo[file] = sounds[file]
+        files = list(self.folderInfo.keys())
+        files.sort()
+        self.fileMenu.setChoice(files)
+
+    def stopScan(self):
+        if self.scanStop is not None:
+            self.scanStop.set()
+            self.scanStop = None
+
+    def finishScan(self):
+        """Completes the folder scan in the calling thread (uses the cache for already scanned files)."""
+        if self.scanStop is not None:
+            self.stopScan()
+            self.addScannedSounds(CeciliaLib.getVar("audioServer").getSoundsFromList(self.scanPending))
+            self.scanPending = []
+
     def listenSoundfile(self):
         CeciliaLib.listenSoundfile(self.filePath)
 
@@ -842,11 +880,13 @@ class CInputBase(wx.Panel):
             self.samplerFrame.loopOutSlider.setRange(0, newMaxDur)
         except:
             pass
+        self.samplerFrame.updateWaveform()
 
     def setOffset(self, value):
         CeciliaLib.getVar("userInputs")[self.name]['off%s' % self.name] = value
         self.samplerFrame.offsetSlider.Enable()
         self.samplerFrame.offsetSlider.SetValue(value)
+        self.samplerFrame.updateWaveform()
 
     def getOffset(self):
         return self.samplerFrame.offsetSlider.GetValue()
@@ -920,8 +960,10 @@ class CSampler(CInputBase):
     def onSelectSound(self, idx, file):
         self.getSoundInfos(file)
 
-        for line in CeciliaLib.getVar("grapher").plotter.getData():
-            if line.getName() == self.samplerFrame.loopInSlider.getCName() or line.getName() == self.samplerFrame.loopOutSlider.getCName():
+        plotter = CeciliaLib.getVar("grapher").plotter
+        for slider in [self.samplerFrame.loopInSlider, self.samplerFrame.loopOutSlider]:
+            line = plotter.getLineFromName(slider.getCName())
+            if line is not None:
                 line.changeYrange((0, self.duration))
 
         if CeciliaLib.getVar("currentModule") is not None:
@@ -974,7 +1016,7 @@ class CfileinFrame(BaseInputFrame):
     def __init__(self, parent, name):
         BaseInputFrame.__init__(self, parent, name)
 
-        self.SetClientSize((385, 143))
+        self.SetClientSize((385, 207))
 
         panel = wx.Panel(self, -1, style=wx.BORDER_SIMPLE)
         w, h = self.GetSize()
@@ -985,6 +1027,10 @@ class CfileinFrame(BaseInputFrame):
         self.title = FrameLabel(panel, '', size=(w - 2, 50))
         box.Add(self.title, 0, wx.ALL, 1)
 
+        # Waveform overview
+        self.waveform = WaveformView(panel, size=(w - 42, 60))
+        box.Add(self.waveform, 0, wx.LEFT | wx.TOP, 20)
+
         box.Add(200, 2, 0)
 
         #toolbox
@@ -1038,17 +1084,23 @@ class CfileinFrame(BaseInputFrame):
         self.sampRate = sampRate
         soundInfoText = self.createHeader()
         self.title.setLabel(soundInfoText)
+        self.waveform.setSound(path, dur)
+        self.updateWaveform()
+
+    def updateWaveform(self):
+        self.waveform.setCursor(self.offsetSlider.GetValue())
 
     def liveInputHeader(self, yes=True):
         if yes:
             self.title.setLabel("Audio table will be filled with live input.")
+            self.waveform.setSound('', 0)
         else:
             self.title.setLabel("")
 
 class SamplerFrame(BaseInputFrame):
     def __init__(self, parent, name):
         BaseInputFrame.__init__(self, parent, name)
-        w, h = 390, 300
+        w, h = 390, 364
         self.size = (w, h)
         self.SetClientSize(self.size)
         self.dur = 0
@@ -1063,6 +1115,10 @@ class SamplerFrame(BaseInputFrame):
         self.title = FrameLabel(panel, '', size=(w - 2, 50))
         box.Add(self.title, 0, wx.ALL, 1)
 
+        # Waveform overview
+        self.waveform = WaveformView(panel, size=(w - 42, 60))
+        box.Add(self.waveform, 0, wx.LEFT | wx.TOP, 20)
+
         box.Add(200, 5, 0)
 
         # Static label for the offset slider
@@ -1205,6 +1261,7 @@ class SamplerFrame(BaseInputFrame):
         self.setLoopMode(1)
         self.setStartFromLoop(0)
         self.setLoopX([1, 0])
+        self.updateWaveform()
 
     def update(self, path, dur, type, bitDepth, chanNum, sampRate):
         self.path = path
@@ -1219,6 +1276,13 @@ class SamplerFrame(BaseInputFrame):
         self.loopInSlider.setValue(0)
         self.loopOutSlider.setRange(0, self.dur)
         self.loopOutSlider.setValue(self.dur)
+        self.waveform.setSound(path, dur)
+        self.updateWaveform()
+
+    def updateWaveform(self):
+        offset = self.offsetSlider.GetValue()
+        self.waveform.setCursor(offset)
+        self.waveform.setRegion(offset + self.loopInSlider.getValue(), self.loopOutSlider.getValue())
 
     def liveInputHeader(self, yes=True, mode=2):
         if yes:
@@ -1226,6 +1290,7 @@ class SamplerFrame(BaseInputFrame):
                 self.title.setLabel("Audio table will be filled with live input.")
             else:
                 self.title.setLabel("Audio table (double buffered) will be continuously filled with live input.")
+            self.waveform.setSound('', 0)
         else:
             self.title.setLabel("")
 
@@ -1287,9 +1352,11 @@ class SamplerFrame(BaseInputFrame):
     def handleLoopIn(self, value):
         if CeciliaLib.getVar("currentModule") is not None:
             CeciliaLib.getVar("currentModule")._samplers[self.name].setStart(value)
+        self.updateWaveform()
 
     def setLoopIn(self, values):
         self.loopInSlider.setValue(values[0])
+        self.updateWaveform()
         self.loopInSlider.setPlay(values[1])
         if len(values) > 3:
             self.loopInSlider.setMidiCtl(values[4])
@@ -1318,9 +1385,11 @@ class SamplerFrame(BaseInputFrame):
     def handleLoopOut(self, value):
         if CeciliaLib.getVar("currentModule") is not None:
             CeciliaLib.getVar("currentModule")._samplers[self.name].setDur(value)
+        self.updateWaveform()
 
     def setLoopOut(self, values):
         self.loopOutSlider.setValue(values[0])
+        self.updateWaveform()
         self.loopOutSlider.setPlay(values[1])
         if len(values) > 3:
             self.loopOutSlider.setMidiCtl(values[4])
@@ -1765,35 +1834,8 @@ class SamplerSlider:
 
     def setAutomationData(self, data):
         # convert values on scaling
-        temp = []
-        log = self.getLog()
-        minval = self.getMinValue()
-        maxval = self.getMaxValue()
-        automationlength = self.getAutomationLength()
-        frac = automationlength / CeciliaLib.getVar("totalTime")
-        virtuallength = len(data) / frac
-        data.extend([data[-1]] * int(((1 - frac) * virtuallength)))
-        totallength = float(len(data))
-        oldpos = 0
-        oldval = data[0]
-        if log:
-            maxOnMin = maxval / minval
-            torec = math.log10(oldval / minval) / math.log10(maxOnMin)
-        else:
-            maxMinusMin = maxval - minval
-            torec = (oldval - minval) / maxMinusMin
-        temp.append([0.0, torec])
-
-        for i, val in enumerate(data):
-            length = (i - oldpos) / totallength
-            pos = oldpos / totallength + length
-            if log:
-                torec = math.log10(val / minval) / math.log10(maxOnMin)
-            else:
-                torec = (val - minval) / maxMinusMin
-            temp.append([pos, torec])
-            oldval = val
-            oldpos = i
+        temp = CeciliaLib.automationToPoints(data, self.getAutomationLength(), self.getMinValue(),
+                                             self.getMaxValue(), self.getLog())
 
         self.automationData = temp
 
@@ -1803,6 +1845,7 @@ class SamplerSlider:
     def onMidiLearn(self, evt):
         if evt.ShiftDown():
             self.setMidiCtl(None)
+            CeciliaLib.getVar("audioServer").removeMidiBinding(self)
         elif CeciliaLib.getVar("useMidi"):
             CeciliaLib.getVar("audioServer").midiLearn(self)
             self.slider.inMidiLearnMode()
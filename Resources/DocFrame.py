@@ -5,6 +5,8 @@ import wx
 import wx.stc as stc
 from .constants import *
 from .API_interface import *
+from .DocIndex import DocIndex
+from .ModuleCatalog import getModuleDoc
 import Resources.CeciliaLib as CeciliaLib
 
 _INTRO_TEXT = """
@@ -499,12 +501,14 @@ class ManualPanel_modules(ManualPanel):
     def __init__(self, parent):
         ManualPanel.__init__(self, parent)
         self.root, self.directories, self.files = CeciliaLib.buildFileTree()
+        self.index = DocIndex(DOC_INDEX_FILE, CeciliaLib.getModuleCatalog())
         self.parse()
 
     def parse(self):
         if BUILD_RST:
             prepare_doc_tree()
         self.cleanup()
+        self.index.update(self.root, self.directories, self.files)
         self.needToParse = True
         count = 1
         win = self.makePanel("Modules")
@@ -534,21 +538,9 @@ class ManualPanel_modules(ManualPanel):
 
     def parseOnSearchPage(self, keyword):
         self.cleanup()
-        keyword = keyword.lower()
-        for key in self.directories:
-            for key2 in self.files[key]:
-                with open(os.path.join(self.root, key, key2), "r") as f:
-                    text = f.read().lower()
-                    first = text.find('"""')
-                    if first != -1:
-                        newline = text.find("\n", first)
-                        second = text.find('"""', newline)
-                        text = text[newline + 1:second]
-                    else:
-                        text = "module not documented..."
-                    if keyword in text:
-                        win = self.makePanel(os.path.join(self.root, key, key2))
-                        self.AddPage(win, key2)
+        for key in self.index.search(keyword):
+            win = self.makePanel(os.path.join(self.root, key))
+            self.AddPage(win, os.path.split(key)[1])
         self.setStyle()
         wx.CallAfter(self.AdjustSize)
 
@@ -559,64 +551,36 @@ class ManualPanel_modules(ManualPanel):
             if obj == "Modules":
                 if BUILD_RST:
                     create_modules_index()
-                panel.win = stc.StyledTextCtrl(panel, -1, size=(600, 480), style=wx.BORDER_SUNKEN)
-                panel.win.SetUseHorizontalScrollBar(False)
-                panel.win.SetUseVerticalScrollBar(False)
                 text = ""
                 for cat in _MODULE_CATEGORIES:
                     l = _CATEGORY_OVERVIEW[cat].splitlines()[1].replace('"', '').strip()
                     text += "# %s\n    %s\n" % (cat, l)
-                panel.win.SetText(_MODULES_TEXT + text)
+                panel.text = _MODULES_TEXT + text
             elif obj in _MODULE_CATEGORIES:
                 if BUILD_RST:
                     create_category_index(obj, _CATEGORY_OVERVIEW[obj], self.files[obj])
-                panel.win = stc.StyledTextCtrl(panel, -1, size=(600, 480), style=wx.BORDER_SUNKEN)
-                panel.win.SetUseHorizontalScrollBar(False)
-                panel.win.SetUseVerticalScrollBar(False)
                 text = _CATEGORY_OVERVIEW[obj]
                 for file in self.files[obj]:
                     text += "# %s\n" % file
-                    with open(os.path.join(self.root, obj, file), "r") as f:
-                        t = f.read()
-                        first = t.find('"""')
-                        if first != -1:
-                            newline = t.find("\n", first)
-                            second = t.find('\n', newline + 2)
-                            text += t[newline + 1:second].replace('"', '')
-                            text += "\n"
-                panel.win.SetText(text)
+                    entry = self.index.getEntry(os.path.join(self.root, obj, file), self.root)
+                    if entry is not None and entry['summary']:
+                        text += entry['summary'] + "\n"
+                panel.text = text
             elif os.path.isfile(obj):
-                with open(obj, "r") as f:
-                    text = f.read()
-                    first = text.find('"""')
-                    if first != -1:
-                        newline = text.find("\n", first)
-                        second = text.find('"""', newline)
-                        text = text[newline + 1:second]
-                    else:
-                        text = '"Module not documented..."'
-                    if BUILD_RST:
-                        create_module_doc_page(obj, text)
-                obj = os.path.split(obj)[1]
-                panel.win = stc.StyledTextCtrl(panel, -1, size=(600, 480), style=wx.BORDER_SUNKEN)
-                panel.win.SetUseHorizontalScrollBar(False)
-                panel.win.SetUseVerticalScrollBar(False)
-                panel.win.SetText(text)
+                entry = self.index.getEntry(obj, self.root)
+                if entry is not None:
+                    text = entry['doc']
+                else:
+                    text = getModuleDoc(self.index.catalog.get(obj))
+                if BUILD_RST:
+                    create_module_doc_page(obj, text)
+                panel.text = text
             else:
                 var = eval(obj)
                 if isinstance(var, str):
-                    panel.win = stc.StyledTextCtrl(panel, -1, size=(600, 480), style=wx.BORDER_SUNKEN)
-                    panel.win.SetUseHorizontalScrollBar(False)
-                    panel.win.SetUseVerticalScrollBar(False)
-                    panel.win.SetText(var)
+                    panel.text = var
                 else:
-                    text = var.__doc__
-                    panel.win = stc.StyledTextCtrl(panel, -1, size=(600, 480), style=wx.BORDER_SUNKEN)
-                    panel.win.SetUseHorizontalScrollBar(False)
-                    panel.win.SetUseVerticalScrollBar(False)
-                    panel.win.SetText(text)
-
-            panel.win.SaveFile(CeciliaLib.ensureNFD(os.path.join(DOC_PATH, obj)))
+                    panel.text = var.__doc__
         return panel
 
     def getPage(self, word):
@@ -640,7 +604,7 @@ class ManualPanel_modules(ManualPanel):
                     panel.isLoad = True
                     panel.win = stc.StyledTextCtrl(panel, -1, size=panel.GetSize(), style=wx.BORDER_SUNKEN)
                     panel.win.SetUseHorizontalScrollBar(False)
-                    panel.win.LoadFile(os.path.join(CeciliaLib.ensureNFD(DOC_PATH), word))
+                    panel.win.SetText(panel.text)
                     panel.win.SetMarginWidth(1, 0)
                     if self.searchKey is not None:
                         words = complete_words_from_str(panel.win.GetText(), self.searchKey)
@@ -0,0 +1,173 @@
+# encoding: utf-8
+"""
+Copyright 2011 iACT, Universite de Montreal, Jean Piche, Olivier Belanger, Jean-Michel Dumas
+
+This file is part of Cecilia 5.
+
+Cecilia 5 is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Cecilia 5 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import os, re, marshal, hashlib
+from .ModuleCatalog import getModuleDoc, getModuleSummary
+
+DOC_INDEX_VERSION = 2
+
+# Score of a token according to the part of the module it comes from
+DOC_INDEX_WEIGHTS = {'name': 10, 'category': 5, 'widget': 3, 'doc': 1}
+
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9_]+", text.lower())
+
+
+class DocIndex:
+    """
+    Persistent inverted index of the modules documentation.
+
+    For every module, the index keeps its file stamp, category, docstring,
+    summary line and the tokens of its name, category, widget names and
+    docstring, as read by the module catalog. The inverted index maps each token to the modules containing
+    it, with a score. The index is saved in `path` with the fingerprint of
+    the modules tree. When the tree changes, only the modules whose files
+    changed are read again.
+    """
+    def __init__(self, path, catalog):
+        self.path = path
+        self.catalog = catalog
+        self.fingerprint = None
+        self.entries = {}
+        self.postings = {}
+        self.tokenCache = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                version, fingerprint, entries = marshal.load(f)
+            if version == DOC_INDEX_VERSION:
+                self.fingerprint = fingerprint
+                self.entries = entries
+                for key in entries:
+                    self.addPostings(key)
+        except:
+            pass
+
+    def save(self):
+        try:
+            with open(self.path + ".tmp", "wb") as f:
+                marshal.dump((DOC_INDEX_VERSION, self.fingerprint, self.entries), f)
+            os.replace(self.path + ".tmp", self.path)
+        except:
+            print("Unable to write the documentation index.")
+
+    def update(self, root, directories, files):
+        "Brings the index up to date with the modules tree (as returned by CeciliaLib.buildFileTree)."
+        stamps = {}
+        for category in directories:
+            for name in files[category]:
+                try:
+                    stat = os.stat(os.path.join(root, category, name))
+                    stamps[os.path.join(category, name)] = (stat.st_size, int(stat.st_mtime))
+                except:
+                    pass
+        fingerprint = hashlib.sha1(repr(sorted(stamps.items())).encode("utf-8")).hexdigest()
+        if fingerprint == self.fingerprint:
+            return
+
+        for key in list(self.entries.keys()):
+            if key not in stamps or self.entries[key]['stamp'] != stamps[key]:
+                self.removePostings(key)
+                del self.entries[key]
+        for key in stamps:
+            if key not in self.entries:
+                category, name = os.path.split(key)
+                self.entries[key] = self.parseModule(os.path.join(root, key), category, name, stamps[key])
+                self.addPostings(key)
+        self.fingerprint = fingerprint
+        self.tokenCache = {}
+        self.catalog.save()
+        self.save()
+
+    def parseModule(self, path, category, name, stamp):
+        info = self.catalog.get(path)
+        doc = getModuleDoc(info)
+        widgets = [widget[key] for widget in info['widgets'] for key in ['name', 'label'] if isinstance(widget[key], str)]
+        tokens = {}
+        fields = [('name', os.path.splitext(name)[0]), ('category', category),
+                  ('widget', " ".join(widgets)), ('doc', doc)]
+        for field, value in fields:
+            for token in tokenize(value):
+                tokens[token] = tokens.get(token, 0) + DOC_INDEX_WEIGHTS[field]
+        return {'stamp': stamp, 'category': category, 'doc': doc, 'summary': getModuleSummary(info),
+                'widgets': widgets, 'tokens': tokens}
+
+    def addPostings(self, key):
+        for token, score in self.entries[key]['tokens'].items():
+            if token not in self.postings:
+                self.postings[token] = {}
+            self.postings[token][key] = score
+
+    def removePostings(self, key):
+        for token in self.entries[key]['tokens']:
+            modules = self.postings.get(token)
+            if modules is not None:
+                modules.pop(key, None)
+                if not modules:
+                    del self.postings[token]
+
+    def getEntry(self, path, root):
+        try:
+            return self.entries.get(os.path.relpath(path, root))
+        except ValueError:
+            # not on the same drive as the modules
+            return None
+
+    def getMatchingTokens(self, term):
+        if term in self.tokenCache:
+            return self.tokenCache[term]
+        # While typing, the tokens matching a word are among the ones matching the word minus its last letter
+        candidates = self.tokenCache.get(term[:-1], self.postings.keys())
+        tokens = [token for token in candidates if term in token]
+        if len(self.tokenCache) > 256:
+            self.tokenCache = {}
+        self.tokenCache[term] = tokens
+        return tokens
+
+    def search(self, keyword):
+        """
+        Returns the keys of the modules containing every word of `keyword`,
+        best matches first. A word matches the tokens containing it, exact
+        matches and prefixes count more.
+        """
+        terms = tokenize(keyword)
+        if not terms:
+            return []
+        scores = None
+        for term in terms:
+            termScores = {}
+            for token in self.getMatchingTokens(term):
+                if token == term:
+                    factor = 3
+                elif token.startswith(term):
+                    factor = 2
+                else:
+                    factor = 1
+                for key, score in self.postings[token].items():
+                    termScores[key] = termScores.get(key, 0) + score * factor
+            if scores is None:
+                scores = termScores
+            else:
+                scores = dict([(key, scores[key] + termScores[key]) for key in scores if key in termScores])
+        return sorted(scores.keys(), key=lambda key: (-scores[key], key))
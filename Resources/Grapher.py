@@ -59,6 +59,9 @@ class Line:
         self.curved = False
         self.lines = []
         self.dataToDraw = []
+        self._array = None
+        self.lod = {}
+        self.version = 0
         self.initData = self.getLineState()
         if curved:
             self.setCurvedLine()
@@ -82,8 +85,10 @@ class Line:
         dict = copy.deepcopy(dict)
         data = dict['data']
         self.data = self.denormalize(data)
+        self._array = None
         self.curved = dict.get('curved', False)
         self.checkIfCurved()
+        self.version += 1
         self.modified = True
 
     def changeYrange(self, newrange):
@@ -92,6 +97,7 @@ class Line:
         self.scale = self.yrange[1] - self.yrange[0]
         self.offset = self.yrange[0]
         self.setLineState(d)
+        self.version += 1
         self.modified = True
 
     def getColour(self):
@@ -106,45 +112,68 @@ class Line:
     def getData(self):
         return self.data
 
+    def getArray(self):
+        "Returns the breakpoints as a cached (N, 2) float64 array."
+        if self._array is None:
+            self._array = _Numeric.array(self.data, dtype=_Numeric.float64).reshape(-1, 2)
+        return self._array
+
     def setData(self, list):
         self.data = list
+        self._array = None
         self.checkIfCurved()
+        self.version += 1
         self.modified = True
 
     def reset(self):
         self.setLineState(self.initData)
         self.initData = self.getLineState()
+        self.version += 1
         self.modified = True
 
     def setPoint(self, point, value):
         self.data[point] = value
+        self._array = None
         self.checkIfCurved()
+        self.version += 1
         self.modified = True
 
     def move(self, list, offset):
-        self.data = [[l[0] - offset[0], l[1] - offset[1]] for l in list]
+        self._array = _Numeric.array(list, dtype=_Numeric.float64).reshape(-1, 2) - offset
+        self.data = self._array.tolist()
         self.checkIfCurved()
+        self.version += 1
         self.modified = True
 
     def moveLog(self, list, offset):
-        self.data = [[l[0] - offset[0], l[1] * offset[1]] for l in list]
+        self._array = _Numeric.array(list, dtype=_Numeric.float64).reshape(-1, 2)
+        self._array[:, 0] -= offset[0]
+        self._array[:, 1] *= offset[1]
+        self.data = self._array.tolist()
         self.checkIfCurved()
+        self.version += 1
         self.modified = True
 
     def insert(self, pos, value):
         self.data.insert(pos, value)
+        self._array = None
         self.checkIfCurved()
+        self.version += 1
         self.modified = True
 
     def deletePoint(self, pos):
         del self.data[pos]
+        self._array = None
         self.checkIfCurved()
+        self.version += 1
         self.modified = True
 
     def deletePointFromPoint(self, point):
         if point in self.data:
             self.data.remove(point)
+            self._array = None
             self.checkIfCurved()
+            self.version += 1
             self.modified = True
 
     def setShow(self, state):
@@ -190,34 +219,24 @@ class Line:
         return self.lines
 
     def normalize(self):
-        data = [p for p in self.getData()]
+        data = _Numeric.array(self.getArray())
         yrange = self.getYrange()
-        totaltime = CeciliaLib.getVar("totalTime")
-        templist = []
+        data[:, 0] /= CeciliaLib.getVar("totalTime")
         if self.getLog():
-            for l in data:
-                l0 = l[0] / totaltime
-                l1 = math.log10(l[1] / yrange[0]) / math.log10(yrange[1] / yrange[0])
-                templist.append([l0, l1])
+            data[:, 1] = _Numeric.log10(data[:, 1] / yrange[0]) / math.log10(yrange[1] / yrange[0])
         else:
-            for l in data:
-                l0 = l[0] / totaltime
-                l1 = (l[1] - yrange[0]) / (yrange[1] - yrange[0])
-                templist.append([l0, l1])
-        return templist
+            data[:, 1] = (data[:, 1] - yrange[0]) / (yrange[1] - yrange[0])
+        return data.tolist()
 
     def denormalize(self, data):
+        data = _Numeric.array(data, dtype=_Numeric.float64).reshape(-1, 2)
         yrange = self.getYrange()
-        totaltime = CeciliaLib.getVar("totalTime")
+        data[:, 0] *= CeciliaLib.getVar("totalTime")
         if self.getLog():
-            for l in data:
-                l[0] = l[0] * totaltime
-                l[1] = math.pow(10, l[1] * (math.log10(yrange[1]) - math.log10(yrange[0])) + math.log10(yrange[0]))
+            data[:, 1] = _Numeric.power(10, data[:, 1] * (math.log10(yrange[1]) - math.log10(yrange[0])) + math.log10(yrange[0]))
         else:
-            for l in data:
-                l[0] = l[0] * totaltime
-                l[1] = l[1] * (yrange[1] - yrange[0]) + yrange[0]
-        return data
+            data[:, 1] = data[:, 1] * (yrange[1] - yrange[0]) + yrange[0]
+        return data.tolist()
 
     def setCurvedLine(self):
         if self.curved:
@@ -226,6 +245,7 @@ class Line:
             self.curved = True
             self.lines = linToCosCurve(data=[p for p in self.getData()], yrange=self.getYrange(),
                                        totaldur=CeciliaLib.getVar("totalTime"), points=1024, log=self.getLog())
+        self.version += 1
         self.modified = True
 
     def checkIfCurved(self):
@@ -264,9 +284,12 @@ class Grapher(plot.PlotCanvas):
         self.selected = 0 # selected curve
         self._oldSelected = -1
         self._graphCreation = True
+        self._backgroundVersion = 0
         self.data = []
-        self._currentData = []
-        self._oldData = []
+        self._lineIndex = {}
+        self._linePositions = {}
+        self._snapshots = {}
+        self._historySize = 0
         self.visibleLines = []
         self._pencilData = []
         self._pencilDir = 0
@@ -319,6 +342,39 @@ class Grapher(plot.PlotCanvas):
     def getData(self):
         return self.data
 
+    def sendLineData(self, l, data=None):
+        "Sends the breakpoints of a line to the running module."
+        if data is None:
+            if l.getCurved():
+                data = l.getLines()
+            else:
+                data = l.getData()
+        slider = l.slider
+        if slider is None:
+            widget_type = "graph"
+        else:
+            widget_type = slider.widget_type
+            if widget_type == "slider":
+                if l.getSuffix() == "sampler":
+                    widget_type = "sampler"
+                    sampler_name = slider.name
+            elif widget_type == "range":
+                if l.getLabel().endswith("min"):
+                    which = 0
+                elif l.getLabel().endswith("max"):
+                    which = 1
+        if widget_type == "graph":
+            CeciliaLib.getVar("currentModule")._graphs[l.name].setValue(data)
+        elif widget_type == "range":
+            CeciliaLib.getVar("currentModule")._sliders[l.name].setGraph(which, data)
+        elif widget_type == "sampler":
+            CeciliaLib.getVar("currentModule")._samplers[sampler_name].setGraph(l.name, data)
+        elif widget_type == "slider":
+            CeciliaLib.getVar("currentModule")._sliders[l.name].setGraph(data)
+        elif widget_type == "plugin_knob":
+            CeciliaLib.getVar("audioServer").setPluginGraph(slider.getParentVPos(), slider.getKnobPos(), data)
+        l.setModified(False)
+
     def setSelected(self, which):
         self.selectedPoints = []
         if self._zoomed:
@@ -339,25 +395,53 @@ class Grapher(plot.PlotCanvas):
     def getLine(self, which):
         return self.data[which]
 
+    def getLineFromName(self, name, suffix=None):
+        for line in self._lineIndex.get(name, []):
+            if suffix is None or line.suffix == suffix:
+                return line
+        return None
+
+    def getLineIndex(self, line):
+        return self._linePositions[id(line)]
+
+    def renameLine(self, line, name):
+        line.name = name
+        self.reindexLines()
+
+    def reindexLines(self):
+        self._lineIndex = {}
+        self._linePositions = {}
+        for i, line in enumerate(self.data):
+            self._lineIndex.setdefault(line.getName(), []).append(line)
+            self._linePositions[id(line)] = i
+
     def removeLine(self, name):
-        for line in self.data:
-            if line.getName() == name:
-                self.data.remove(line)
-                break
+        line = self.getLineFromName(name)
+        if line is not None:
+            self.data.remove(line)
+            self.reindexLines()
         self.draw()
 
     def removeLines(self, names):
+        removed = False
         for name in names:
-            for line in self.data:
-                if line.getName() == name:
-                    self.data.remove(line)
-                    break
+            line = self.getLineFromName(name)
+            if line is not None:
+                self.data.remove(line)
+                # keeps the index valid for the next names, positions are rebuilt below
+                self._lineIndex[name].remove(line)
+                removed = True
+        if removed:
+            self.reindexLines()
         self.draw()
 
     def createLine(self, data, yrange, colour, label='', log=False, name='', size=8192, slider=None, suffix='', curved=False):
         if data[0][0] != 0: data[0][0] = 0
         if data[-1][0] != self.totaltime: data[-1][0] = self.totaltime
-        self.data.append(Line(data, yrange, colour, label, log, name, size, slider, suffix, curved))
+        line = Line(data, yrange, colour, label, log, name, size, slider, suffix, curved)
+        self._lineIndex.setdefault(name, []).append(line)
+        self._linePositions[id(line)] = len(self.data)
+        self.data.append(line)
         # self.draw()
 
     def onCopy(self):
@@ -397,91 +481,105 @@ class Grapher(plot.PlotCanvas):
         self.selectedPoints = [i for i in range(len(data))]
         self.draw()
 
+    def takeSnapshot(self, line):
+        self._snapshots[id(line)] = (line, line.version, _Numeric.array(line.normalize(), dtype=_Numeric.float64).reshape(-1, 2), line.getCurved())
+
     def checkForHistory(self, fromUndo=False):
-        if self._oldData != self._currentData:
-            self.addHistory(fromUndo)
-            self._oldData = self._currentData
-
-    def addHistory(self, fromUndo=False):
-        data = {}
-        for i, l in enumerate(self.data):
-            data[i] = l.getLineState()
-        if len(self._history) > 100:
-            del self._history[-1]
-        if len(self._history):
-            if data != self._history[0]:
-                self._history.insert(0, data)
-        else:
-            self._history.insert(0, data)
-        if not fromUndo:
+        # Only lines whose version changed since their last snapshot are diffed.
+        deltas = []
+        for l in self.data:
+            snapshot = self._snapshots.get(id(l))
+            if snapshot is None or snapshot[0] is not l:
+                self.takeSnapshot(l)
+            elif snapshot[1] != l.version:
+                self.takeSnapshot(l)
+                delta = lineDelta(l, snapshot[2], snapshot[3], self._snapshots[id(l)][2], l.getCurved())
+                if delta is not None:
+                    deltas.append(delta)
+        if len(self._snapshots) > len(self.data):
+            self._snapshots = dict([(id(l), self._snapshots[id(l)]) for l in self.data])
+        if deltas:
+            self.addHistory(deltas, fromUndo)
+
+    def addHistory(self, deltas, fromUndo=False):
+        if not fromUndo and self._historyPoint > 0:
+            # a new edit discards the undone steps
+            for entry in self._history[:self._historyPoint]:
+                self._historySize -= historyEntrySize(entry)
+            del self._history[:self._historyPoint]
             self._historyPoint = 0
+        self._history.insert(0, deltas)
+        self._historySize += historyEntrySize(deltas)
+        budget = CeciliaLib.getVar("undoMemory") * 1048576
+        while len(self._history) > 1 and self._historySize > budget:
+            self._historySize -= historyEntrySize(self._history.pop())
+        self.updateUndoMenu()
+
+    def applyHistory(self, deltas, undo):
+        for delta in deltas:
+            line, start, old, new, oldCurved, newCurved = delta
+            snapshot = self._snapshots.get(id(line))
+            if line not in self.data or snapshot is None:
+                continue
+            current = snapshot[2]
+            if undo:
+                data = _Numeric.concatenate((current[:start], old, current[start + len(new):]))
+                curved = oldCurved
+            else:
+                data = _Numeric.concatenate((current[:start], new, current[start + len(old):]))
+                curved = newCurved
+            line.setLineState({'data': data.tolist(), 'curved': curved})
+            self._snapshots[id(line)] = (line, line.version, data, curved)
 
     def undoRedo(self, dir):
-        if dir == 1 and self._historyPoint < (len(self._history) - 1):
+        if dir == 1 and self._historyPoint < len(self._history):
+            self.applyHistory(self._history[self._historyPoint], True)
             self._historyPoint += dir
-            for i, l in enumerate(self.data):
-                l.setLineState(self._history[self._historyPoint][i])
             self.draw()
         elif dir == -1 and self._historyPoint > 0:
             self._historyPoint += dir
-            for i, l in enumerate(self.data):
-                l.setLineState(self._history[self._historyPoint][i])
+            self.applyHistory(self._history[self._historyPoint], False)
             self.draw()
+        self.updateUndoMenu()
 
-        if len(self._history) > 0:
-            if self._historyPoint >= (len(self._history) - 1):
-                self.menubarUndo.Enable(False)
-            else:
-                self.menubarUndo.Enable(True)
-            if self._historyPoint <= 0:
-                self.menubarRedo.Enable(False)
-            else:
-                self.menubarRedo.Enable(True)
-        else:
-            self.menubarUndo.Enable(False)
-            self.menubarRedo.Enable(False)
+    def updateUndoMenu(self):
+        self.menubarUndo.Enable(self._historyPoint < len(self._history))
+        self.menubarRedo.Enable(self._historyPoint > 0)
 
     def rescaleLinLin(self, data, yrange, currentYrange):
-        scale = yrange[1] - yrange[0]
-        currentScale = currentYrange[1] - currentYrange[0]
-        offset = yrange[0]
-        currentOffset = currentYrange[0]
-        scaling = currentScale / scale
-        return [[p[0], (p[1] - offset) * scaling + currentOffset] for p in data]
+        data = _Numeric.array(data, dtype=_Numeric.float64).reshape(-1, 2)
+        scaling = (currentYrange[1] - currentYrange[0]) / (yrange[1] - yrange[0])
+        data[:, 1] = (data[:, 1] - yrange[0]) * scaling + currentYrange[0]
+        return data
 
     def rescaleLogLog(self, data, yrange, currentYrange):
-        list = []
+        data = _Numeric.array(data, dtype=_Numeric.float64).reshape(-1, 2)
         totalRange = math.log10(yrange[1] / yrange[0])
         currentTotalRange = math.log10(currentYrange[1] / currentYrange[0])
         currentMin = math.log10(currentYrange[0])
-        for p in data:
-            ratio = math.log10(p[1] / yrange[0]) / totalRange
-            list.append([p[0], math.pow(10, ratio * currentTotalRange + currentMin)])
-        return list
+        ratio = _Numeric.log10(data[:, 1] / yrange[0]) / totalRange
+        data[:, 1] = _Numeric.power(10, ratio * currentTotalRange + currentMin)
+        return data
 
     def rescaleLinLog(self, data, yrange, currentYrange):
-        list = []
+        data = _Numeric.array(data, dtype=_Numeric.float64).reshape(-1, 2)
         if yrange[0] == 0: yoffrange = .00001
         else: yoffrange = yrange[0]
         totalRange = yrange[1] - yoffrange
         currentTotalRange = math.log10(currentYrange[1] / currentYrange[0])
         currentMin = math.log10(currentYrange[0])
-        for p in data:
-            if p[1] == 0: p1 = .00001
-            else: p1 = p[1]
-            ratio = (p1 - yoffrange) / totalRange
-            list.append([p[0], math.pow(10, ratio * currentTotalRange + currentMin)])
-        return list
+        p1 = _Numeric.where(data[:, 1] == 0, .00001, data[:, 1])
+        ratio = (p1 - yoffrange) / totalRange
+        data[:, 1] = _Numeric.power(10, ratio * currentTotalRange + currentMin)
+        return data
 
     def rescaleLogLin(self, data, yrange, currentYrange):
-        list = []
+        data = _Numeric.array(data, dtype=_Numeric.float64).reshape(-1, 2)
         totalRange = math.log10(yrange[1] / yrange[0])
         currentTotalRange = currentYrange[1] - currentYrange[0]
-        currentMin = currentYrange[0]
-        for p in data:
-            ratio = math.log10(p[1] / yrange[0]) / totalRange
-            list.append([p[0], ratio * currentTotalRange + currentMin])
-        return list
+        ratio = _Numeric.log10(data[:, 1] / yrange[0]) / totalRange
+        data[:, 1] = ratio * currentTotalRange + currentYrange[0]
+        return data
 
     def adjustZoomCorners(self, new):
         currentLine = self.getLine(self.getSelected())
@@ -534,9 +632,13 @@ class Grapher(plot.PlotCanvas):
             needRedrawNonSelCurves = True
         else:
             needRedrawNonSelCurves = False
+        if needRedrawNonSelCurves:
+            self._backgroundVersion += 1
+        background = []
+        backgroundKey = [self._backgroundVersion, currentLog, tuple(currentYrange)]
 
         for l in tmpData:
-            index = self.data.index(l)
+            index = self.getLineIndex(l)
             if index == self.lineOver:
                 col = 'black'
             else:
@@ -544,57 +646,37 @@ class Grapher(plot.PlotCanvas):
             if l.getShow():
                 if l.getCurved():
                     data = l.getLines()
+                    points = data
                 else:
                     data = l.getData()
+                    points = l.getArray()
                 if index == self.selected:
-                    slider = l.slider
-                    if slider is None:
-                        widget_type = "graph"
-                    else:
-                        widget_type = slider.widget_type
-                        if widget_type == "slider":
-                            if l.getSuffix() == "sampler":
-                                widget_type = "sampler"
-                                sampler_name = slider.name
-                        elif widget_type == "range":
-                            if l.getLabel().endswith("min"):
-                                which = 0
-                            elif l.getLabel().endswith("max"):
-                                which = 1
-                    line = plot.PolyLine(data, colour=col, width=2, legend=l.getLabel())
+                    line = plot.PolyLine(points, colour=col, width=2, legend=l.getLabel(), lod=l.lod)
                     if self.movingCurve:
-                        marker = plot.PolyMarker([l.getData()[0], l.getData()[-1]], size=1.1, marker="bmp", fillcolour='black')
+                        marker = plot.PolyMarker(l.getArray()[[0, -1]], size=1.1, marker="bmp", fillcolour='black')
                     else:
-                        marker = plot.PolyMarker(l.getData(), size=1.1, marker="bmp", fillcolour='black')
+                        marker = plot.PolyMarker(l.getArray(), size=1.1, marker="bmp", fillcolour='black', cull=True)
                     if CeciliaLib.getVar("currentModule") is not None and l.getModified():
-                        if widget_type == "graph":
-                            CeciliaLib.getVar("currentModule")._graphs[l.name].setValue(data)
-                        elif widget_type == "range":
-                            CeciliaLib.getVar("currentModule")._sliders[l.name].setGraph(which, data)
-                        elif widget_type == "sampler":
-                            CeciliaLib.getVar("currentModule")._samplers[sampler_name].setGraph(l.name, data)
-                        elif widget_type == "slider":
-                            CeciliaLib.getVar("currentModule")._sliders[l.name].setGraph(data)
-                        elif widget_type == "plugin_knob":
-                            CeciliaLib.getVar("audioServer").setPluginGraph(slider.getParentVPos(), slider.getKnobPos(), data)
-                        l.setModified(False)
+                        self.sendLineData(l, data)
                 else:
                     if needRedrawNonSelCurves:
                         if currentLog:
                             if l.getLog():
-                                dataToDraw = self.rescaleLogLog(data, l.getYrange(), currentYrange)
+                                dataToDraw = self.rescaleLogLog(points, l.getYrange(), currentYrange)
                             else:
-                                dataToDraw = self.rescaleLinLog(data, l.getYrange(), currentYrange)
+                                dataToDraw = self.rescaleLinLog(points, l.getYrange(), currentYrange)
                         else:
                             if l.getLog():
-                                dataToDraw = self.rescaleLogLin(data, l.getYrange(), currentYrange)
+                                dataToDraw = self.rescaleLogLin(points, l.getYrange(), currentYrange)
                             else:
-                                dataToDraw = self.rescaleLinLin(data, l.getYrange(), currentYrange)
+                                dataToDraw = self.rescaleLinLin(points, l.getYrange(), currentYrange)
                         l.dataToDraw = dataToDraw
                     else:
                         dataToDraw = l.dataToDraw
-                    line = plot.PolyLine(dataToDraw, colour=col, width=1, legend=l.getLabel())
+                    line = plot.PolyLine(dataToDraw, colour=col, width=1, legend=l.getLabel(), lod=l.lod)
                     marker = plot.PolyMarker([], size=1, marker="none")
+                    background.append(line)
+                    backgroundKey.append((id(l), id(dataToDraw), col))
                 if l.getLog():
                     line.setLogScale((False, True))
                     marker.setLogScale((False, True))
@@ -606,7 +688,7 @@ class Grapher(plot.PlotCanvas):
                 markers.append(marker)
                 if self.selectedPoints and index == self.selected:
                     try:
-                        selmarker = plot.PolyMarker([l.getData()[selp] for selp in self.selectedPoints],
+                        selmarker = plot.PolyMarker(l.getArray()[self.selectedPoints],
                                                 size=1.5, marker="bmpsel", fillcolour='white')
                         markers.append(selmarker)
                     except:
@@ -615,8 +697,8 @@ class Grapher(plot.PlotCanvas):
         lines.extend(markers)
 
         gc = plot.PlotGraphics(lines, 'Title', '', '')
+        gc.setBackground(background, tuple(backgroundKey))
         self.Draw(gc, xAxis=(0, self.totaltime), yAxis=currentYrange)
-        self._currentData = self.getRawData()
 
     def OnLeave(self, event):
         self.curve = None
@@ -657,7 +739,7 @@ class Grapher(plot.PlotCanvas):
         ldata = self.GetClosestPointOnCurve(pos, curve.getLabel(), pointScaled=True)
         # test the distance of the closest point
         if ldata[5] < 5:
-            l = self.data.index(self.visibleLines[ldata[0]])
+            l = self.getLineIndex(self.visibleLines[ldata[0]])
             line = self.data[l]
             if line.getCurved():
                 if ldata[2] == 0 or ldata[2] == (len(line.getLines()) - 1):
@@ -694,7 +776,7 @@ class Grapher(plot.PlotCanvas):
         if ldata:
             # grab a point and select the line
             if ldata[5] < 5:
-                l = self.data.index(self.visibleLines[ldata[0]])
+                l = self.getLineIndex(self.visibleLines[ldata[0]])
                 p = ldata[2]
                 line = self.data[l]
                 if line.getCurved():
@@ -968,9 +1050,9 @@ class Grapher(plot.PlotCanvas):
                     ldata = self.GetClosestPointOnCurve(curvePosCheck, curve.getLabel(), pointScaled=True)
                     if ldata[5] < 10:
                         if ldata[0] < len(self.visibleLines):
-                            l = self.data.index(self.visibleLines[ldata[0]])
-                            if self.data.index(curve) == l:
-                                self.lineOver = self.data.index(curve)
+                            l = self.getLineIndex(self.visibleLines[ldata[0]])
+                            if self.getLineIndex(curve) == l:
+                                self.lineOver = self.getLineIndex(curve)
                                 self.lineOverGate = True
                 else:
                     # Check mouse over if not curved
@@ -983,13 +1065,13 @@ class Grapher(plot.PlotCanvas):
                     if i >= (len(curveData) - 2):
                         i = len(curveData) - 3
                     if distanceToSegment(checkPos, curveData[i], curveData[i + 1], 0, self.totaltime, currentYrange[0], currentYrange[1], False, curve.getLog()) <= pourcent:
-                        self.lineOver = self.data.index(curve)
+                        self.lineOver = self.getLineIndex(curve)
                         self.lineOverGate = True
                     elif distanceToSegment(checkPos, curveData[i - 1], curveData[i], 0, self.totaltime, currentYrange[0], currentYrange[1], False, curve.getLog()) <= pourcent:
-                        self.lineOver = self.data.index(curve)
+                        self.lineOver = self.getLineIndex(curve)
                         self.lineOverGate = True
                     elif distanceToSegment(checkPos, curveData[i + 1], curveData[i + 2], 0, self.totaltime, currentYrange[0], currentYrange[1], False, curve.getLog()) <= pourcent:
-                        self.lineOver = self.data.index(curve)
+                        self.lineOver = self.getLineIndex(curve)
                         self.lineOverGate = True
                     else:
                         self.lineOver = None
@@ -1033,11 +1115,11 @@ class Grapher(plot.PlotCanvas):
                         self._pencilData.append(pos)
                 if pos[0] >= points[-1]:
                     line.deletePoint(-1)
-                    line.data.append([CeciliaLib.getVar("totalTime"), pos[1]])
+                    line.insert(len(line.getData()), [CeciliaLib.getVar("totalTime"), pos[1]])
                     self._pencilData.append(pos)
                 elif pos[0] <= points[0]:
                     line.deletePoint(0)
-                    line.data.insert(0, [0.0, pos[1]])
+                    line.insert(0, [0.0, pos[1]])
                     self._pencilData.append(pos)
                 if line.getSlider() is not None:
                     line.getSlider().setPlay(1)
@@ -1482,15 +1564,15 @@ class CECGrapher(wx.Panel):
                     slider.setAutomationLength(CeciliaLib.getControlPanel().getNonZeroTime())
                     path = slider.getPath()
                     data = convert(path + "_000", slider, threshold, which=None)
-                    for line in self.plotter.getData():
-                        if line.getName() == slider.getCName():
-                            self.setLineData(line, data)
-                            line.setShow(1)
-                            ind = self.plotter.getData().index(line)
-                            self.plotter.setSelected(ind)
-                            self.setSelected(ind)
-                            slider.setRec(0)
-                            slider.setPlay(1)
+                    line = self.plotter.getLineFromName(slider.getCName())
+                    if line is not None:
+                        self.setLineData(line, data)
+                        line.setShow(1)
+                        ind = self.plotter.getLineIndex(line)
+                        self.plotter.setSelected(ind)
+                        self.setSelected(ind)
+                        slider.setRec(0)
+                        slider.setPlay(1)
         if CeciliaLib.getVar("userSliders"):
             for slider in CeciliaLib.getVar("userSliders"):
                 if slider.getRec():
@@ -1498,26 +1580,26 @@ class CECGrapher(wx.Panel):
                     path = slider.getPath()
                     if type(slider.getValue()) not in [list, tuple]:
                         data = convert(path + "_000", slider, threshold, which=None)
-                        for line in self.plotter.getData():
-                            if line.getName() == slider.getName():
+                        line = self.plotter.getLineFromName(slider.getName())
+                        if line is not None:
+                            self.setLineData(line, data)
+                            ind = self.plotter.getLineIndex(line)
+                            self.plotter.setSelected(ind)
+                            self.setSelected(ind)
+                            slider.setRec(0)
+                            slider.setPlay(1)
+                    else:
+                        for i in range(2):
+                            ends = ['min', 'max']
+                            data = convert(path + "_00%d" % i, slider, threshold, which=i)
+                            line = self.plotter.getLineFromName(slider.getName(), ends[i])
+                            if line is not None:
                                 self.setLineData(line, data)
-                                ind = self.plotter.getData().index(line)
+                                ind = self.plotter.getLineIndex(line)
                                 self.plotter.setSelected(ind)
                                 self.setSelected(ind)
                                 slider.setRec(0)
                                 slider.setPlay(1)
-                    else:
-                        for i in range(2):
-                            ends = ['min', 'max']
-                            data = convert(path + "_00%d" % i, slider, threshold, which=i)
-                            for line in self.plotter.getData():
-                                if line.getName() == slider.getName() and line.getLabel().endswith(ends[i]):
-                                    self.setLineData(line, data)
-                                    ind = self.plotter.getData().index(line)
-                                    self.plotter.setSelected(ind)
-                                    self.setSelected(ind)
-                                    slider.setRec(0)
-                                    slider.setPlay(1)
         plugins = CeciliaLib.getVar("plugins")
         for plugin in plugins:
             if plugin is not None:
@@ -1527,28 +1609,25 @@ class CECGrapher(wx.Panel):
                         slider.setAutomationLength(CeciliaLib.getControlPanel().getNonZeroTime())
                         path = slider.getPath()
                         data = convert(path + "_000", slider, threshold)
-                        for line in self.plotter.getData():
-                            if line.getName() == slider.getName():
-                                self.setLineData(line, data)
-                                line.setShow(1)
-                                ind = self.plotter.getData().index(line)
-                                self.plotter.setSelected(ind)
-                                self.setSelected(ind)
-                                slider.setRec(0)
-                                slider.setPlay(1)
+                        line = self.plotter.getLineFromName(slider.getName())
+                        if line is not None:
+                            self.setLineData(line, data)
+                            line.setShow(1)
+                            ind = self.plotter.getLineIndex(line)
+                            self.plotter.setSelected(ind)
+                            self.setSelected(ind)
+                            slider.setRec(0)
+                            slider.setPlay(1)
 
     def setLineData(self, line, data):
         yrange = line.getYrange()
-        totaltime = self.plotter.getTotalTime()
+        data = _Numeric.array(data, dtype=_Numeric.float64).reshape(-1, 2)
+        data[:, 0] *= self.plotter.getTotalTime()
         if line.getLog():
-            for l in data:
-                l[0] = l[0] * totaltime
-                l[1] = math.pow(10, l[1] * (math.log10(yrange[1]) - math.log10(yrange[0])) + math.log10(yrange[0]))
+            data[:, 1] = _Numeric.power(10, data[:, 1] * (math.log10(yrange[1]) - math.log10(yrange[0])) + math.log10(yrange[0]))
         else:
-            for l in data:
-                l[0] = l[0] * totaltime
-                l[1] = l[1] * (yrange[1] - yrange[0]) + yrange[0]
-        line.setData(data)
+            data[:, 1] = data[:, 1] * (yrange[1] - yrange[0]) + yrange[0]
+        line.setData(data.tolist())
         self.plotter.draw()
         self.plotter.checkForHistory()
 
@@ -1586,6 +1665,21 @@ class ConvertSlider(PlainSlider):
         self.thresh = self.threshold * val
         self.rescale()
 
+def lineDelta(line, old, oldCurved, new, newCurved):
+    """Returns the changed point range between two normalized states of a line,
+    as (line, start, oldPoints, newPoints, oldCurved, newCurved), or None if equal."""
+    size = min(len(old), len(new))
+    same = _Numeric.all(old[:size] == new[:size], axis=1)
+    start = size if same.all() else int(_Numeric.argmin(same))
+    same = _Numeric.all(old[len(old) - size:][::-1] == new[len(new) - size:][::-1], axis=1)[:size - start]
+    end = len(same) if same.all() else int(_Numeric.argmin(same))
+    if start == len(old) == len(new) and oldCurved == newCurved:
+        return None
+    return (line, start, old[start:len(old) - end].copy(), new[start:len(new) - end].copy(), oldCurved, newCurved)
+
+def historyEntrySize(deltas):
+    return sum([d[2].nbytes + d[3].nbytes for d in deltas])
+
 def checkFunctionValidity(func, totaltime):
     for i, p in enumerate(func):
         func[i] = (p[0] * totaltime, float(p[1]))
@@ -1776,11 +1870,10 @@ def buildGrapher(grapher):
 def convert(path, slider, threshold, fromSlider=False, which=None):
     if not fromSlider:
         reclen = slider.getAutomationLength()
-        f = open(path, 'r')
-        data = f.read().split('\n')
-        data = [x.split() for x in data if x != '']
-        data = [float(x[1]) for x in data if float(x[0]) <= reclen]
-        f.close()
+        rec = _Numeric.load(path + ".npy", mmap_mode="r")
+        end = _Numeric.searchsorted(rec[:, 0], reclen, side="right")
+        data = rec[:end, 1].astype(_Numeric.float64)
+        del rec
         if which is not None:
             slider.setAutomationData(data, which)
         else:
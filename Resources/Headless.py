@@ -0,0 +1,594 @@
+# encoding: utf-8
+"""
+Copyright 2011 iACT, Universite de Montreal, Jean Piche, Olivier Belanger, Jean-Michel Dumas
+
+This file is part of Cecilia 5.
+
+Cecilia 5 is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Cecilia 5 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os, copy, argparse, multiprocessing, hashlib, shutil
+import pprint as pp
+import Resources.CeciliaLib as CeciliaLib
+from .constants import *
+from .Grapher import Line, checkFunctionValidity, checkLogValidity
+from . import audio
+
+# Cecilia variables copied from the interface into the batch render jobs.
+JOB_VARS = ["sr", "sampSize", "samplePrecision", "bufferSize", "globalFade", "startOffset", "builtinModule", "DEBUG"]
+
+LINE_COLOUR = ("#000000", "#000000", "#000000", "#000000")
+
+class HeadlessSlider:
+    """
+    Stand-in for CECSlider, CECRange, CECSplitter, SamplerSlider and PluginKnob.
+
+    Midi and OSC bindings are ignored, a headless render only uses the
+    stored value and the play state.
+
+    """
+    def __init__(self, widget_type, name, minvalue, maxvalue, value, play=0, log=False):
+        self.widget_type = widget_type
+        self.name = name
+        self.minvalue = minvalue
+        self.maxvalue = maxvalue
+        self.value = value
+        self.play = play
+        self.log = log
+        self.openSndCtrl = None
+        self.OSCOut = None
+        self.path = os.path.join(AUTOMATION_SAVE_PATH, self.name)
+
+    def getName(self):
+        return self.name
+
+    def getValue(self):
+        return self.value
+
+    def setValue(self, value):
+        self.value = value
+
+    def setOneValue(self, value, which):
+        self.value[which] = value
+
+    def getMinValue(self):
+        return self.minvalue
+
+    def getMaxValue(self):
+        return self.maxvalue
+
+    def getLog(self):
+        return self.log
+
+    def getPlay(self):
+        return self.play
+
+    def getRec(self):
+        return 0
+
+    def getWithMidi(self):
+        return False
+
+    def getWithOSC(self):
+        return False
+
+    def getMidiCtl(self):
+        return None
+
+    def getMidiChannel(self):
+        return 1
+
+    def getOpenSndCtrl(self):
+        return None
+
+    def getOSCOut(self):
+        return None
+
+    def getPath(self):
+        return self.path
+
+class HeadlessTogglePopup:
+    def __init__(self, type, name, value, labels=None):
+        self.type = type
+        self.name = name
+        self.value = value
+        self.labels = labels
+
+    def getName(self):
+        return self.name
+
+    def getValue(self):
+        return self.value
+
+    def setValue(self, value, dump=None):
+        self.value = value
+
+    def getLabel(self):
+        if self.labels is not None:
+            return self.labels[self.value]
+        return ''
+
+    def getFullValue(self):
+        return self.value, self.getLabel()
+
+class HeadlessFilein:
+    def __init__(self, name):
+        self.name = name
+        self.mode = CeciliaLib.getVar("userInputs")[name].get('mode', 0)
+
+    def getName(self):
+        return self.name
+
+    def getMode(self):
+        return self.mode
+
+    def getOffset(self):
+        return CeciliaLib.getVar("userInputs")[self.name].get('off' + self.name, 0)
+
+class HeadlessSampler(HeadlessFilein):
+    def __init__(self, name):
+        HeadlessFilein.__init__(self, name)
+        info = CeciliaLib.getVar("userInputs")[name]
+        dur = info.get('dur' + name, 1)
+        self.info = {'loopMode': info.get('loopMode', 1),
+                     'startFromLoop': info.get('startFromLoop', 0),
+                     'xfadeshape': info.get('xfadeshape', 0)}
+        defaults = {'loopIn': [0, 0, 0, False, None, 1, 0, dur, None, None],
+                    'loopOut': [dur, 0, 0, False, None, 1, 0, dur, None, None],
+                    'loopX': [1, 0, 0, False, None, 1, None, None],
+                    'gain': [0, 0, 0, False, None, 1, None, None],
+                    'transp': [0, 0, 0, False, None, 1, None, None]}
+        for key in defaults:
+            values = list(info.get(key, defaults[key]))
+            if len(values) < len(defaults[key]):
+                values = values[:3] + defaults[key][len(values[:3]):]
+            # no recording and no midi when rendering offline
+            values[2], values[3] = 0, False
+            self.info[key] = values
+        self.sliders = []
+        for key, suffix, mini, maxi in [('loopIn', 'start', 0, dur), ('loopOut', 'end', 0, dur),
+                                        ('loopX', 'xfade', 0, 50), ('gain', 'gain', -48, 18),
+                                        ('transp', 'trans', -48, 48)]:
+            slider = HeadlessSlider("slider", name + suffix, mini, maxi, self.info[key][0], self.info[key][1])
+            self.sliders.append(slider)
+
+    def getSamplerInfo(self):
+        return self.info
+
+    def getSamplerSliders(self):
+        return self.sliders
+
+class HeadlessPlugin:
+    def __init__(self, name, order, params, states):
+        self.name = name
+        self.params = params
+        self.knobs = []
+        for i, knob in enumerate(PLUGIN_KNOBS[name]):
+            template, mini, maxi, log = knob
+            play = 0
+            if states[i][1] == 2:
+                play = 1
+            self.knobs.append(HeadlessSlider("plugin_knob", template % order, mini, maxi, params[i], play, log))
+
+    def getName(self):
+        return self.name
+
+    def getParams(self):
+        return self.params
+
+    def getKnobs(self):
+        return self.knobs
+
+class HeadlessPlotter:
+    def __init__(self):
+        self.data = []
+        self._lineIndex = {}
+
+    def getData(self):
+        return self.data
+
+    def getLineFromName(self, name, suffix=None):
+        for line in self._lineIndex.get(name, []):
+            if suffix is None or line.suffix == suffix:
+                return line
+        return None
+
+    def createLine(self, data, yrange, label='', log=False, name='', size=8192, slider=None, suffix='', curved=False):
+        line = Line(data, yrange, LINE_COLOUR, label, log, name, size, slider, suffix, curved)
+        self._lineIndex.setdefault(name, []).append(line)
+        self.data.append(line)
+        return line
+
+class HeadlessGrapher:
+    def __init__(self):
+        self.plotter = HeadlessPlotter()
+
+    def getPlotter(self):
+        return self.plotter
+
+class HeadlessControlPanel:
+    def __init__(self, cfileinList):
+        self.cfileinList = cfileinList
+
+    def getCfileinList(self):
+        return self.cfileinList
+
+    def getCfileinFromName(self, name):
+        for cfilein in self.cfileinList:
+            if name == cfilein.getName():
+                return cfilein
+        return None
+
+class HeadlessInterface:
+    def __init__(self, controlPanel):
+        self.controlPanel = controlPanel
+
+    def getControlPanel(self):
+        return self.controlPanel
+
+def setInputs(presetData, inputs):
+    widgets = CeciliaLib.getVar("interfaceWidgets")
+    names = [w['name'] for w in widgets if w['type'] in ['cfilein', 'csampler']]
+    types = dict([(w['name'], w['type']) for w in widgets if w['type'] in ['cfilein', 'csampler']])
+    userInputs = copy.deepcopy(presetData.get('userInputs', {}))
+    for i, input in enumerate(inputs):
+        name, path = None, input
+        if '=' in input and input.split('=', 1)[0] in names:
+            name, path = input.split('=', 1)
+        elif i < len(names):
+            name = names[i]
+        if name is None:
+            print('Too many input sounds, "%s" bypassed!' % input)
+            continue
+        path = os.path.abspath(path)
+        info = userInputs.setdefault(name, {})
+        if info.get('path') != path:
+            # a new sound resets the loop points, as the sampler frame does
+            info.pop('loopIn', None)
+            info.pop('loopOut', None)
+        info['path'] = path
+    for name in names:
+        info = userInputs.setdefault(name, {'path': ''})
+        info['type'] = types[name]
+        info['mode'] = 0
+        if not os.path.isfile(info['path']):
+            print('"%s" has no input sound file, use --input to set one.' % name)
+            return False
+        infos = CeciliaLib.getVar("audioServer").getSoundInfo(info['path'])
+        if infos is None:
+            return False
+        info['nchnls' + name] = infos[0]
+        info['sr' + name] = infos[1]
+        info['dur' + name] = infos[2]
+        info.setdefault('off' + name, 0)
+    CeciliaLib.setVar("userInputs", userInputs)
+    fileins = []
+    for name in names:
+        if types[name] == 'csampler':
+            fileins.append(HeadlessSampler(name))
+        else:
+            fileins.append(HeadlessFilein(name))
+    CeciliaLib.setVar("userSamplers", [f for f in fileins if types[f.name] == 'csampler'])
+    CeciliaLib.setVar("interface", HeadlessInterface(HeadlessControlPanel(fileins)))
+    return True
+
+def setWidgets(presetData):
+    totaltime = CeciliaLib.getVar("totalTime")
+    sliderStates = presetData.get('userSliders', {})
+    togPopStates = presetData.get('userTogglePopups', {})
+    graphStates = presetData.get('userGraph', {})
+    grapher = HeadlessGrapher()
+    plotter = grapher.getPlotter()
+    sliders = []
+    togPops = []
+
+    def setLineState(line, key):
+        if key in graphStates:
+            line.setLineState(graphStates[key])
+
+    for widget in copy.deepcopy(CeciliaLib.getVar("interfaceWidgets")):
+        name = widget['name']
+        if widget['type'] == 'cgraph':
+            log = checkLogValidity(widget['rel'], widget['min'], widget['max'])
+            func = checkFunctionValidity(widget['func'], totaltime)
+            line = plotter.createLine(func, (widget['min'], widget['max']), widget['label'], log, name,
+                                      widget['size'], curved=widget['curved'])
+            setLineState(line, name)
+        elif widget['type'] in ['cslider', 'crange', 'csplitter']:
+            mini, maxi, init = widget['min'], widget['max'], widget['init']
+            log = checkLogValidity(widget['rel'], mini, maxi)
+            widget_type = {'cslider': 'slider', 'crange': 'range', 'csplitter': 'splitter'}[widget['type']]
+            if widget['type'] == 'cslider':
+                funcs, suffixes = [widget['func']], ['']
+            elif widget['type'] == 'crange':
+                funcs, suffixes = widget['func'], ['min', 'max']
+            else:
+                funcs, suffixes = [], []
+            play = 0
+            if not widget['up'] and None not in funcs:
+                play = 1
+            slider = HeadlessSlider(widget_type, name, mini, maxi, init, play, log)
+            if name in sliderStates:
+                slider.setValue(sliderStates[name][0])
+                slider.play = sliderStates[name][1]
+            sliders.append(slider)
+            if not widget['up']:
+                for j, func in enumerate(funcs):
+                    if type(init) == list:
+                        value = init[j]
+                    else:
+                        value = init
+                    if func is None:
+                        func = [(0, value), (1, value)]
+                    func = checkFunctionValidity(func, totaltime)
+                    line = plotter.createLine(func, (mini, maxi), widget['label'], log, name, 8192, slider, suffixes[j])
+                    setLineState(line, name + suffixes[j])
+        elif widget['type'] in ['ctoggle', 'cpopup', 'cgen']:
+            if widget['type'] == 'ctoggle':
+                togPop = HeadlessTogglePopup("toggle", name, int(widget['init']))
+            elif widget['type'] == 'cpopup':
+                values = widget['value']
+                init = widget.get('init', values[0])
+                index = 0
+                if init in values:
+                    index = values.index(init)
+                togPop = HeadlessTogglePopup("popup", name, index, values)
+            else:
+                togPop = HeadlessTogglePopup("gen", name, widget['init'])
+            if name in togPopStates:
+                togPop.setValue(togPopStates[name])
+            togPops.append(togPop)
+        elif widget['type'] == 'cpoly':
+            values = [str(voice) for voice in range(widget.get('min', 1), widget.get('max', 10) + 1)]
+            init = str(widget.get('init', values[0]))
+            index = 0
+            if init in values:
+                index = values.index(init)
+            chords = sorted(POLY_CHORDS.keys())
+            for togPop in [HeadlessTogglePopup("popup", name + 'num', index, values),
+                           HeadlessTogglePopup("popup", name, chords.index('00 - None'), chords)]:
+                if togPop.name in togPopStates:
+                    togPop.setValue(togPopStates[togPop.name])
+                togPops.append(togPop)
+
+    for sampler in CeciliaLib.getVar("userSamplers"):
+        for slider in sampler.getSamplerSliders():
+            value = slider.getValue()
+            line = plotter.createLine([(0, value), (totaltime, value)], (slider.getMinValue(), slider.getMaxValue()),
+                                      slider.getName(), False, slider.getName(), 8192, slider, 'sampler')
+            setLineState(line, slider.getName())
+
+    plugins = [None] * NUM_OF_PLUGINS
+    for key, values in presetData.get('plugins', {}).items():
+        name, params, states = values
+        if name == 'None' or name not in PLUGIN_KNOBS:
+            continue
+        plugin = HeadlessPlugin(name, int(key), params, states)
+        for knob in plugin.getKnobs():
+            value = knob.getValue()
+            line = plotter.createLine([(0, value), (totaltime, value)], (knob.getMinValue(), knob.getMaxValue()),
+                                      knob.getName(), knob.getLog(), knob.getName(), 8192, knob)
+            setLineState(line, knob.getName())
+        plugins[int(key)] = plugin
+
+    CeciliaLib.setVar("userSliders", sliders)
+    CeciliaLib.setVar("userTogglePopups", togPops)
+    CeciliaLib.setVar("plugins", plugins)
+    CeciliaLib.setVar("grapher", grapher)
+    CeciliaLib.setVar("morphPresets", presetData.get('morphPresets', []))
+
+def renderKey(filepath, presetData):
+    """
+    Returns the render cache key of the current render settings. The key is
+    a hash of the module source, the preset dictionary, the identity (path,
+    size, modification time) of the input sounds and the server settings.
+
+    """
+    h = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        h.update(f.read())
+    h.update(pp.pformat(presetData).encode("utf-8"))
+    userInputs = CeciliaLib.getVar("userInputs")
+    for name in sorted(userInputs.keys()):
+        path = userInputs[name]['path']
+        stat = os.stat(path)
+        h.update(("%s=%s:%d:%f" % (name, path, stat.st_size, stat.st_mtime)).encode("utf-8"))
+    for key in ["sr", "nchnls", "totalTime", "sampSize", "samplePrecision", "audioFileType", "globalFade", "startOffset"]:
+        h.update(("%s=%s" % (key, CeciliaLib.getVar(key))).encode("utf-8"))
+    return h.hexdigest()
+
+def copyFile(src, dst):
+    # Written under a temporary name, parallel renders may read or write the same file.
+    tmp = "%s.%d.tmp" % (dst, os.getpid())
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def render(filepath, output, preset=None, inputs=[], dur=None, cache=True):
+    """
+    Renders a Cecilia module to a soundfile without any graphical interface.
+
+    Parameters:
+
+    filepath : string
+        Path of the .c5 module.
+    output : string
+        Path of the soundfile to write. The format is taken from the extension.
+    preset : string or dict
+        Name of the preset to load, or a preset dictionary. Defaults to
+        "last save" if it exists, otherwise the module is rendered with
+        its interface's initial values.
+    inputs : list of strings
+        Input sounds, given in the order of the module's cfilein/csampler
+        widgets, or as "name=path" pairs.
+    dur : float
+        Duration of the render, in seconds. Defaults to the preset's duration.
+    cache : boolean
+        If True, an identical previous render is reused from the render cache
+        instead of being computed again.
+
+    """
+    CeciliaLib.setVar("headless", True)
+    CeciliaLib.setVar("useMidi", 0)
+    CeciliaLib.setVar("enableAudioInput", 0)
+    CeciliaLib.setVar("showSpectrum", 0)
+    CeciliaLib.setVar("toDac", False)
+
+    audioServer = CeciliaLib.getVar("audioServer")
+    if audioServer is None:
+        audioServer = audio.AudioServer()
+        CeciliaLib.setVar("audioServer", audioServer)
+
+    filepath = os.path.abspath(filepath)
+    if not audioServer.openCecFile(filepath):
+        return False
+    CeciliaLib.setVar("currentCeciliaFile", filepath)
+
+    presets = CeciliaLib.getVar("presets")
+    if isinstance(preset, dict):
+        presetData = copy.deepcopy(preset)
+    elif preset is None:
+        preset = "last save"
+        presetData = {}
+        if preset in presets:
+            presetData = copy.deepcopy(CeciliaLib.loadPresetGraph(preset))
+    elif preset in presets:
+        presetData = copy.deepcopy(CeciliaLib.loadPresetGraph(preset))
+    else:
+        print('Preset "%s" not found in %s.' % (preset, filepath))
+        return False
+
+    ext = os.path.splitext(output)[1].lower()
+    if ext not in AUDIO_FILE_EXTENSIONS:
+        print('Unknown output file format "%s".' % ext)
+        return False
+    CeciliaLib.setVar("audioFileType", AUDIO_FILE_EXTENSIONS[ext])
+    CeciliaLib.setVar("outputFile", os.path.abspath(output))
+    CeciliaLib.setVar("nchnls", presetData.get('nchnls', CeciliaLib.getVar("defaultNchnls")))
+    if dur is None:
+        dur = presetData.get('totalTime', CeciliaLib.getVar("defaultTotalTime"))
+    CeciliaLib.setVar("totalTime", dur)
+
+    if not setInputs(presetData, inputs):
+        return False
+
+    if cache:
+        cachedFile = os.path.join(RENDER_CACHE_PATH, renderKey(filepath, presetData) + ext)
+        if os.path.isfile(cachedFile):
+            copyFile(cachedFile, os.path.abspath(output))
+            os.utime(cachedFile, None)
+            print('"%s" is up to date (render cache).' % output)
+            return True
+
+    setWidgets(presetData)
+
+    audioServer.shutdown()
+    audioServer.reinit()
+    audioServer.boot()
+    audioServer.setAmp(presetData.get('gainSlider', 0))
+    if not audioServer.loadModule(CeciliaLib.getVar("currentModuleRef")):
+        return False
+    if os.path.isfile(output):
+        os.remove(output)
+    print('Rendering "%s" to "%s" (%.2f sec)...' % (os.path.split(filepath)[1], output, dur))
+    try:
+        audioServer.start(timer=False)
+        success = os.path.isfile(output) and os.path.getsize(output) > 0
+    except Exception as e:
+        print('Rendering "%s" failed: %s' % (output, e))
+        success = False
+    audioServer.shutdown()
+    if not success:
+        return False
+    if cache:
+        try:
+            if not os.path.isdir(RENDER_CACHE_PATH):
+                os.mkdir(RENDER_CACHE_PATH)
+            copyFile(os.path.abspath(output), cachedFile)
+            CeciliaLib.pruneCacheFolder(RENDER_CACHE_PATH, RENDER_CACHE_MAX_SIZE)
+        except:
+            pass
+    return True
+
+def renderJob(job):
+    """
+    Worker entry point of `renderJobs`. `job` is a dictionary with the
+    keys "module", "output", "preset", "inputs", "dur", "cache" and "vars",
+    the latter holding Cecilia variables to set before rendering.
+
+    """
+    for key, value in job.get("vars", {}).items():
+        CeciliaLib.setVar(key, value)
+    try:
+        status = render(job["module"], job["output"], job.get("preset"), job.get("inputs", []), job.get("dur"),
+                        job.get("cache", True))
+    except Exception as e:
+        print('Rendering "%s" failed: %s' % (job["output"], e))
+        status = False
+    return job["output"], status
+
+def makeRenderPool(jobs, processes=0):
+    if processes <= 0:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(jobs)))
+    # Forking a process running a wx application is not safe.
+    context = multiprocessing.get_context("spawn")
+    return context.Pool(processes=processes, maxtasksperchild=1)
+
+def renderJobs(jobs, processes=0):
+    """
+    Renders a list of jobs (see `renderJob`) in a pool of worker processes,
+    each one running its own offline pyo server. Yields (output, status)
+    tuples as the renders complete.
+
+    """
+    pool = makeRenderPool(jobs, processes)
+    try:
+        for result in pool.imap_unordered(renderJob, jobs):
+            yield result
+    except GeneratorExit:
+        pool.terminate()
+        raise
+    pool.close()
+    pool.join()
+
+def startRenderJobs(jobs, processes=0, callback=None):
+    """
+    Non-blocking version of `renderJobs`. `callback` is called with an
+    (output, status) tuple as each render completes, from a thread of the
+    pool, not from the caller's thread. Returns the pool, call its
+    terminate() method to abort the renders.
+
+    """
+    pool = makeRenderPool(jobs, processes)
+    for job in jobs:
+        pool.apply_async(renderJob, (job,), callback=callback)
+    pool.close()
+    return pool
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="Cecilia5", description="Renders a Cecilia module without the graphical interface.")
+    parser.add_argument("--render", required=True, metavar="MODULE", help="Path of the .c5 module to render.")
+    parser.add_argument("--preset", default=None, help='Name of the preset to load (default: "last save").')
+    parser.add_argument("--input", action="append", default=[], metavar="SOUND",
+                        help="Input sound, repeat for modules with many inputs. Use name=path to target a specific input.")
+    parser.add_argument("--dur", type=float, default=None, help="Duration of the render, in seconds.")
+    parser.add_argument("--out", required=True, help="Path of the output soundfile.")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="Always render, even if an identical render is cached.")
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.render):
+        print('Module "%s" not found.' % args.render)
+        return 1
+    if render(args.render, args.out, args.preset, args.input, args.dur, args.cache):
+        return 0
+    return 1
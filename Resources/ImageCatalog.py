@@ -0,0 +1,163 @@
+# encoding: utf-8
+"""
+Copyright 2011 iACT, Universite de Montreal, Jean Piche, Olivier Belanger, Jean-Michel Dumas
+
+This file is part of Cecilia 5.
+
+Cecilia 5 is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Cecilia 5 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import os, re, base64, marshal, struct, collections
+from io import BytesIO
+import wx
+
+IMAGE_PACK_VERSION = 1
+
+
+class CatalogImage:
+    """
+    Image of the catalog. It has the PyEmbeddedImage methods used by the
+    application, the PNG data is only read and decoded when asked for.
+    """
+    def __init__(self, catalog, name):
+        self.catalog = catalog
+        self.name = name
+
+    def GetData(self):
+        return self.catalog.getData(self.name)
+
+    def GetImage(self):
+        return wx.Image(BytesIO(self.GetData()), wx.BITMAP_TYPE_PNG)
+
+    def GetBitmap(self):
+        return self.catalog.getBitmap(self.name)
+
+    def GetIcon(self):
+        icon = wx.Icon()
+        icon.CopyFromBitmap(self.GetBitmap())
+        return icon
+
+class ImageCatalog:
+    """
+    Lazy replacement of the `catalog` dictionary of images.py.
+
+    The PNG data is read from a packed file (an index followed by the raw
+    PNG data) built from images.py the first time an image is used, and
+    rebuilt when images.py changes. Decoded bitmaps are kept in a LRU
+    cache of `cacheSize` entries.
+    """
+    def __init__(self, source, pack, cacheSize=64):
+        self.source = source
+        self.pack = pack
+        self.cacheSize = cacheSize
+        self.index = None
+        self.data = None
+        self.offset = 0
+        self.images = {}
+        self.bitmaps = collections.OrderedDict()
+
+    def __getitem__(self, name):
+        if name not in self.images:
+            self.images[name] = CatalogImage(self, name)
+        return self.images[name]
+
+    def __contains__(self, name):
+        self.load()
+        return name in self.index
+
+    def keys(self):
+        self.load()
+        return list(self.index.keys())
+
+    def getSourceStamp(self):
+        try:
+            stat = os.stat(self.source)
+            return (stat.st_size, int(stat.st_mtime))
+        except:
+            return None
+
+    def load(self):
+        if self.index is not None:
+            return
+        stamp = self.getSourceStamp()
+        try:
+            with open(self.pack, "rb") as f:
+                size = struct.unpack("<I", f.read(4))[0]
+                version, packStamp, index = marshal.loads(f.read(size))
+            if version == IMAGE_PACK_VERSION and (stamp is None or tuple(packStamp) == stamp):
+                self.index = index
+                self.offset = 4 + size
+                return
+        except:
+            pass
+        self.build(stamp)
+
+    def readSource(self):
+        "Returns the PNG data of images.py, without importing it if its source is available."
+        images = {}
+        if os.path.isfile(self.source):
+            with open(self.source, "r", encoding="utf-8") as f:
+                text = f.read()
+            encoded = {}
+            for name, body in re.findall(r'(\w+) = PyEmbeddedImage\(\s*((?:"[^"]*"\s*)+)\)', text):
+                encoded[name] = "".join(re.findall(r'"([^"]*)"', body))
+            for key, name in re.findall(r"catalog\['([^']+)'\] = (\w+)", text):
+                images[key] = base64.b64decode(encoded[name])
+        else:
+            from .images import catalog
+            for key in catalog:
+                images[key] = catalog[key].GetData()
+        return images
+
+    def build(self, stamp):
+        images = self.readSource()
+        index = {}
+        blob = []
+        offset = 0
+        for name in sorted(images.keys()):
+            index[name] = (offset, len(images[name]))
+            blob.append(images[name])
+            offset += len(images[name])
+        self.index = index
+        self.data = b"".join(blob)
+        self.offset = 0
+        try:
+            header = marshal.dumps((IMAGE_PACK_VERSION, stamp, index))
+            with open(self.pack + ".tmp", "wb") as f:
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                f.write(self.data)
+            os.replace(self.pack + ".tmp", self.pack)
+        except:
+            print("Image catalog: can't write the image pack file.")
+
+    def getData(self, name):
+        self.load()
+        start, length = self.index[name]
+        if self.data is not None:
+            return self.data[start:start + length]
+        with open(self.pack, "rb") as f:
+            f.seek(self.offset + start)
+            return f.read(length)
+
+    def getBitmap(self, name):
+        if name in self.bitmaps:
+            self.bitmaps.move_to_end(name)
+            return self.bitmaps[name]
+        bitmap = wx.Bitmap(self[name].GetImage())
+        self.bitmaps[name] = bitmap
+        if len(self.bitmaps) > self.cacheSize:
+            self.bitmaps.popitem(last=False)
+        return bitmap
@@ -0,0 +1,166 @@
+# encoding: utf-8
+"""
+Copyright 2011 iACT, Universite de Montreal, Jean Piche, Olivier Belanger, Jean-Michel Dumas
+
+This file is part of Cecilia 5.
+
+Cecilia 5 is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Cecilia 5 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import os, ast, inspect, marshal
+from . import API_interface
+
+MODULE_CATALOG_VERSION = 1
+INTERFACE_WIDGETS = ["cfilein", "csampler", "cpoly", "cgraph", "cslider", "crange", "csplitter",
+                     "ctoggle", "cpopup", "cbutton", "cgen"]
+_WIDGET_SIGNATURES = dict([(name, inspect.signature(getattr(API_interface, name))) for name in INTERFACE_WIDGETS])
+
+
+def getWidgetInfo(node):
+    """
+    Returns the widget dictionary of a widget call of the Interface list, as
+    the arguments of the API function it calls, or None if it isn't one.
+    Arguments that are not literals are left out.
+    """
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name) or node.func.id not in INTERFACE_WIDGETS:
+        return None
+    args = []
+    for arg in node.args:
+        try:
+            args.append(ast.literal_eval(arg))
+        except:
+            args.append(None)
+    kwargs = {}
+    for keyword in node.keywords:
+        try:
+            kwargs[keyword.arg] = ast.literal_eval(keyword.value)
+        except:
+            pass
+    bound = _WIDGET_SIGNATURES[node.func.id].bind_partial(*args, **kwargs)
+    bound.apply_defaults()
+    widget = {"type": node.func.id}
+    widget.update(bound.arguments)
+    return widget
+
+def readModuleInfo(text):
+    """
+    Extracts, without executing the module, the docstring of its Module
+    class and the widgets of its Interface list. Problems found are listed
+    in the 'errors' item.
+    """
+    info = {'doc': None, 'widgets': [], 'errors': []}
+    try:
+        tree = ast.parse(text)
+    except SyntaxError as e:
+        info['errors'].append("Syntax error at line %s: %s" % (e.lineno, e.msg))
+        return info
+    hasModule = hasInterface = False
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "Module":
+            hasModule = True
+            info['doc'] = ast.get_docstring(node, clean=False)
+        elif isinstance(node, ast.Assign) and [getattr(t, "id", None) for t in node.targets] == ["Interface"]:
+            hasInterface = True
+            if not isinstance(node.value, ast.List):
+                info['errors'].append("Interface is not a list of widgets.")
+                continue
+            names = []
+            for element in node.value.elts:
+                try:
+                    widget = getWidgetInfo(element)
+                except TypeError as e:
+                    info['errors'].append("Line %d: %s" % (element.lineno, e))
+                    continue
+                if widget is None:
+                    info['errors'].append("Line %d: not a widget call." % element.lineno)
+                    continue
+                if widget['name'] in names:
+                    info['errors'].append("Line %d: widget name '%s' already used." % (element.lineno, widget['name']))
+                names.append(widget['name'])
+                info['widgets'].append(widget)
+    if not hasModule:
+        info['errors'].append("No Module class.")
+    if not hasInterface:
+        info['errors'].append("No Interface list.")
+    return info
+
+def getModuleDoc(info):
+    "Returns the Module docstring as shown by the documentation browser."
+    doc = info['doc']
+    if doc is None:
+        return '"Module not documented..."'
+    return doc[doc.find("\n") + 1:]
+
+def getModuleSummary(info):
+    "Returns the first line of the Module docstring."
+    if info['doc'] is None:
+        return ''
+    return getModuleDoc(info).split("\n")[0].replace('"', '')
+
+
+class ModuleCatalog:
+    """
+    Cache of the information read statically from module files.
+
+    Entries are kept by file path with the size and modification time of the
+    file, a module is only read again when its file changes. The catalog is
+    saved in `path` by `save`, when entries were added.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(self.path, "rb") as f:
+                version, entries = marshal.load(f)
+            if version == MODULE_CATALOG_VERSION:
+                self.entries = entries
+        except:
+            pass
+
+    def get(self, path):
+        "Returns the information of the module at `path`, see readModuleInfo."
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return {'doc': None, 'widgets': [], 'errors': ["No such file."]}
+        stamp = (stat.st_size, int(stat.st_mtime))
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != stamp:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except UnicodeDecodeError:
+                with open(path, "r", encoding="latin-1") as f:
+                    text = f.read()
+            entry = (stamp, readModuleInfo(text))
+            self.entries[path] = entry
+            self.changed = True
+        return entry[1]
+
+    def isValid(self, path):
+        return self.get(path)['errors'] == []
+
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            with open(self.path + ".tmp", "wb") as f:
+                marshal.dump((MODULE_CATALOG_VERSION, self.entries), f)
+            os.replace(self.path + ".tmp", self.path)
+            self.changed = False
+        except:
+            print("Unable to write the module catalog.")
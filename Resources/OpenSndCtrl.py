@@ -0,0 +1,90 @@
+# encoding: utf-8
+"""
+Copyright 2011 iACT, Universite de Montreal, Jean Piche, Olivier Belanger, Jean-Michel Dumas
+
+This file is part of Cecilia 5.
+
+Cecilia 5 is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Cecilia 5 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+import socket, struct, time
+
+
+def oscString(s):
+    "Null terminated string padded to a multiple of 4 bytes."
+    s = s.encode("utf-8") + b"\0"
+    return s + b"\0" * (-len(s) % 4)
+
+def oscMessage(address, values):
+    "Encodes an OSC message with float arguments."
+    return oscString(address) + oscString("," + "f" * len(values)) + struct.pack(">%df" % len(values), *values)
+
+def oscBundle(messages):
+    "Encodes OSC messages in a bundle to be processed immediately."
+    data = [oscString("#bundle"), struct.pack(">Q", 1)]
+    for message in messages:
+        data.append(struct.pack(">i", len(message)))
+        data.append(message)
+    return b"".join(data)
+
+
+class OscBundleSender:
+    """
+    Coalesces outgoing OSC values.
+
+    `send` keeps the last value of every address, `flush` sends the pending
+    values of each destination in one bundle, at most `rate` bundles per
+    second per destination. Values not sent yet wait for the next flush.
+    Destinations must be registered with `addDestination` beforehand.
+    """
+    def __init__(self, rate=30):
+        self.rate = rate
+        self.pending = {}
+        self.lastFlush = {}
+        self.addresses = {}
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def addDestination(self, host, port):
+        "Resolves a destination once, the address lookup can block."
+        dest = (host, port)
+        if dest not in self.addresses:
+            try:
+                self.addresses[dest] = (socket.gethostbyname(host), port)
+            except:
+                print("OSC output: unknown host %s" % host)
+                self.addresses[dest] = None
+
+    def send(self, host, port, address, values):
+        self.pending.setdefault((host, port), {})[address] = values
+
+    def flush(self, force=False):
+        now = time.time()
+        for dest in list(self.pending.keys()):
+            if not force and now - self.lastFlush.get(dest, 0) < 1.0 / self.rate:
+                continue
+            messages = self.pending.pop(dest)
+            self.lastFlush[dest] = now
+            sockAddress = self.addresses.get(dest)
+            if sockAddress is None:
+                continue
+            data = oscBundle([oscMessage(address, values) for address, values in messages.items()])
+            try:
+                self.sock.sendto(data, sockAddress)
+            except:
+                pass
+
+    def close(self):
+        self.flush(True)
+        self.sock.close()
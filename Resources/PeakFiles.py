@@ -0,0 +1,65 @@
+# encoding: utf-8
+"""
+Copyright 2011 iACT, Universite de Montreal, Jean Piche, Olivier Belanger, Jean-Michel Dumas
+
+This file is part of Cecilia 5.
+
+Cecilia 5 is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Cecilia 5 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import numpy as _Numeric
+from pyo import Server, SndTable, sndinfo
+from .constants import *
+
+def writePeakFiles(path, files):
+    """
+    Reads a sound in chunks and saves its (blocks, channels, 2) min/max
+    arrays, one file per level. The coarsest level is written last and
+    marks the peak files as complete.
+
+    Runs in a child process (see `AudioServer.buildPeaks`), with its own
+    offline server, so the sound is never decoded in the GUI process.
+
+    """
+    server = Server(audio="offline").boot()
+    info = sndinfo(path)
+    frames, sr, chnls = int(info[0]), info[2], info[3]
+    chunk = PEAK_BLOCK_SIZE * 4096
+    blocks = []
+    for start in range(0, frames, chunk):
+        stop = min(start + chunk, frames)
+        table = SndTable(path, start=start / float(sr), stop=stop / float(sr))
+        data = _Numeric.array([_Numeric.asarray(table.getBuffer(i))[:stop - start] for i in range(chnls)],
+                              dtype=_Numeric.float32)
+        del table
+        pad = -data.shape[1] % PEAK_BLOCK_SIZE
+        if pad:
+            data = _Numeric.pad(data, ((0, 0), (0, pad)), mode="edge")
+        data = data.reshape(chnls, -1, PEAK_BLOCK_SIZE)
+        blocks.append(_Numeric.stack((data.min(2), data.max(2)), -1).transpose(1, 0, 2))
+    server.shutdown()
+    peaks = _Numeric.concatenate(blocks)
+    if not os.path.isdir(PEAK_CACHE_PATH):
+        os.mkdir(PEAK_CACHE_PATH)
+    for level, file in enumerate(files):
+        if level > 0:
+            pad = -len(peaks) % PEAK_LEVEL_FACTOR
+            if pad:
+                peaks = _Numeric.pad(peaks, ((0, pad), (0, 0), (0, 0)), mode="edge")
+            peaks = peaks.reshape(-1, PEAK_LEVEL_FACTOR, chnls, 2)
+            peaks = _Numeric.stack((peaks[..., 0].min(1), peaks[..., 1].max(1)), -1)
+        with open(file + ".tmp", "wb") as f:
+            _Numeric.save(f, peaks)
+        os.replace(file + ".tmp", file)
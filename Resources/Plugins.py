@@ -18,7 +18,7 @@ You should have received a copy of the GNU General Public License
 along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import wx, math
+import wx
 import Resources.CeciliaLib as CeciliaLib
 from .constants import *
 from .Widgets import *
@@ -126,11 +126,10 @@ class PluginKnob(ControlKnob):
     def setPlay(self, x):
         if x:
             self.mode = 2
-            data = CeciliaLib.getVar("grapher").plotter.data
-            for line in data:
-                if line.getName() == self.name:
-                    line.setShow(1)
-                    CeciliaLib.getVar("grapher").plotter.draw()
+            line = CeciliaLib.getVar("grapher").plotter.getLineFromName(self.name)
+            if line is not None:
+                line.setShow(1)
+                CeciliaLib.getVar("grapher").plotter.draw()
         else:
             self.mode = 0
         self.Refresh()
@@ -209,35 +208,8 @@ class PluginKnob(ControlKnob):
 
     def setAutomationData(self, data):
         # convert values on scaling
-        temp = []
-        log = self.getLog()
-        minval = self.getMinValue()
-        maxval = self.getMaxValue()
-        automationlength = self.getAutomationLength()
-        frac = automationlength / CeciliaLib.getVar("totalTime")
-        virtuallength = len(data) / frac
-        data.extend([data[-1]] * int(((1 - frac) * virtuallength)))
-        totallength = float(len(data))
-        oldpos = 0
-        oldval = data[0]
-        if log:
-            maxOnMin = maxval / minval
-            torec = math.log10(oldval / minval) / math.log10(maxOnMin)
-        else:
-            maxMinusMin = maxval - minval
-            torec = (oldval - minval) / maxMinusMin
-        temp.append([0.0, torec])
-
-        for i, val in enumerate(data):
-            length = (i - oldpos) / totallength
-            pos = oldpos / totallength + length
-            if log:
-                torec = math.log10(val / minval) / math.log10(maxOnMin)
-            else:
-                torec = (val - minval) / maxMinusMin
-            temp.append([pos, torec])
-            oldval = val
-            oldpos = i
+        temp = CeciliaLib.automationToPoints(data, self.getAutomationLength(), self.getMinValue(),
+                                             self.getMaxValue(), self.getLog())
 
         self.automationData = temp
 
@@ -255,6 +227,7 @@ class PluginKnob(ControlKnob):
             if rec.Contains(pos):
                 if evt.ShiftDown():
                     self.setMidiCtl(None)
+                    CeciliaLib.getVar("audioServer").removeMidiBinding(self)
                 else:
                     if CeciliaLib.getVar("useMidi"):
                         CeciliaLib.getVar("audioServer").midiLearn(self)
@@ -272,6 +245,12 @@ class Plugin(wx.Panel):
         self.order = order
         self.vpos = order
 
+    def createKnob(self, index, init, outFunction, label):
+        template, mini, maxi, log = PLUGIN_KNOBS[self.pluginName][index]
+        knob = PluginKnob(self, mini, maxi, init, size=(43, 70), log=log, outFunction=outFunction, label=label)
+        knob.setName(template % self.order)
+        return knob
+
     def setKnobLabels(self):
         if self.pluginName != 'None':
             for i, knob in enumerate(self.getKnobs()):
@@ -414,20 +393,17 @@ class ReverbPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Reverb'
-        self.knobNameTemplates = ['plugin_%d_reverb_mix', 'plugin_%d_reverb_time', 'plugin_%d_reverb_damp']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0, 1, 0.25, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Mix')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 0.25, self.onChangeKnob1, 'Mix')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0.01, 10, 1, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Time')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 1, self.onChangeKnob2, 'Time')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 1, 0.5, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Damp')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0.5, self.onChangeKnob3, 'Damp')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -453,20 +429,17 @@ class WGReverbPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'WGVerb'
-        self.knobNameTemplates = ['plugin_%d_wgreverb_mix', 'plugin_%d_wgreverb_feed', 'plugin_%d_wgreverb_lp']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0, 1, 0.25, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Mix')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 0.25, self.onChangeKnob1, 'Mix')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0., 1, 0.7, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Feed')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0.7, self.onChangeKnob2, 'Feed')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 100, 15000, 5000, size=(43, 70), log=True, outFunction=self.onChangeKnob3, label='Cutoff')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 5000, self.onChangeKnob3, 'Cutoff')
         self.knob3.setFloatPrecision(2)
         self.sizer.Add(self.knob3)
 
@@ -493,21 +466,18 @@ class FilterPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Filter'
-        self.knobNameTemplates = ['plugin_%d_filter_level', 'plugin_%d_filter_freq', 'plugin_%d_filter_q']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0, 2, 1, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Level')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 1, self.onChangeKnob1, 'Level')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 20, 18000, 1000, size=(43, 70), log=True, outFunction=self.onChangeKnob2, label='Freq')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 1000, self.onChangeKnob2, 'Freq')
         self.knob2.setFloatPrecision(0)
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0.5, 10, 1, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Q')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 1, self.onChangeKnob3, 'Q')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -534,21 +504,18 @@ class EQPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Para EQ'
-        self.knobNameTemplates = ['plugin_%d_eq_freq', 'plugin_%d_eq_q', 'plugin_%d_eq_gain']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 20, 18000, 1000, size=(43, 70), log=True, outFunction=self.onChangeKnob1, label='Freq')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 1000, self.onChangeKnob1, 'Freq')
         self.knob1.setFloatPrecision(0)
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, .5, 10, 1, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Q')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 1, self.onChangeKnob2, 'Q')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, -48, 18, -3, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Gain')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, -3, self.onChangeKnob3, 'Gain')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -575,22 +542,19 @@ class EQ3BPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = '3 Bands EQ'
-        self.knobNameTemplates = ['plugin_%d_eq3b_low', 'plugin_%d_eq3b_mid', 'plugin_%d_eq3b_high']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, -60, 18, 0, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Low')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 0, self.onChangeKnob1, 'Low')
         self.knob1.setFloatPrecision(2)
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, -60, 18, 0, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Mid')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0, self.onChangeKnob2, 'Mid')
         self.knob2.setFloatPrecision(2)
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, -60, 18, 0, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='High')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0, self.onChangeKnob3, 'High')
         self.knob3.setFloatPrecision(2)
         self.sizer.Add(self.knob3)
 
@@ -618,20 +582,17 @@ class ChorusPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Chorus'
-        self.knobNameTemplates = ['plugin_%d_chorus_mix', 'plugin_%d_chorus_depth', 'plugin_%d_chorus_feed']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0, 1, 0.5, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Mix')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 0.5, self.onChangeKnob1, 'Mix')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0.001, 5., 0.2, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Depth')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0.2, self.onChangeKnob2, 'Depth')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 1, .5, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Feed')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, .5, self.onChangeKnob3, 'Feed')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -658,22 +619,19 @@ class CompressPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Compress'
-        self.knobNameTemplates = ['plugin_%d_comp_thresh', 'plugin_%d_comp_ratio', 'plugin_%d_comp_gain']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, -80, 0, -20, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Thresh')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, -20, self.onChangeKnob1, 'Thresh')
         self.knob1.setFloatPrecision(1)
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0.125, 20, 3, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Ratio')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 3, self.onChangeKnob2, 'Ratio')
         self.knob2.setFloatPrecision(3)
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, -36, 36, 0, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Gain')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0, self.onChangeKnob3, 'Gain')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -700,20 +658,17 @@ class GatePlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Gate'
-        self.knobNameTemplates = ['plugin_%d_gate_thresh', 'plugin_%d_gate_rise', 'plugin_%d_gate_fall']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, -120, 0, -70, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Thresh')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, -70, self.onChangeKnob1, 'Thresh')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0.0005, .5, 0.005, size=(43, 70), log=True, outFunction=self.onChangeKnob2, label='Rise')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0.005, self.onChangeKnob2, 'Rise')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0.0005, .5, .01, size=(43, 70), log=True, outFunction=self.onChangeKnob3, label='Fall')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, .01, self.onChangeKnob3, 'Fall')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -740,20 +695,17 @@ class DistoPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Disto'
-        self.knobNameTemplates = ['plugin_%d_disto_drive', 'plugin_%d_disto_slope', 'plugin_%d_disto_gain']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0, 1, .7, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Drive')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, .7, self.onChangeKnob1, 'Drive')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0, 1, .7, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Slope')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, .7, self.onChangeKnob2, 'Slope')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, -60, 0, -12, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Gain')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, -12, self.onChangeKnob3, 'Gain')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -780,20 +732,17 @@ class AmpModPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'AmpMod'
-        self.knobNameTemplates = ['plugin_%d_ampmod_freq', 'plugin_%d_ampmod_amp', 'plugin_%d_ampmod_stereo']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0.01, 1000, 8, size=(43, 70), log=True, outFunction=self.onChangeKnob1, label='Freq')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 8, self.onChangeKnob1, 'Freq')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0, 1, 1, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Amp')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 1, self.onChangeKnob2, 'Amp')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 0.5, 0, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Stereo')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0, self.onChangeKnob3, 'Stereo')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -820,21 +769,18 @@ class PhaserPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Phaser'
-        self.knobNameTemplates = ['plugin_%d_phaser_freq', 'plugin_%d_phaser_q', 'plugin_%d_phaser_spread']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 20, 1000, 100, size=(43, 70), log=True, outFunction=self.onChangeKnob1, label='Freq')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 100, self.onChangeKnob1, 'Freq')
         self.knob1.setFloatPrecision(2)
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 1, 20, 5, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Q')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 5, self.onChangeKnob2, 'Q')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, .5, 2, 1.1, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Spread')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 1.1, self.onChangeKnob3, 'Spread')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -861,20 +807,17 @@ class DelayPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Delay'
-        self.knobNameTemplates = ['plugin_%d_delay_delay', 'plugin_%d_delay_feed', 'plugin_%d_delay_mix']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0.01, 1, .1, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Delay')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, .1, self.onChangeKnob1, 'Delay')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0, .999, 0, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Feed')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0, self.onChangeKnob2, 'Feed')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 1, 0.5, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Mix')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0.5, self.onChangeKnob3, 'Mix')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -901,20 +844,17 @@ class FlangePlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Flange'
-        self.knobNameTemplates = ['plugin_%d_flange_depth', 'plugin_%d_flange_freq', 'plugin_%d_flange_feed']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0.001, .99, .5, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Depth')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, .5, self.onChangeKnob1, 'Depth')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0.001, 20, 1, size=(43, 70), log=True, outFunction=self.onChangeKnob2, label='Freq')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 1, self.onChangeKnob2, 'Freq')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, .999, 0.5, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Feed')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0.5, self.onChangeKnob3, 'Feed')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -941,20 +881,17 @@ class HarmonizerPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Harmonizer'
-        self.knobNameTemplates = ['plugin_%d_harmonizer_transpo', 'plugin_%d_harmonizer_feed', 'plugin_%d_harmonizer_mix']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, -24, 24, -7, size=(43, 70), log=False, outFunction=self.onChangeKnob1, label='Transpo')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, -7, self.onChangeKnob1, 'Transpo')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0, .999, 0, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Feed')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0, self.onChangeKnob2, 'Feed')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 1, 0.5, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Mix')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0.5, self.onChangeKnob3, 'Mix')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -982,21 +919,18 @@ class ResonatorsPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'Resonators'
-        self.knobNameTemplates = ['plugin_%d_resonators_freq', 'plugin_%d_resonators_spread', 'plugin_%d_resonators_mix']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 20, 1000, 80, size=(43, 70), log=True, outFunction=self.onChangeKnob1, label='Freq')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 80, self.onChangeKnob1, 'Freq')
         self.knob1.setFloatPrecision(2)
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, .25, 4, 2.01, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Spread')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 2.01, self.onChangeKnob2, 'Spread')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 1, 0.33, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Mix')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0.33, self.onChangeKnob3, 'Mix')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -1023,21 +957,18 @@ class DeadResonPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'DeadReson'
-        self.knobNameTemplates = ['plugin_%d_deadresonators_freq', 'plugin_%d_deadresonators_detune', 'plugin_%d_deadresonators_mix']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 20, 1000, 80, size=(43, 70), log=True, outFunction=self.onChangeKnob1, label='Freq')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 80, self.onChangeKnob1, 'Freq')
         self.knob1.setFloatPrecision(2)
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0, 1, 0.5, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Detune')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0.5, self.onChangeKnob2, 'Detune')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 1, 0.33, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Mix')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 0.33, self.onChangeKnob3, 'Mix')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -1064,20 +995,17 @@ class ChaosModPlugin(Plugin):
     def __init__(self, parent, choiceFunc, order):
         Plugin.__init__(self, parent, choiceFunc, order)
         self.pluginName = 'ChaosMod'
-        self.knobNameTemplates = ['plugin_%d_chaosmod_freq', 'plugin_%d_chaosmod_amp', 'plugin_%d_chaosmod_amp']
+        self.knobNameTemplates = [knob[0] for knob in PLUGIN_KNOBS[self.pluginName]]
         self.sizer = wx.FlexGridSizer(1, 4, 0, 0)
         revMenuBox = wx.BoxSizer(wx.VERTICAL)
 
-        self.knob1 = PluginKnob(self, 0.001, 1, 0.025, size=(43, 70), log=True, outFunction=self.onChangeKnob1, label='Speed')
-        self.knob1.setName(self.knobNameTemplates[0] % self.order)
+        self.knob1 = self.createKnob(0, 0.025, self.onChangeKnob1, 'Speed')
         self.sizer.Add(self.knob1)
 
-        self.knob2 = PluginKnob(self, 0, 1, 0.5, size=(43, 70), log=False, outFunction=self.onChangeKnob2, label='Chaos')
-        self.knob2.setName(self.knobNameTemplates[1] % self.order)
+        self.knob2 = self.createKnob(1, 0.5, self.onChangeKnob2, 'Chaos')
         self.sizer.Add(self.knob2)
 
-        self.knob3 = PluginKnob(self, 0, 1, 1, size=(43, 70), log=False, outFunction=self.onChangeKnob3, label='Amp')
-        self.knob3.setName(self.knobNameTemplates[2] % self.order)
+        self.knob3 = self.createKnob(2, 1, self.onChangeKnob3, 'Amp')
         self.sizer.Add(self.knob3)
 
         self.setKnobLabels()
@@ -31,6 +31,7 @@ class PreferenceFrame(wx.Frame):
         wx.Frame.__init__(self, parent, style=style)
         self.SetBackgroundColour(BACKGROUND_COLOUR)
         self.parent = parent
+        CeciliaLib.waitDeviceQuery()
 
         self.font = wx.Font(MENU_FONT, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
 
@@ -189,6 +190,17 @@ class PreferenceFrame(wx.Frame):
         driverbox.AddStretchSpacer(1)
         driverbox.Add(self.driverChoice, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
 
+        # Device list refresh
+        textDevices = wx.StaticText(audioParamPanel, 0, 'Devices :')
+        textDevices.SetForegroundColour(PREFS_FOREGROUND)
+        textDevices.SetFont(self.font)
+        buttonDevices = CloseBox(audioParamPanel, outFunction=self.refreshDevices, label='Refresh')
+
+        devicebox = wx.BoxSizer(wx.HORIZONTAL)
+        devicebox.Add(textDevices, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        devicebox.AddStretchSpacer(1)
+        devicebox.Add(buttonDevices, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
+
         # Audio driver panels
         # Input
         textIn = wx.StaticText(audioParamPanel, 0, 'Input Device :')
@@ -315,6 +327,7 @@ class PreferenceFrame(wx.Frame):
 
         box.Add(Separator(audioParamPanel, size=(350, 1), colour=BACKGROUND_COLOUR))
         box.Add(driverbox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(devicebox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(inbox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(outbox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(sampbox, 0, wx.EXPAND | wx.BOTTOM, 7)
@@ -413,6 +426,21 @@ class PreferenceFrame(wx.Frame):
             if item[1] == CeciliaLib.getVar("sampSize"):
                 self.choiceBD.setStringSelection(item[0])
 
+        # Batch processing
+        textBatch = wx.StaticText(fileExportPanel, 0, 'Batch processes (0 = one per cpu) :')
+        textBatch.SetForegroundColour(PREFS_FOREGROUND)
+        textBatch.SetFont(self.font)
+        self.choiceBatch = CustomMenu(fileExportPanel, choice=[str(i) for i in range(17)],
+                                      init=str(CeciliaLib.getVar("batchProcesses")),
+                                      size=(150, 20), outFunction=self.changeBatchProcesses)
+
+        # Presets
+        textSidecar = wx.StaticText(fileExportPanel, 0, 'Save presets in a separate file :')
+        textSidecar.SetForegroundColour(PREFS_FOREGROUND)
+        textSidecar.SetFont(self.font)
+        self.sidecarToggle = Toggle(fileExportPanel, CeciliaLib.getVar("sidecarPresets"),
+                                    size=(19, 19), outFunction=self.enableSidecarPresets)
+
         formatbox = wx.BoxSizer(wx.HORIZONTAL)
         formatbox.Add(textFileFormat, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
         formatbox.AddStretchSpacer(1)
@@ -423,9 +451,21 @@ class PreferenceFrame(wx.Frame):
         depthbox.AddStretchSpacer(1)
         depthbox.Add(self.choiceBD, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
 
+        batchbox = wx.BoxSizer(wx.HORIZONTAL)
+        batchbox.Add(textBatch, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        batchbox.AddStretchSpacer(1)
+        batchbox.Add(self.choiceBatch, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
+
+        sidecarbox = wx.BoxSizer(wx.HORIZONTAL)
+        sidecarbox.Add(textSidecar, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        sidecarbox.AddStretchSpacer(1)
+        sidecarbox.Add(self.sidecarToggle, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING + 1)
+
         box.Add(Separator(fileExportPanel, size=(350, 1), colour=BACKGROUND_COLOUR))
         box.Add(formatbox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(depthbox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(batchbox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(sidecarbox, 0, wx.EXPAND | wx.BOTTOM, 7)
 
         fileExportPanel.SetSizerAndFit(box)
 
@@ -464,12 +504,45 @@ class PreferenceFrame(wx.Frame):
         self.textureToggle = Toggle(ceciliaPanel, CeciliaLib.getVar("graphTexture"), 
                                     size=(19, 19), outFunction=self.enableGraphTexture)
 
+        textWarmServer = wx.StaticText(ceciliaPanel, 0, 'Keep the audio server booted :')
+        textWarmServer.SetForegroundColour(PREFS_FOREGROUND)
+        textWarmServer.SetFont(self.font)
+        self.warmServerToggle = Toggle(ceciliaPanel, CeciliaLib.getVar("warmServer"),
+                                       size=(19, 19), outFunction=self.enableWarmServer)
+
         textVerbose = wx.StaticText(ceciliaPanel, 0, 'Verbose :')
         textVerbose.SetForegroundColour(PREFS_FOREGROUND)
         textVerbose.SetFont(self.font)
         self.verboseToggle = Toggle(ceciliaPanel, CeciliaLib.getVar("DEBUG"),
                                     size=(19, 19), outFunction=self.enableVerbose)
 
+        textUndoMemory = wx.StaticText(ceciliaPanel, 0, 'Grapher undo memory (MB) :')
+        textUndoMemory.SetForegroundColour(PREFS_FOREGROUND)
+        textUndoMemory.SetFont(self.font)
+        self.choiceUndoMemory = CustomMenu(ceciliaPanel, size=(150, 20),
+                                    choice=["4", "8", "16", "32", "64", "128", "256"],
+                                    init=str(CeciliaLib.getVar("undoMemory")), outFunction=self.changeUndoMemory)
+
+        textPresetMorph = wx.StaticText(ceciliaPanel, 0, 'Preset morphing :')
+        textPresetMorph.SetForegroundColour(PREFS_FOREGROUND)
+        textPresetMorph.SetFont(self.font)
+        self.choicePresetMorph = CustomMenu(ceciliaPanel, size=(150, 20), choice=PRESET_MORPH_CHOICES,
+                                    init=PRESET_MORPH_CHOICES[CeciliaLib.getVar("presetMorph")], outFunction=self.changePresetMorph)
+
+        textFrameRate = wx.StaticText(ceciliaPanel, 0, 'GUI refresh rate (frames/sec) :')
+        textFrameRate.SetForegroundColour(PREFS_FOREGROUND)
+        textFrameRate.SetFont(self.font)
+        self.choiceFrameRate = CustomMenu(ceciliaPanel, size=(150, 20),
+                                    choice=["10", "15", "20", "24", "30", "40", "50", "60"],
+                                    init=str(CeciliaLib.getVar("guiFrameRate")), outFunction=self.changeGuiFrameRate)
+
+        textOscOutRate = wx.StaticText(ceciliaPanel, 0, 'OSC output rate (bundles/sec) :')
+        textOscOutRate.SetForegroundColour(PREFS_FOREGROUND)
+        textOscOutRate.SetFont(self.font)
+        self.choiceOscOutRate = CustomMenu(ceciliaPanel, size=(150, 20),
+                                    choice=["10", "15", "20", "25", "30", "50", "60", "100"],
+                                    init=str(CeciliaLib.getVar("oscOutRate")), outFunction=self.changeOscOutRate)
+
         timebox = wx.BoxSizer(wx.HORIZONTAL)
         timebox.Add(textTotalTime, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
         timebox.AddStretchSpacer(1)
@@ -480,6 +553,26 @@ class PreferenceFrame(wx.Frame):
         fadebox.AddStretchSpacer(1)
         fadebox.Add(self.choiceGlobalFade, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
 
+        undobox = wx.BoxSizer(wx.HORIZONTAL)
+        undobox.Add(textUndoMemory, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        undobox.AddStretchSpacer(1)
+        undobox.Add(self.choiceUndoMemory, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
+
+        morphbox = wx.BoxSizer(wx.HORIZONTAL)
+        morphbox.Add(textPresetMorph, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        morphbox.AddStretchSpacer(1)
+        morphbox.Add(self.choicePresetMorph, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
+
+        ratebox = wx.BoxSizer(wx.HORIZONTAL)
+        ratebox.Add(textFrameRate, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        ratebox.AddStretchSpacer(1)
+        ratebox.Add(self.choiceFrameRate, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
+
+        oscbox = wx.BoxSizer(wx.HORIZONTAL)
+        oscbox.Add(textOscOutRate, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        oscbox.AddStretchSpacer(1)
+        oscbox.Add(self.choiceOscOutRate, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING)
+
         tipsbox = wx.BoxSizer(wx.HORIZONTAL)
         tipsbox.Add(textUseTooltips, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
         tipsbox.AddStretchSpacer(1)
@@ -490,6 +583,11 @@ class PreferenceFrame(wx.Frame):
         graphbox.AddStretchSpacer(1)
         graphbox.Add(self.textureToggle, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING + 1)
 
+        warmbox = wx.BoxSizer(wx.HORIZONTAL)
+        warmbox.Add(textWarmServer, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+        warmbox.AddStretchSpacer(1)
+        warmbox.Add(self.warmServerToggle, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, PADDING + 1)
+
         verbbox = wx.BoxSizer(wx.HORIZONTAL)
         verbbox.Add(textVerbose, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
         verbbox.AddStretchSpacer(1)
@@ -498,8 +596,13 @@ class PreferenceFrame(wx.Frame):
         box.Add(Separator(ceciliaPanel, size=(350, 1), colour=BACKGROUND_COLOUR))
         box.Add(timebox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(fadebox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(undobox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(morphbox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(ratebox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(oscbox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(tipsbox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(graphbox, 0, wx.EXPAND | wx.BOTTOM, 7)
+        box.Add(warmbox, 0, wx.EXPAND | wx.BOTTOM, 7)
         box.Add(verbbox, 0, wx.EXPAND | wx.BOTTOM, 7)
 
         ceciliaPanel.SetSizerAndFit(box)
@@ -512,6 +615,29 @@ class PreferenceFrame(wx.Frame):
     def onMidiDriverPageChange(self, index, label):
         pass
 
+    def refreshDevices(self):
+        "Enumerates the devices again, the list cached at startup may be outdated."
+        try:
+            CeciliaLib.queryAudioMidiDrivers(refresh=True)
+        except:
+            print("Unable to query the audio and midi devices.")
+            return
+        self.setDeviceChoice(self.choiceInput, "availableAudioInputs", "availableAudioInputIndexes", "audioInput")
+        self.setDeviceChoice(self.choiceOutput, "availableAudioOutputs", "availableAudioOutputIndexes", "audioOutput")
+        self.setDeviceChoice(self.midiChoiceInput, "availableMidiInputs", "availableMidiInputIndexes", "midiDeviceIn")
+
+    def setDeviceChoice(self, menu, namesVar, indexesVar, deviceVar):
+        names = [CeciliaLib.ensureNFD(d) for d in CeciliaLib.getVar(namesVar)]
+        if names == []:
+            menu.choice = []
+            menu.setLabel('')
+            return
+        menu.setChoice(names, out=False)
+        try:
+            menu.setByIndex(CeciliaLib.getVar(indexesVar).index(CeciliaLib.getVar(deviceVar)))
+        except:
+            pass
+
     def enableAudioInput(self, state):
         CeciliaLib.setVar('enableAudioInput', state)
 
@@ -587,6 +713,12 @@ class PreferenceFrame(wx.Frame):
     def changeFileType(self, index, label):
         CeciliaLib.setVar("audioFileType", label)
 
+    def changeBatchProcesses(self, index, label):
+        CeciliaLib.setVar("batchProcesses", int(label))
+
+    def enableSidecarPresets(self, state):
+        CeciliaLib.setVar("sidecarPresets", state)
+
     def changeSr(self, index, label):
         sr = int(label.strip())
         CeciliaLib.setVar("sr", sr)
@@ -612,6 +744,18 @@ class PreferenceFrame(wx.Frame):
     def changeGlobalFade(self, index, label):
         CeciliaLib.setVar("globalFade", float(self.choiceGlobalFade.getLabel().strip()))
 
+    def changeUndoMemory(self, index, label):
+        CeciliaLib.setVar("undoMemory", int(label))
+
+    def changePresetMorph(self, index, label):
+        CeciliaLib.setVar("presetMorph", index)
+
+    def changeGuiFrameRate(self, index, label):
+        CeciliaLib.setVar("guiFrameRate", int(label))
+
+    def changeOscOutRate(self, index, label):
+        CeciliaLib.setVar("oscOutRate", int(label))
+
     def enableTooltips(self, state):
         CeciliaLib.setVar("useTooltips", state)
         CeciliaLib.updateTooltips()
@@ -624,6 +768,9 @@ class PreferenceFrame(wx.Frame):
     def enableAutomaticBinding(self, state):
         CeciliaLib.setVar("automaticMidiBinding", state)
 
+    def enableWarmServer(self, state):
+        CeciliaLib.setVar("warmServer", state)
+
     def enableVerbose(self, state):
         CeciliaLib.setVar("DEBUG", state)
         CeciliaLib.getVar("audioServer").updateDebug()
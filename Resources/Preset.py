@@ -62,6 +62,18 @@ class CECPreset(wx.Panel):
 
         mainSizer.Add(lineSizer, 0, wx.EXPAND | wx.ALIGN_CENTER | wx.ALL, 7)
 
+        self.morphChoices = []
+        if CeciliaLib.getVar("presetMorph"):
+            morphSizer = wx.FlexGridSizer(0, 2, 5, 10)
+            for i in range(2 ** min(CeciliaLib.getVar("presetMorph"), 2)):
+                menu = CustomMenu(self, choice=self.orderingPresetNames(), size=(93, 20), init='init',
+                                  outFunction=self.onMorphSelect, colour=TR_BACK_COLOUR)
+                CeciliaLib.setToolTip(menu, TT_PRESET_MORPH)
+                morphSizer.Add(menu, 0, wx.ALIGN_LEFT)
+                self.morphChoices.append(menu)
+            mainSizer.Add(morphSizer, 0, wx.ALIGN_LEFT | wx.LEFT | wx.RIGHT | wx.BOTTOM, 7)
+            CeciliaLib.setVar("morphPresets", [menu.getLabel() for menu in self.morphChoices])
+
         mainSizer.AddGrowableCol(0)
         self.SetSizer(mainSizer)
 
@@ -75,6 +87,26 @@ class CECPreset(wx.Panel):
     def loadPresets(self):
         presets = self.orderingPresetNames()
         self.presetChoice.setChoice(presets, False)
+        self.updateMorphChoices()
+
+    def updateMorphChoices(self):
+        if not self.morphChoices:
+            return
+        presets = self.orderingPresetNames()
+        for menu in self.morphChoices:
+            label = menu.getLabel()
+            menu.setChoice(presets, False)
+            if label in presets:
+                menu.setLabel(label, False)
+        CeciliaLib.setMorphPresets([menu.getLabel() for menu in self.morphChoices])
+
+    def setMorphPresets(self, names):
+        for menu, name in zip(self.morphChoices, names):
+            if name in menu.getChoice():
+                menu.setLabel(name, False)
+
+    def onMorphSelect(self, idx, label):
+        CeciliaLib.setMorphPresets([menu.getLabel() for menu in self.morphChoices])
 
     def orderingPresetNames(self):
         presets = list(CeciliaLib.getVar("presets").keys())
@@ -83,15 +115,19 @@ class CECPreset(wx.Panel):
         return presets
 
     def onPresetSelect(self, idxPreset, newPreset):
+        if CeciliaLib.getVar("audioServer").isAudioServerRunning():
+            loadPreset = CeciliaLib.loadPresetLive
+        else:
+            loadPreset = CeciliaLib.loadPresetFromDict
         if newPreset in CeciliaLib.getVar("presets"):
-            CeciliaLib.loadPresetFromDict(newPreset)
+            loadPreset(newPreset)
             for preset in CeciliaLib.getVar("presets"):
                 if preset != newPreset:
                     CeciliaLib.getVar("presets")[preset]['active'] = False
             CeciliaLib.getVar("presets")[newPreset]['active'] = True
             self.currentPreset = newPreset
         elif newPreset == 'init':
-            CeciliaLib.loadPresetFromDict("init")
+            loadPreset("init")
             for preset in CeciliaLib.getVar("presets"):
                 CeciliaLib.getVar("presets")[preset]['active'] = False
             self.currentPreset = "init"
@@ -111,6 +147,7 @@ class CECPreset(wx.Panel):
                 CeciliaLib.deletePreset(self.currentPreset)
                 self.presetChoice.setChoice(self.orderingPresetNames(), False)
                 self.presetChoice.setStringSelection("")
+                self.updateMorphChoices()
                 CeciliaLib.saveCeciliaFile(self, showDialog=False)
 
     def onSavePreset(self):
@@ -141,4 +178,5 @@ class CECPreset(wx.Panel):
             CeciliaLib.savePresetToDict(self.currentPreset)
             self.presetChoice.setChoice(self.orderingPresetNames(), False)
             self.presetChoice.setStringSelection(self.currentPreset)
+            self.updateMorphChoices()
             CeciliaLib.saveCeciliaFile(self, showDialog=False)
@@ -0,0 +1,169 @@
+# encoding: utf-8
+"""
+Copyright 2011 iACT, Universite de Montreal, Jean Piche, Olivier Belanger, Jean-Michel Dumas
+
+This file is part of Cecilia 5.
+
+Cecilia 5 is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Cecilia 5 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os, ast, hashlib
+from .constants import *
+
+
+class PresetStore:
+    """
+    Sidecar preset store of a module file.
+
+    Two files live next to the module:
+        - `<module>.presets`: one line per saved preset, with its settings
+          and the position of its graph data in the data file. Later lines
+          override earlier ones, deleted presets get a 'deleted' line.
+        - `<module>.presets.data`: the graph data of the presets.
+
+    Both files are only appended to when saving. They are compacted (written
+    to temporary files and renamed) when most of their content is obsolete.
+    Graph data is read when a preset is loaded, not when the module is opened.
+    """
+    def __init__(self, path):
+        self.setPath(path)
+        self.entries = {}
+        self.lines = 0
+
+    def setPath(self, path):
+        self.path = path
+        self.indexPath = "%s.%s" % (path, PRESET_STORE_EXTENSION)
+        self.dataPath = self.indexPath + ".data"
+
+    def exists(self):
+        return os.path.isfile(self.indexPath) and os.path.isfile(self.dataPath)
+
+    def remove(self):
+        for path in [self.indexPath, self.dataPath]:
+            if os.path.isfile(path):
+                os.remove(path)
+        self.entries = {}
+        self.lines = 0
+
+    def load(self):
+        "Returns the presets with their settings only, graph data is read by loadGraph."
+        presets = {}
+        self.entries = {}
+        self.lines = 0
+        with open(self.indexPath, "r", encoding="utf-8") as f:
+            for line in f:
+                self.lines += 1
+                try:
+                    record = ast.literal_eval(line)
+                except:
+                    # unfinished line of an interrupted save
+                    continue
+                name = record['name']
+                if record.get('deleted', False):
+                    presets.pop(name, None)
+                    self.entries.pop(name, None)
+                else:
+                    presets[name] = record['preset']
+                    self.entries[name] = {'meta': repr(record['preset']), 'graph': record['graph'],
+                                          'digest': record['digest']}
+        return presets
+
+    def readGraphText(self, name):
+        offset, length = self.entries[name]['graph']
+        with open(self.dataPath, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def loadGraph(self, name):
+        if name not in self.entries or self.entries[name]['graph'][1] == 0:
+            return {}
+        return ast.literal_eval(self.readGraphText(name).decode("utf-8"))
+
+    def loadAllGraphs(self, presets):
+        for name in presets:
+            if 'userGraph' not in presets[name] and name in self.entries:
+                presets[name]['userGraph'] = self.loadGraph(name)
+
+    def save(self, presets, path=None):
+        """
+        Appends the presets that changed since the last save. If `path`
+        differs from the current module path, the whole store is written
+        next to the new path.
+        """
+        if path is not None and path != self.path:
+            self.loadAllGraphs(presets)
+            self.setPath(path)
+            self.remove()
+
+        index = []
+        data = []
+        dataSize = 0
+        if os.path.isfile(self.dataPath):
+            dataSize = os.path.getsize(self.dataPath)
+
+        for name in list(self.entries.keys()):
+            if name not in presets:
+                index.append(repr({'name': name, 'deleted': True}))
+                del self.entries[name]
+
+        for name in sorted(presets.keys()):
+            preset = presets[name]
+            meta = dict([(key, preset[key]) for key in preset if key != 'userGraph'])
+            metaText = repr(meta)
+            entry = self.entries.get(name)
+            graph = entry['graph'] if entry is not None else (dataSize, 0)
+            digest = entry['digest'] if entry is not None else None
+            if 'userGraph' in preset:
+                graphText = (repr(preset['userGraph']) + "\n").encode("utf-8")
+                graphDigest = hashlib.sha1(graphText).hexdigest()
+                if graphDigest != digest:
+                    data.append(graphText)
+                    graph = (dataSize, len(graphText))
+                    digest = graphDigest
+                    dataSize += len(graphText)
+            if entry is None or entry['meta'] != metaText or entry['graph'] != graph:
+                index.append(repr({'name': name, 'preset': meta, 'graph': graph, 'digest': digest}))
+                self.entries[name] = {'meta': metaText, 'graph': graph, 'digest': digest}
+
+        with open(self.dataPath, "ab") as f:
+            f.write(b"".join(data))
+        if index or not os.path.isfile(self.indexPath):
+            with open(self.indexPath, "a", encoding="utf-8") as f:
+                for line in index:
+                    f.write(line + "\n")
+            self.lines += len(index)
+
+        live = sum([entry['graph'][1] for entry in self.entries.values()])
+        if (dataSize > 1048576 and dataSize > 2 * live) or self.lines > 4 * len(self.entries) + 16:
+            self.compact()
+
+    def compact(self):
+        "Rewrites both files with the current presets only."
+        entries = {}
+        with open(self.dataPath + ".tmp", "wb") as data:
+            with open(self.indexPath + ".tmp", "w", encoding="utf-8") as index:
+                offset = 0
+                for name in sorted(self.entries.keys()):
+                    entry = self.entries[name]
+                    graphText = self.readGraphText(name)
+                    data.write(graphText)
+                    graph = (offset, len(graphText))
+                    offset += len(graphText)
+                    index.write(repr({'name': name, 'preset': ast.literal_eval(entry['meta']),
+                                      'graph': graph, 'digest': entry['digest']}) + "\n")
+                    entries[name] = {'meta': entry['meta'], 'graph': graph, 'digest': entry['digest']}
+        os.replace(self.dataPath + ".tmp", self.dataPath)
+        os.replace(self.indexPath + ".tmp", self.indexPath)
+        self.entries = entries
+        self.lines = len(entries)
@@ -18,7 +18,7 @@ You should have received a copy of the GNU General Public License
 along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import wx, math
+import wx
 import Resources.CeciliaLib as CeciliaLib
 from .constants import *
 from .Widgets import *
@@ -492,6 +492,7 @@ class CECSlider:
             # alt is now the right click
             if alt and shift:
                 self.setMidiCtl(None)
+                CeciliaLib.getVar("audioServer").removeMidiBinding(self)
             elif shift:
                 CeciliaLib.getVar("grapher").setShowLineSolo(label)
                 CeciliaLib.getVar("grapher").toolbar.menu.setLabel(label, True)
@@ -680,37 +681,8 @@ class CECSlider:
 
     def setAutomationData(self, data):
         # convert values on scaling
-        temp = []
-        log = self.getLog()
-        minval = self.getMinValue()
-        maxval = self.getMaxValue()
-        automationlength = self.getAutomationLength()
-        frac = automationlength / CeciliaLib.getVar("totalTime")
-        virtuallength = len(data) / frac
-        data.extend([data[-1]] * int(((1 - frac) * virtuallength)))
-        totallength = float(len(data))
-        oldpos = 0
-        oldval = data[0]
-        if log:
-            maxOnMin = maxval / minval
-            torec = math.log10(oldval / minval) / math.log10(maxOnMin)
-        else:
-            maxMinusMin = maxval - minval
-            torec = (oldval - minval) / maxMinusMin
-        temp.append([0.0, torec])
-
-        for i, val in enumerate(data):
-            length = (i - oldpos) / totallength
-            pos = oldpos / totallength + length
-            if val == 0:
-                val = oldval
-            if log:
-                torec = math.log10(val / minval) / math.log10(maxOnMin)
-            else:
-                torec = (val - minval) / maxMinusMin
-            temp.append([pos, torec])
-            oldval = val
-            oldpos = i
+        temp = CeciliaLib.automationToPoints(data, self.getAutomationLength(), self.getMinValue(),
+                                             self.getMaxValue(), self.getLog(), fillZeros=True)
 
         self.automationData = temp
 
@@ -1056,6 +1028,7 @@ class CECRange:
                 label = label + ' max'
             if rightclick and shift:
                 self.setMidiCtl(None)
+                CeciliaLib.getVar("audioServer").removeMidiBinding(self)
             elif shift:
                 CeciliaLib.getVar("grapher").setShowLineSolo(label)
                 CeciliaLib.getVar("grapher").toolbar.menu.setLabel(label, True)
@@ -1296,35 +1269,8 @@ class CECRange:
 
     def setAutomationData(self, data, which=0):
         # convert values on scaling
-        temp = []
-        log = self.getLog()
-        minval = self.getMinValue()
-        maxval = self.getMaxValue()
-        automationlength = self.getAutomationLength()
-        frac = automationlength / CeciliaLib.getVar("totalTime")
-        virtuallength = len(data) / frac
-        data.extend([data[-1]] * int(((1 - frac) * virtuallength)))
-        totallength = float(len(data))
-        oldpos = 0
-        oldval = data[0]
-        if log:
-            maxOnMin = maxval / minval
-            torec = math.log10(oldval / minval) / math.log10(maxOnMin)
-        else:
-            maxMinusMin = maxval - minval
-            torec = (oldval - minval) / maxMinusMin
-        temp.append([0.0, torec])
-
-        for i, val in enumerate(data):
-            length = (i - oldpos) / totallength
-            pos = oldpos / totallength + length
-            if log:
-                torec = math.log10(val / minval) / math.log10(maxOnMin)
-            else:
-                torec = (val - minval) / maxMinusMin
-            temp.append([pos, torec])
-            oldval = val
-            oldpos = i
+        temp = CeciliaLib.automationToPoints(data, self.getAutomationLength(), self.getMinValue(),
+                                             self.getMaxValue(), self.getLog())
 
         if len(self.automationData) < 2:
             self.automationData.append(temp)
@@ -1764,35 +1710,8 @@ class CECSplitter:
 
     def setAutomationData(self, data, which=0):
         # convert values on scaling
-        temp = []
-        log = self.getLog()
-        minval = self.getMinValue()
-        maxval = self.getMaxValue()
-        automationlength = self.getAutomationLength()
-        frac = automationlength / CeciliaLib.getVar("totalTime")
-        virtuallength = len(data) / frac
-        data.extend([data[-1]] * int(((1 - frac) * virtuallength)))
-        totallength = float(len(data))
-        oldpos = 0
-        oldval = data[0]
-        if log:
-            maxOnMin = maxval / minval
-            torec = math.log10(oldval / minval) / math.log10(maxOnMin)
-        else:
-            maxMinusMin = maxval - minval
-            torec = (oldval - minval) / maxMinusMin
-        temp.append([0.0, torec])
-
-        for i, val in enumerate(data):
-            length = (i - oldpos) / totallength
-            pos = oldpos / totallength + length
-            if log:
-                torec = math.log10(val / minval) / math.log10(maxOnMin)
-            else:
-                torec = (val - minval) / maxMinusMin
-            temp.append([pos, torec])
-            oldval = val
-            oldpos = i
+        temp = CeciliaLib.automationToPoints(data, self.getAutomationLength(), self.getMinValue(),
+                                             self.getMaxValue(), self.getLog())
 
         if len(self.automationData) < 2:
             self.automationData.append(temp)
@@ -21,7 +21,6 @@ along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 import sys, os
 import unicodedata
 from .constants import *
-from pyo import pa_get_default_devices_from_host
 
 if sys.version_info[0] < 3:
     unicode_t = unicode
@@ -92,6 +91,11 @@ CeciliaVar['userInputs'] = dict()
 CeciliaVar['samplerSliders'] = []
 CeciliaVar['samplerTogglePopup'] = []
 CeciliaVar['presets'] = dict()
+CeciliaVar['presetStore'] = None
+CeciliaVar['morphPresets'] = []
+CeciliaVar['updateBus'] = None
+CeciliaVar['deviceQuery'] = None
+CeciliaVar['moduleCatalog'] = None
 CeciliaVar['initPreset'] = None
 CeciliaVar['presetPanel'] = None
 
@@ -99,6 +103,8 @@ CeciliaVar['tooltips'] = []
 
 # Performance variables
 CeciliaVar['toDac'] = True
+CeciliaVar['headless'] = False
+CeciliaVar['warmServer'] = 0
 CeciliaVar['outputFile'] = ''
 CeciliaVar['totalTime'] = 30.0
 CeciliaVar['defaultTotalTime'] = 30.0
@@ -108,17 +114,12 @@ CeciliaVar['audioServer'] = None
 CeciliaVar['automaticMidiBinding'] = 0
 CeciliaVar['showSpectrum'] = 0
 CeciliaVar['spectrumFrame'] = None
-
-if sys.platform.startswith("win"):
-    def_in, def_out = pa_get_default_devices_from_host("directsound")
-elif sys.platform.startswith("darwin"):
-    def_in, def_out = pa_get_default_devices_from_host("core")
-else:
-    def_in, def_out = pa_get_default_devices_from_host("alsa")
-if def_in < 0:
-    def_in = 0
-if def_out < 0:
-    def_out = 0
+CeciliaVar['batchProcesses'] = 0 # 0 = one worker per cpu
+CeciliaVar['undoMemory'] = 32 # megabytes kept by the grapher undo history
+CeciliaVar['sidecarPresets'] = 0 # save presets in a <module>.presets file instead of the module
+CeciliaVar['presetMorph'] = 0 # 0 = off, 1 = morph between two presets, 2 = across four presets
+CeciliaVar['guiFrameRate'] = 30 # transport time and meters refresh rate, in frames per second
+CeciliaVar['oscOutRate'] = 30 # maximum number of OSC bundles sent per second to a destination
 
 # Server Flags
 CeciliaVar['sr'] = 44100
@@ -129,8 +130,8 @@ CeciliaVar['audioFileType'] = 'aif' # aif, wav, flac, ogg, sd2, au, caf
 CeciliaVar['samplePrecision'] = '32 bit' # '32 bit', '64 bit'
 CeciliaVar['bufferSize'] = '512'
 CeciliaVar['audioHostAPI'] = 'portaudio'
-CeciliaVar['audioOutput'] = def_out
-CeciliaVar['audioInput'] = def_in
+CeciliaVar['audioOutput'] = -1 # -1 = default device of the host, set when the devices are enumerated
+CeciliaVar['audioInput'] = -1
 CeciliaVar['enableAudioInput'] = 0
 CeciliaVar['useMidi'] = 0
 CeciliaVar['useSoundDur'] = 0
@@ -183,7 +184,7 @@ def readCeciliaPrefsFromFile():
         #### Some special cases ####
         convertToInt = ['sr', 'defaultNchnls', 'audioOutput', 'audioInput', 'sampSize', 'automaticMidiBinding',
                         'midiDeviceIn', 'useTooltips', 'enableAudioInput', 'graphTexture', 'showSpectrum', 'useSoundDur',
-                        'defaultFirstInput', 'defaultFirstOutput']
+                        'defaultFirstInput', 'defaultFirstOutput', 'batchProcesses', 'warmServer', 'undoMemory', 'sidecarPresets', 'presetMorph', 'guiFrameRate', 'oscOutRate']
         convertToFloat = ['defaultTotalTime', 'globalFade', 'DEBUG']
         convertToTuple = ['interfaceSize', 'interfacePosition']
         jackPrefs = ['client']
@@ -238,7 +239,7 @@ def writeCeciliaPrefsToFile():
                   'globalFade', 'bufferSize', 'soundfilePlayer', 'soundfileEditor', 'prefferedPath', 'DEBUG',
                   'openFilePath', 'saveFilePath', 'saveAudioFilePath', 'openAudioFilePath', 'grapherLinePath',
                   'defaultTotalTime', 'lastAudioFiles', 'automaticMidiBinding', 'showSpectrum', 'useSoundDur',
-                  'defaultFirstInput', 'defaultFirstOutput', 'lastCeciliaFile']
+                  'defaultFirstInput', 'defaultFirstOutput', 'lastCeciliaFile', 'batchProcesses', 'warmServer', 'undoMemory', 'sidecarPresets', 'presetMorph', 'guiFrameRate', 'oscOutRate']
 
     print('Writing Cecilia preferences...')
 
@@ -497,6 +497,105 @@ class FrameLabel(wx.Panel):
         dc.SetTextForeground(LABEL_LABEL_COLOUR)
         dc.DrawLabel(self.label, rec, wx.ALIGN_CENTER)
 
+class WaveformView(wx.Panel):
+    """
+    Waveform overview of a sound, drawn from the peak files built by the audio
+    server. Mouse wheel zooms around the pointer, double-click shows the whole sound.
+    """
+    def __init__(self, parent, size=(300, 60)):
+        wx.Panel.__init__(self, parent, -1, size=size)
+        self.SetMaxSize(self.GetSize())
+        self.SetBackgroundStyle(wx.BG_STYLE_CUSTOM)
+        self.path = ''
+        self.dur = 0
+        self.view = [0.0, 1.0]
+        self.region = None
+        self.cursor = None
+        self.Bind(wx.EVT_PAINT, self.OnPaint)
+        self.Bind(wx.EVT_MOUSEWHEEL, self.OnMouseWheel)
+        self.Bind(wx.EVT_LEFT_DCLICK, self.OnDoubleClick)
+
+    def setSound(self, path, dur):
+        self.path = path
+        self.dur = dur
+        self.view = [0.0, 1.0]
+        wx.CallAfter(self.Refresh)
+
+    def setRegion(self, start, dur):
+        """Highlights `dur` seconds from `start` (None = no region)."""
+        if start is None:
+            self.region = None
+        else:
+            self.region = (start, start + dur)
+        wx.CallAfter(self.Refresh)
+
+    def setCursor(self, pos):
+        self.cursor = pos
+        wx.CallAfter(self.Refresh)
+
+    def onPeaksReady(self):
+        wx.CallAfter(self.Refresh)
+
+    def OnMouseWheel(self, event):
+        w, h = self.GetSize()
+        start, end = self.view
+        centre = start + (end - start) * event.GetPosition()[0] / float(w)
+        if event.GetWheelRotation() > 0:
+            zoom = 0.8
+        else:
+            zoom = 1.25
+        span = min(1.0, max((end - start) * zoom, 1.0 / 100000))
+        start = min(max(0.0, centre - (centre - start) * span / (end - start)), 1.0 - span)
+        self.view = [start, start + span]
+        self.Refresh()
+
+    def OnDoubleClick(self, event):
+        self.view = [0.0, 1.0]
+        self.Refresh()
+
+    def OnPaint(self, event):
+        w, h = self.GetSize()
+        dc = wx.BufferedPaintDC(self)
+        dc.SetBrush(wx.Brush(WAVEFORM_BACK_COLOUR, wx.SOLID))
+        dc.SetPen(wx.Pen(WIDGET_BORDER_COLOUR, width=1, style=wx.SOLID))
+        dc.DrawRectangle(0, 0, w, h)
+        if not self.path or not self.dur:
+            return
+
+        start, end = self.view
+        server = CeciliaLib.getVar("audioServer")
+        peaks = server.getPeaks(self.path, start, end, w - 2)
+        if peaks is None:
+            server.buildPeaks(self.path, self.onPeaksReady)
+            dc.SetFont(wx.Font(LABEL_FONT, wx.FONTFAMILY_SWISS, wx.FONTSTYLE_ITALIC, wx.FONTWEIGHT_NORMAL))
+            dc.SetTextForeground(LABEL_LABEL_COLOUR)
+            dc.DrawLabel("Building waveform overview...", wx.Rect(0, 0, w, h), wx.ALIGN_CENTER)
+            return
+
+        cols, chnls = peaks.shape[0], peaks.shape[1]
+        xs = [1 + (w - 2) * (i + 0.5) / cols for i in range(cols)]
+        rowh = (h - 2) / float(chnls)
+        dc.SetPen(wx.Pen(WAVEFORM_COLOUR, width=1, style=wx.SOLID))
+        for c in range(chnls):
+            mid = 1 + rowh * (c + 0.5)
+            tops = mid - peaks[:, c, 1] * rowh * 0.5
+            bottoms = mid - peaks[:, c, 0] * rowh * 0.5 + 1
+            dc.DrawLineList([(int(x), int(y1), int(x), int(y2)) for x, y1, y2 in zip(xs, tops, bottoms)])
+
+        def toX(t):
+            return 1 + (w - 2) * (t / self.dur - start) / (end - start)
+
+        gc = wx.GraphicsContext_Create(dc)
+        if self.region is not None:
+            x1, x2 = toX(self.region[0]), toX(self.region[1])
+            gc.SetPen(wx.Pen(WHITE_COLOUR, width=1, style=wx.SOLID))
+            gc.SetBrush(wx.Brush(wx.Colour(*WAVEFORM_REGION_COLOUR)))
+            gc.DrawRectangle(x1, 1, max(1, x2 - x1), h - 2)
+        if self.cursor is not None:
+            x = toX(self.cursor)
+            gc.SetPen(wx.Pen(WHITE_COLOUR, width=1, style=wx.SOLID))
+            gc.StrokeLine(x, 1, x, h - 1)
+
 class AboutLabel(wx.Panel):
     def __init__(self, parent, version, copyright, size=(600, 80), font=None, colour=None):
         wx.Panel.__init__(self, parent, -1, size=size)
@@ -4300,8 +4399,12 @@ class VuMeter(wx.Panel):
             CeciliaLib.getVar("interface").Layout()
 
     def setRms(self, *args):
-        if args[0] < 0:
+        "Amplitude callback of the server, the meter is drawn by showRms."
+        if args and args[0] < 0:
             return
+        CeciliaLib.postGuiUpdate("rms", args)
+
+    def showRms(self, args):
         if not args:
             self.amplitude = [0 for i in range(self.nchnls)]
         else:
@@ -4309,7 +4412,7 @@ class VuMeter(wx.Panel):
         self.amplitude = [math.log10(amp + 0.00001) * 0.2 + 1. for amp in self.amplitude]
         if self.seekPeak():
             CeciliaLib.getControlPanel().updatePeak(self.peak)
-        wx.CallAfter(self.Refresh)
+        self.Refresh()
 
     def OnPaint(self, event):
         w, h = self.GetSize()
@@ -4330,6 +4433,8 @@ class VuMeter(wx.Panel):
 
     def reset(self):
         self.amplitude = [0 for i in range(self.nchnls)]
+        # replaces a value still waiting on the update bus
+        CeciliaLib.postGuiUpdate("rms", ())
         wx.CallAfter(self.Refresh)
 
     def seekPeak(self):
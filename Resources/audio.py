@@ -19,16 +19,196 @@ along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import wx
-import os, math, copy, time, traceback
+import os, sys, math, copy, time, traceback, marshal, hashlib, threading, multiprocessing
+import numpy as _Numeric
 import Resources.CeciliaLib as CeciliaLib
 from .constants import *
 from .API_interface import *
+from .PresetStore import PresetStore
+from .OpenSndCtrl import OscBundleSender
+from . import PeakFiles
 
 if CeciliaLib.getVar("samplePrecision") == '64 bit':
     from pyo64 import *
 else:
     from pyo import *
 
+def saveAutomation(record, path):
+    """
+    Saves the content of a ControlRec object as float32 (time, value) arrays,
+    one .npy file per stream, named `path`_000.npy, `path`_001.npy, etc.
+    """
+    for i in range(len(record)):
+        data = _Numeric.array(record[i].getData(), dtype=_Numeric.float32).reshape(-1, 2)
+        _Numeric.save("%s_%03d.npy" % (path, i), data)
+
+class WidgetFeedback:
+    """
+    Sends the values read on the audio side to a widget, only when they
+    moved by more than WIDGET_FEEDBACK_EPSILON of the widget range. Values
+    are queued on the audio server and sent to the GUI once per update.
+    """
+    def __init__(self, setter, mini, maxi):
+        self.setter = setter
+        self.epsilon = abs(maxi - mini) * WIDGET_FEEDBACK_EPSILON
+        self.last = None
+
+    def update(self, value):
+        last = self.last
+        if last is not None:
+            if isinstance(value, list):
+                if len(value) == len(last) and max([abs(a - b) for a, b in zip(value, last)]) <= self.epsilon:
+                    return
+            elif abs(value - last) <= self.epsilon:
+                return
+        self.last = value
+        CeciliaLib.getVar("audioServer").queueWidgetValue(self.setter, value)
+
+class MidiTarget:
+    """
+    A parameter controlled by the MIDI dispatcher. Normalized controller
+    values are scaled to the parameter range (squared for log parameters)
+    and given to a SigTo, or to `function` if there is no signal.
+    For a multi-stream SigTo, `index` is the stream set by this target
+    and `values` is the list of values shared by the streams.
+    """
+    def __init__(self, sig, mini, maxi, log=False, index=None, values=None, function=None):
+        self.sig = sig
+        self.mini = mini
+        self.maxi = maxi
+        self.exp = 2 if log else 1
+        self.index = index
+        self.values = values
+        self.function = function
+
+    def setValue(self, x):
+        value = self.mini + (self.maxi - self.mini) * x ** self.exp
+        if self.function is not None:
+            self.function(value)
+        elif self.index is None:
+            self.sig.value = value
+        else:
+            self.values[self.index] = value
+            self.sig.value = list(self.values)
+
+class MidiDispatcher:
+    """
+    Routes MIDI controllers to parameters through a single RawMidi object.
+
+    Routes are keyed by (channel, controller), channel 0 matches every
+    channel. Controllers 0-31 are read as 14-bit values when their LSB
+    (controller + 32) is received. NRPNs are routed as controller
+    MIDI_NRPN_OFFSET + parameter number. The RawMidi object plays as long as
+    the server is booted, routes are changed while playing with addTarget,
+    removeTarget and rebind, nothing is rebuilt in the audio graph.
+    """
+    def __init__(self):
+        self.rawmidi = None
+        self.clear()
+
+    def clear(self):
+        self.routes = {}
+        self.owners = {}
+        self.msb = {}
+        self.nrpn = {}
+        self.dataMsb = {}
+        self.learn = None
+
+    def play(self):
+        self.rawmidi = RawMidi(self.process)
+
+    def setLearn(self, function):
+        "`function(controller, channel)` is called with the next controller moved."
+        self.learn = function
+
+    def addTarget(self, ctl, channel, target, owner=None):
+        "`owner` is the widget bound to the controller, used by rebind and unbind."
+        self.routes.setdefault((channel, ctl), []).append(target)
+        if owner is not None:
+            self.owners.setdefault(owner, []).append(target)
+
+    def removeTarget(self, target):
+        for key in list(self.routes.keys()):
+            if target in self.routes[key]:
+                self.routes[key].remove(target)
+                if not self.routes[key]:
+                    del self.routes[key]
+
+    def moveTarget(self, target, ctl, channel):
+        self.removeTarget(target)
+        self.addTarget(ctl, channel, target)
+
+    def rebind(self, owner, ctl, channel):
+        "Moves the targets of a widget to other controllers, lists of controllers for a range."
+        targets = self.owners.get(owner, [])
+        if not isinstance(ctl, list):
+            ctl = [ctl] * len(targets)
+        if not isinstance(channel, list):
+            channel = [channel] * len(ctl)
+        for target, c, chnl in zip(targets, ctl, channel):
+            self.moveTarget(target, c, chnl)
+
+    def unbind(self, owner):
+        for target in self.owners.pop(owner, []):
+            self.removeTarget(target)
+
+    def isRouted(self, channel, ctl):
+        return (channel, ctl) in self.routes or (0, ctl) in self.routes
+
+    def dispatch(self, channel, ctl, x):
+        if self.learn is not None:
+            self.learn(ctl, channel)
+            return
+        for key in [(channel, ctl), (0, ctl)]:
+            for target in self.routes.get(key, []):
+                target.setValue(x)
+
+    def process(self, status, data1, data2):
+        if status & 0xF0 != 0xB0:
+            return
+        channel = (status & 0x0F) + 1
+        if data1 == 101 or data1 == 100:
+            # RPN selected, data entry doesn't belong to the NRPN anymore
+            self.nrpn.pop(channel, None)
+            self.dataMsb.pop(channel, None)
+        elif data1 == 99:
+            self.nrpn[channel] = (data2 << 7) | (self.nrpn.get(channel, 0) & 127)
+        elif data1 == 98:
+            self.nrpn[channel] = (self.nrpn.get(channel, 0) & ~127) | data2
+        elif data1 == 6 and channel in self.nrpn:
+            self.dataMsb[channel] = data2
+            self.dispatch(channel, MIDI_NRPN_OFFSET + self.nrpn[channel], data2 / 127.0)
+        elif data1 == 38 and channel in self.nrpn:
+            value = (self.dataMsb.get(channel, 0) << 7) | data2
+            self.dispatch(channel, MIDI_NRPN_OFFSET + self.nrpn[channel], value / 16383.0)
+        elif data1 < 32:
+            self.msb[(channel, data1)] = data2
+            self.dispatch(channel, data1, data2 / 127.0)
+        elif data1 < 64 and (channel, data1 - 32) in self.msb and not self.isRouted(channel, data1):
+            if self.learn is not None or not self.isRouted(channel, data1 - 32):
+                return
+            value = (self.msb[(channel, data1 - 32)] << 7) | data2
+            self.dispatch(channel, data1 - 32, value / 16383.0)
+        else:
+            self.dispatch(channel, data1, data2 / 127.0)
+
+def midiSig(ctl, mini, maxi, init, channel, log=False, owner=None):
+    """
+    Returns a SigTo driven by the MIDI dispatcher. A list of controllers gives a
+    multi-stream SigTo. `owner` is the widget the controllers are bound to.
+    """
+    sig = SigTo(init, time=0.025, init=init)
+    dispatcher = CeciliaLib.getVar("audioServer").midiDispatcher
+    if isinstance(ctl, list):
+        values = list(init)
+        if not isinstance(channel, list):
+            channel = [channel] * len(ctl)
+        for i in range(len(ctl)):
+            dispatcher.addTarget(ctl[i], channel[i], MidiTarget(sig, mini, maxi, log, index=i, values=values), owner)
+    else:
+        dispatcher.addTarget(ctl, channel, MidiTarget(sig, mini, maxi, log), owner)
+    return sig
+
 class CeciliaFilein:
     def __init__(self, parent, name):
         self.parent = parent
@@ -72,6 +252,7 @@ class CeciliaSampler:
                 break
         self.sampler = sampler
         self.mode = self.sampler.mode
+        self.feedbacks = {}
 
         self.start_play, self.start_midi = False, False
         self.dur_play, self.dur_midi = False, False
@@ -80,12 +261,13 @@ class CeciliaSampler:
         self.pitch_play, self.pitch_midi = False, False
 
         if self.mode != 1:
+            plotter = CeciliaLib.getVar("grapher").plotter
             graph_lines = {}
-            for line in CeciliaLib.getVar("grapher").plotter.getData():
-                if line.name.startswith(self.name):
-                    graph_lines[line.name] = line
+            for suffix in ['start', 'end', 'xfade', 'gain', 'trans']:
+                graph_lines[self.name + suffix] = plotter.getLineFromName(self.name + suffix)
 
-            paths = [slider.getPath() for slider in sampler.getSamplerSliders()]
+            samplerSliders = sampler.getSamplerSliders()
+            paths = self.paths = [slider.getPath() for slider in samplerSliders]
 
             ################ start ################
             start_init, self.start_play, self.start_rec = sinfo['loopIn'][0], sinfo['loopIn'][1], sinfo['loopIn'][2]
@@ -110,7 +292,7 @@ class CeciliaSampler:
                 self.setGraph('start', data)
                 self.start = TableRead(self.start_table, freq=1.0 / totalTime).play()
             elif self.start_midi:
-                self.start = Midictl(start_midictl, self.start_mini, self.start_maxi, start_init, start_midichnl)
+                self.start = midiSig(start_midictl, self.start_mini, self.start_maxi, start_init, start_midichnl, owner=samplerSliders[0])
             elif self.start_osc is not None:
                 self.baseModule._addOpenSndCtrlWidget(self.start_osc[0], self.start_osc[1], self, name='start')
             if self.start_rec:
@@ -139,7 +321,7 @@ class CeciliaSampler:
                 self.setGraph('end', data)
                 self.dur = TableRead(self.dur_table, freq=1.0 / totalTime).play()
             elif self.dur_midi:
-                self.dur = Midictl(dur_midictl, self.dur_mini, self.dur_maxi, dur_init, dur_midichnl)
+                self.dur = midiSig(dur_midictl, self.dur_mini, self.dur_maxi, dur_init, dur_midichnl, owner=samplerSliders[1])
             elif self.dur_osc is not None:
                 self.baseModule._addOpenSndCtrlWidget(self.dur_osc[0], self.dur_osc[1], self, name='dur')
             if self.dur_rec:
@@ -167,7 +349,7 @@ class CeciliaSampler:
                 self.setGraph('xfade', data)
                 self.xfade = TableRead(self.xfade_table, freq=1.0 / totalTime).play()
             elif self.xfade_midi:
-                self.xfade = Midictl(xfade_midictl, 0, 50, xfade_init, xfade_midichnl)
+                self.xfade = midiSig(xfade_midictl, 0, 50, xfade_init, xfade_midichnl, owner=samplerSliders[2])
             elif self.xfade_osc is not None:
                 self.baseModule._addOpenSndCtrlWidget(self.xfade_osc[0], self.xfade_osc[1], self, name='xfade')
             if self.xfade_rec:
@@ -195,7 +377,7 @@ class CeciliaSampler:
                 self.setGraph('gain', data)
                 self.gain_in = TableRead(self.gain_table, freq=1.0 / totalTime).play()
             elif self.gain_midi:
-                self.gain_in = Midictl(gain_midictl, -48, 18, gain_init, gain_midichnl)
+                self.gain_in = midiSig(gain_midictl, -48, 18, gain_init, gain_midichnl, owner=samplerSliders[3])
             elif self.gain_osc is not None:
                 self.baseModule._addOpenSndCtrlWidget(self.gain_osc[0], self.gain_osc[1], self, name='gain')
             if self.gain_rec:
@@ -224,7 +406,7 @@ class CeciliaSampler:
                 self.setGraph('trans', data)
                 self.pitch_in = TableRead(self.pitch_table, freq=1.0 / totalTime).play()
             elif self.pitch_midi:
-                self.pitch_in = Midictl(pitch_midictl, -48, 48, pitch_init, pitch_midichnl)
+                self.pitch_in = midiSig(pitch_midictl, -48, 48, pitch_init, pitch_midichnl, owner=samplerSliders[4])
             elif self.pitch_osc is not None:
                 self.baseModule._addOpenSndCtrlWidget(self.pitch_osc[0], self.pitch_osc[1], self, name='pitch')
             if self.pitch_rec:
@@ -338,20 +520,20 @@ class CeciliaSampler:
     def updateWidgets(self):
         if self.mode != 1:
             if self.start_midi and not self.start_play:
-                val = self.start.get()
-                wx.CallAfter(self.sampler.getSamplerFrame().loopInSlider.setValue, val)
+                self.getFeedback('start', self.start_mini, self.start_maxi).update(self.start.get())
             if self.dur_midi and not self.dur_play:
-                val = self.dur.get()
-                wx.CallAfter(self.sampler.getSamplerFrame().loopOutSlider.setValue, val)
+                self.getFeedback('dur', self.dur_mini, self.dur_maxi).update(self.dur.get())
             if self.xfade_midi and not self.xfade_play:
-                val = self.xfade.get()
-                wx.CallAfter(self.sampler.getSamplerFrame().loopXSlider.setValue, val)
+                self.getFeedback('xfade', 0, 50).update(self.xfade.get())
             if self.gain_midi and not self.gain_play:
-                val = self.gain_in.get()
-                wx.CallAfter(self.sampler.getSamplerFrame().gainSlider.setValue, val)
+                self.getFeedback('gain', -48, 18).update(self.gain_in.get())
             if self.pitch_midi and not self.pitch_play:
-                val = self.pitch_in.get()
-                wx.CallAfter(self.sampler.getSamplerFrame().transpSlider.setValue, val)
+                self.getFeedback('pitch', -48, 48).update(self.pitch_in.get())
+
+    def getFeedback(self, name, mini, maxi):
+        if name not in self.feedbacks:
+            self.feedbacks[name] = WidgetFeedback(self.getWidget(name).setValue, mini, maxi)
+        return self.feedbacks[name]
 
     def newMidiPitch(self):
         if not self.pitch_midi:
@@ -378,15 +560,15 @@ class CeciliaSampler:
     def checkForAutomation(self):
         if self.mode != 1:
             if self.start_rec:
-                self.start_record.write()
+                saveAutomation(self.start_record, self.paths[0])
             if self.dur_rec:
-                self.dur_record.write()
+                saveAutomation(self.dur_record, self.paths[1])
             if self.xfade_rec:
-                self.xfade_record.write()
+                saveAutomation(self.xfade_record, self.paths[2])
             if self.gain_rec:
-                self.gain_record.write()
+                saveAutomation(self.gain_record, self.paths[3])
             if self.pitch_rec:
-                self.pitch_record.write()
+                saveAutomation(self.pitch_record, self.paths[4])
 
     def sig(self):
         return self.mix
@@ -448,10 +630,7 @@ class CeciliaSlider:
         self.baseModule = baseModule
 
         if not up:
-            for line in CeciliaLib.getVar("grapher").plotter.getData():
-                if line.name == self.name:
-                    break
-
+            line = CeciliaLib.getVar("grapher").plotter.getLineFromName(self.name)
             self.widget = line.slider
             self.play = self.widget.getPlay()
             self.rec = self.widget.getRec()
@@ -480,6 +659,7 @@ class CeciliaSlider:
         maxi = self.widget.getMaxValue()
         log = self.widget.getLog()
         self.slider = SigTo(init, time=gliss, init=init)
+        self.feedback = WidgetFeedback(self.widget.setValue, mini, maxi)
         if self.rec:
             self.record = ControlRec(self.slider, filename=self.widget.getPath(), rate=1000, dur=totalTime).play()
         if self.play > 0:
@@ -488,13 +668,7 @@ class CeciliaSlider:
             self.setGraph(data)
             self.reader = TableRead(self.table, freq=1.0 / totalTime).play()
         elif self.midi:
-            if log:
-                init = math.sqrt((init - mini) / (maxi - mini)) * (maxi - mini) + mini
-                exp = 2
-            else:
-                exp = 1
-            self.ctlin = Midictl(self.widget.getMidiCtl(), mini, maxi, init, self.widget.getMidiChannel())
-            self.reader = Scale(SigTo(self.ctlin), inmin=mini, inmax=maxi, outmin=mini, outmax=maxi, exp=exp)
+            self.reader = midiSig(self.widget.getMidiCtl(), mini, maxi, init, self.widget.getMidiChannel(), log, owner=self.widget)
         elif self.openSndCtrl:
             port, address = self.widget.getOpenSndCtrl()
             self.baseModule._addOpenSndCtrlWidget(port, address, self)
@@ -514,8 +688,7 @@ class CeciliaSlider:
         self.table.replace(func)
 
     def updateWidget(self):
-        val = self.reader.get()
-        wx.CallAfter(self.widget.setValue, val)
+        self.feedback.update(self.reader.get())
 
     def setValueFromOSC(self, val):
         val = rescale(val, ymin=self.widget.getMinValue(), ymax=self.widget.getMaxValue(), ylog=self.widget.getLog())
@@ -532,13 +705,8 @@ class CeciliaRange:
         self.oscTmpVals = [0, 0]
 
         if not up:
-            self.graph_lines = [None, None]
-            for line in CeciliaLib.getVar("grapher").plotter.getData():
-                if self.name == line.name:
-                    if line.suffix == "min":
-                        self.graph_lines[0] = line
-                    elif line.suffix == "max":
-                        self.graph_lines[1] = line
+            plotter = CeciliaLib.getVar("grapher").plotter
+            self.graph_lines = [plotter.getLineFromName(self.name, "min"), plotter.getLineFromName(self.name, "max")]
 
             self.widget = self.graph_lines[0].slider
             self.play = self.widget.getPlay()
@@ -566,6 +734,7 @@ class CeciliaRange:
         maxi = self.widget.getMaxValue()
         log = self.widget.getLog()
         self.slider = SigTo(init, time=gliss, init=init)
+        self.feedback = WidgetFeedback(self.widget.setValue, mini, maxi)
         if self.rec:
             self.record = ControlRec(self.slider, filename=self.widget.getPath(), rate=1000, dur=totalTime).play()
         if self.play > 0:
@@ -579,13 +748,7 @@ class CeciliaRange:
             self.reader_max = TableRead(self.table_max, freq=1.0 / totalTime).play()
             self.reader = Mix([self.reader_min, self.reader_max], voices=2)
         elif self.midi:
-            if log:
-                init = [math.sqrt((x - mini) / (maxi - mini)) * (maxi - mini) + mini for x in init]
-                exp = 2
-            else:
-                exp = 1
-            self.ctlin = Midictl(self.widget.getMidiCtl(), mini, maxi, init, self.widget.getMidiChannel())
-            self.reader = Scale(SigTo(self.ctlin), inmin=mini, inmax=maxi, outmin=mini, outmax=maxi, exp=exp)
+            self.reader = midiSig(self.widget.getMidiCtl(), mini, maxi, init, self.widget.getMidiChannel(), log, owner=self.widget)
         elif self.openSndCtrl:
             oscTuples = self.widget.getOpenSndCtrl()
             if oscTuples[0] != ():
@@ -613,8 +776,7 @@ class CeciliaRange:
             self.table_max.replace(func)
 
     def updateWidget(self):
-        val = self.reader.get(all=True)
-        wx.CallAfter(self.widget.setValue, val)
+        self.feedback.update(self.reader.get(all=True))
 
     def setValueFromOSC(self, val, which):
         val = rescale(val, ymin=self.widget.getMinValue(), ymax=self.widget.getMaxValue(), ylog=self.widget.getLog())
@@ -655,6 +817,7 @@ class CeciliaSplitter:
 
         init = self.widget.getValue()
         self.slider = SigTo(init, time=gliss, init=init)
+        self.feedback = WidgetFeedback(self.widget.setValue, self.widget.getMinValue(), self.widget.getMaxValue())
 
         if self.rec:
             self.record = ControlRec(self.slider, filename=self.widget.getPath(), rate=1000, dur=totalTime).play()
@@ -682,8 +845,7 @@ class CeciliaSplitter:
         self.tables[which].replace(func)
 
     def updateWidget(self):
-        val = self.reader.get(all=True)
-        wx.CallAfter(self.widget.setValue, val)
+        self.feedback.update(self.reader.get(all=True))
 
 class CeciliaGraph:
     def __init__(self, dic):
@@ -691,10 +853,7 @@ class CeciliaGraph:
         self.isTable = dic["table"]
         self.size = dic["size"]
         totalTime = CeciliaLib.getVar("totalTime")
-        for line in CeciliaLib.getVar("grapher").plotter.getData():
-            if line.name == self.name:
-                break
-
+        line = CeciliaLib.getVar("grapher").plotter.getLineFromName(self.name)
         func = [(int(x / totalTime * (self.size - 1)), y) for x, y in line.getData()]
         curved = line.getCurved()
         if curved:
@@ -728,7 +887,9 @@ class BaseModule:
         self._polyphony = None
         self._openSndCtrlDict = {}
         self._openSndCtrlSliderDict = {}
-        self._OSCOutList = []
+        self._oscAddressTable = {}
+        self._oscPending = {}
+        self._oscOutTargets = []
 
         ###### Public attributes ######
         self.sr = CeciliaLib.getVar("sr")
@@ -782,8 +943,9 @@ class BaseModule:
                 name = togPop.name
                 setattr(self, name + "_value", togPop.getValue())
 
-        self._metro = Metro(.06).play(dur=self.totalTime)
-        self._updater = TrigFunc(self._metro, self._updateWidgets).play(dur=self.totalTime)
+        if not CeciliaLib.getVar("headless"):
+            self._metro = Metro(.06).play(dur=self.totalTime)
+            self._updater = TrigFunc(self._metro, self._updateWidgets).play(dur=self.totalTime)
 
     ###### Public methods ######
     def addFilein(self, name):
@@ -882,43 +1044,55 @@ class BaseModule:
             for key in list(self.oscReceivers.keys()):
                 del self.oscReceivers[key]
             del self.oscReceivers
+        self._oscPending = {}
+        self._oscOutTargets = []
 
     def _createOpenSndCtrlReceivers(self):
+        self._oscAddressTable = {}
+        self._oscPending = {}
+        self._oscOutTargets = []
         if self._openSndCtrlDict:
             self.oscReceivers = {}
             for key in self._openSndCtrlDict.keys():
-                self.oscReceivers[key] = OscReceive(key, self._openSndCtrlDict[key])
-                for slider in self._openSndCtrlSliderDict[key]:
+                for address, slider in zip(self._openSndCtrlDict[key], self._openSndCtrlSliderDict[key]):
+                    self._oscAddressTable[(key, address)] = slider
                     if isinstance(slider, tuple):
                         slider, side = slider[0], slider[1]
                         if slider.type == "sampler": # sampler slider
                             widget = slider.getWidget(side)
-                            path = widget.openSndCtrl[1]
-                            val = rescale(widget.getValue(), xmin=widget.getMinValue(), xmax=widget.getMaxValue(), xlog=widget.getLog())
-                            self.oscReceivers[key].setValue(path, val)
-                            if widget.OSCOut is not None:
-                                tmpout = OscDataSend("f", widget.OSCOut[1], widget.OSCOut[2], widget.OSCOut[0])
-                                tmpout.send([val])
-                                self._OSCOutList.append(tmpout)
+                            out = widget.OSCOut
+                            getValue = widget.getValue
                         else: # range slider
                             widget = slider.widget
-                            path = widget.openSndCtrl[side][1]
-                            val = rescale(widget.getValue()[side], xmin=widget.getMinValue(), xmax=widget.getMaxValue(), xlog=widget.getLog())
-                            self.oscReceivers[key].setValue(path, val)
+                            out = None
                             if widget.OSCOut is not None:
-                                if widget.OSCOut[side] != ():
-                                    tmpout = OscDataSend("f", widget.OSCOut[side][1], widget.OSCOut[side][2], widget.OSCOut[side][0])
-                                    tmpout.send([val])
-                                    self._OSCOutList.append(tmpout)
+                                out = widget.OSCOut[side]
+                            getValue = lambda widget=widget, side=side: widget.getValue()[side]
                     else: # slider
                         widget = slider.widget
-                        path = widget.openSndCtrl[1]
-                        val = rescale(widget.getValue(), xmin=widget.getMinValue(), xmax=widget.getMaxValue(), xlog=widget.getLog())
-                        self.oscReceivers[key].setValue(path, val)
-                        if widget.OSCOut is not None:
-                            tmpout = OscDataSend("f", widget.OSCOut[1], widget.OSCOut[2], widget.OSCOut[0])
-                            tmpout.send([val])
-                            self._OSCOutList.append(tmpout)
+                        out = widget.OSCOut
+                        getValue = widget.getValue
+                    if out:
+                        CeciliaLib.getVar("audioServer").oscSender.addDestination(out[0], out[1])
+                        self._oscOutTargets.append([out, getValue, widget, None])
+                self.oscReceivers[key] = OscDataReceive(key, self._openSndCtrlDict[key],
+                                                        lambda address, *args, port=key: self._oscReceived(port, address, args))
+            self._sendOscOutput(True)
+
+    def _oscReceived(self, port, address, args):
+        # Bundles are unpacked by the receiver, only the last value of an address is kept.
+        if args:
+            self._oscPending[(port, address)] = args[0]
+
+    def _sendOscOutput(self, force=False):
+        sender = CeciliaLib.getVar("audioServer").oscSender
+        for target in self._oscOutTargets:
+            out, getValue, widget, last = target
+            val = rescale(getValue(), xmin=widget.getMinValue(), xmax=widget.getMaxValue(), xlog=widget.getLog())
+            if force or val != last:
+                target[3] = val
+                sender.send(out[0], out[1], out[2], [val])
+        sender.flush(force)
 
     def _addOpenSndCtrlWidget(self, port, address, slider, side=0, name=""):
         if port in self._openSndCtrlDict:
@@ -943,7 +1117,7 @@ class BaseModule:
             sampler.checkForAutomation()
         for slider in self._sliders.values():
             if slider.rec:
-                slider.record.write()
+                saveAutomation(slider.record, slider.widget.getPath())
 
     def _updateWidgets(self):
         if self._samplers != {}:
@@ -952,25 +1126,27 @@ class BaseModule:
         for slider in self._sliders.values():
             if slider.play == 1 or slider.midi:
                 slider.updateWidget()
-        if self._openSndCtrlDict:
-            for key in self._openSndCtrlDict.keys():
-                values = self.oscReceivers[key].get(all=True)
-                for i in range(len(values)):
-                    slider = self._openSndCtrlSliderDict[key][i]
-                    if isinstance(slider, tuple):
-                        which = slider[1]
-                        slider[0].setValueFromOSC(values[i], which)
-                    else:
-                        slider.setValueFromOSC(values[i])
+        if self._oscPending:
+            pending, self._oscPending = self._oscPending, {}
+            for key, value in pending.items():
+                slider = self._oscAddressTable.get(key)
+                if isinstance(slider, tuple):
+                    slider[0].setValueFromOSC(value, slider[1])
+                elif slider is not None:
+                    slider.setValueFromOSC(value)
+        if self._oscOutTargets:
+            self._sendOscOutput()
         CeciliaLib.getVar("audioServer").updatePluginWidgets()
+        CeciliaLib.getVar("audioServer").updateMorphWidgets()
+        CeciliaLib.getVar("audioServer").flushWidgetValues()
 
     def _setWidgetValues(self):
         # graph lines
-        for line in CeciliaLib.getVar("grapher").plotter.getData():
-            name = line.getName()
-            if name in self._graphs.keys():
-                data = line.getData()
-                self._graphs[name].setValue(data)
+        plotter = CeciliaLib.getVar("grapher").plotter
+        for name in self._graphs:
+            line = plotter.getLineFromName(name)
+            if line is not None:
+                self._graphs[name].setValue(line.getData())
         # sliders
         for slider in CeciliaLib.getVar("userSliders"):
             name = slider.getName()
@@ -1001,7 +1177,6 @@ class BaseModule:
 
     def __del__(self):
         self.oscReceivers = {}
-        self._OSCOutList = []
         for key in list(self.__dict__.keys()):
             del self.__dict__[key]
         del self
@@ -1017,10 +1192,7 @@ class CeciliaPlugin:
             self._p3 = SigTo(0, time=0.025)
         else:
             self.widget_p1 = knobs[0]
-            name = self.widget_p1.getName()
-            for line in CeciliaLib.getVar("grapher").plotter.getData():
-                if line.name == name:
-                    break
+            line = CeciliaLib.getVar("grapher").plotter.getLineFromName(self.widget_p1.getName())
             self.play_p1 = self.widget_p1.getPlay()
             self.rec_p1 = self.widget_p1.getRec()
             self.midi_p1 = self.widget_p1.getWithMidi()
@@ -1036,6 +1208,7 @@ class CeciliaPlugin:
             maxi = self.widget_p1.getMaxValue()
             log = self.widget_p1.getLog()
             self._p1 = SigTo(params[0], time=gliss, init=params[0])
+            self.feedback_p1 = WidgetFeedback(self.widget_p1.setValue, mini, maxi)
             if self.rec_p1:
                 self.record_p1 = ControlRec(self._p1, filename=self.widget_p1.getPath(),
                                         rate=1000, dur=totalTime).play()
@@ -1045,19 +1218,10 @@ class CeciliaPlugin:
                 self.setGraph(0, data)
                 self.reader_p1 = TableRead(self.table_p1, freq=1.0 / totalTime).play()
             elif self.midi_p1:
-                if log:
-                    init = math.sqrt((init - mini) / (maxi - mini)) * (maxi - mini) + mini
-                    exp = 2
-                else:
-                    exp = 1
-                self.ctlin_p1 = Midictl(self.widget_p1.getMidiCtl(), mini, maxi, init, self.widget_p1.getMidiChannel())
-                self.reader_p1 = Scale(self.ctlin_p1, inmin=mini, inmax=maxi, outmin=mini, outmax=maxi, exp=exp)
+                self.reader_p1 = midiSig(self.widget_p1.getMidiCtl(), mini, maxi, init, self.widget_p1.getMidiChannel(), log, owner=self.widget_p1)
 
             self.widget_p2 = knobs[1]
-            name = self.widget_p2.getName()
-            for line in CeciliaLib.getVar("grapher").plotter.getData():
-                if line.name == name:
-                    break
+            line = CeciliaLib.getVar("grapher").plotter.getLineFromName(self.widget_p2.getName())
             self.play_p2 = self.widget_p2.getPlay()
             self.rec_p2 = self.widget_p2.getRec()
             self.midi_p2 = self.widget_p2.getWithMidi()
@@ -1072,6 +1236,7 @@ class CeciliaPlugin:
             maxi = self.widget_p2.getMaxValue()
             log = self.widget_p2.getLog()
             self._p2 = SigTo(params[1], time=gliss, init=params[1])
+            self.feedback_p2 = WidgetFeedback(self.widget_p2.setValue, mini, maxi)
             if self.rec_p2:
                 self.record_p2 = ControlRec(self._p2, filename=self.widget_p2.getPath(),
                                         rate=1000, dur=totalTime).play()
@@ -1081,19 +1246,10 @@ class CeciliaPlugin:
                 self.setGraph(1, data)
                 self.reader_p2 = TableRead(self.table_p2, freq=1.0 / totalTime).play()
             elif self.midi_p2:
-                if log:
-                    init = math.sqrt((init - mini) / (maxi - mini)) * (maxi - mini) + mini
-                    exp = 2
-                else:
-                    exp = 1
-                self.ctlin_p2 = Midictl(self.widget_p2.getMidiCtl(), mini, maxi, init, self.widget_p2.getMidiChannel())
-                self.reader_p2 = Scale(self.ctlin_p2, inmin=mini, inmax=maxi, outmin=mini, outmax=maxi, exp=exp)
+                self.reader_p2 = midiSig(self.widget_p2.getMidiCtl(), mini, maxi, init, self.widget_p2.getMidiChannel(), log, owner=self.widget_p2)
 
             self.widget_p3 = knobs[2]
-            name = self.widget_p3.getName()
-            for line in CeciliaLib.getVar("grapher").plotter.getData():
-                if line.name == name:
-                    break
+            line = CeciliaLib.getVar("grapher").plotter.getLineFromName(self.widget_p3.getName())
             self.play_p3 = self.widget_p3.getPlay()
             self.rec_p3 = self.widget_p3.getRec()
             self.midi_p3 = self.widget_p3.getWithMidi()
@@ -1108,6 +1264,7 @@ class CeciliaPlugin:
             maxi = self.widget_p3.getMaxValue()
             log = self.widget_p3.getLog()
             self._p3 = SigTo(params[2], time=gliss, init=params[2])
+            self.feedback_p3 = WidgetFeedback(self.widget_p3.setValue, mini, maxi)
             if self.rec_p3:
                 self.record_p3 = ControlRec(self._p3, filename=self.widget_p3.getPath(),
                                         rate=1000, dur=totalTime).play()
@@ -1117,13 +1274,7 @@ class CeciliaPlugin:
                 self.setGraph(2, data)
                 self.reader_p3 = TableRead(self.table_p3, freq=1.0 / totalTime).play()
             elif self.midi_p3:
-                if log:
-                    init = math.sqrt((init - mini) / (maxi - mini)) * (maxi - mini) + mini
-                    exp = 2
-                else:
-                    exp = 1
-                self.ctlin_p3 = Midictl(self.widget_p3.getMidiCtl(), mini, maxi, init, self.widget_p3.getMidiChannel())
-                self.reader_p3 = Scale(self.ctlin_p3, inmin=mini, inmax=maxi, outmin=mini, outmax=maxi, exp=exp)
+                self.reader_p3 = midiSig(self.widget_p3.getMidiCtl(), mini, maxi, init, self.widget_p3.getMidiChannel(), log, owner=self.widget_p3)
 
             self.preset = params[3]
 
@@ -1185,22 +1336,19 @@ class CeciliaPlugin:
 
     def checkForAutomation(self):
         if self.rec_p1:
-            self.record_p1.write()
+            saveAutomation(self.record_p1, self.widget_p1.getPath())
         if self.rec_p2:
-            self.record_p2.write()
+            saveAutomation(self.record_p2, self.widget_p2.getPath())
         if self.rec_p3:
-            self.record_p3.write()
+            saveAutomation(self.record_p3, self.widget_p3.getPath())
 
     def updateWidget(self):
         if self.play_p1 or self.midi_p1:
-            val = self.reader_p1.get()
-            wx.CallAfter(self.widget_p1.setValue, val)
+            self.feedback_p1.update(self.reader_p1.get())
         if self.play_p2 or self.midi_p2:
-            val = self.reader_p2.get()
-            wx.CallAfter(self.widget_p2.setValue, val)
+            self.feedback_p2.update(self.reader_p2.get())
         if self.play_p3 or self.midi_p3:
-            val = self.reader_p3.get()
-            wx.CallAfter(self.widget_p3.setValue, val)
+            self.feedback_p3.update(self.reader_p3.get())
 
 class CeciliaNonePlugin(CeciliaPlugin):
     def __init__(self, input):
@@ -1473,6 +1621,132 @@ class CeciliaChaosModPlugin(CeciliaPlugin):
                 self.lfo.value = self.lforo.play()
             self.out.interp = 1
 
+class CeciliaMorph:
+    """
+    Interpolates the slider values and plugin knobs of the presets chosen
+    in the preset panel, from the position of the morph sliders.
+
+    All values are kept in one array per preset (in log space for log
+    sliders), so the interpolation is a single dot product per control period.
+    """
+    def __init__(self, baseModule, pluginObjs):
+        self.baseModule = baseModule
+        self.pluginObjs = pluginObjs
+        self.sources = [baseModule._sliders[name].sig() for name in PRESET_MORPH_NAMES if name in baseModule._sliders]
+        self.values = self.shownValues = []
+        self.setTargets()
+        self._metro = Metro(PRESET_MORPH_PERIOD).play()
+        self._trig = TrigFunc(self._metro, self.process)
+
+    def getPresetData(self, name):
+        if name == "init":
+            return CeciliaLib.getVar("initPreset")
+        return CeciliaLib.getVar("presets").get(name)
+
+    def setTargets(self):
+        "Builds the value table of the chosen presets, current values replace missing ones."
+        presets = [self.getPresetData(name) for name in CeciliaLib.getVar("morphPresets")]
+        presets = (presets + [None] * 4)[:2 ** len(self.sources)]
+        columns = []
+        targets = []
+        widgets = []
+        logs = []
+
+        for name, slider in self.baseModule._sliders.items():
+            if name in PRESET_MORPH_NAMES or slider.play != 0 or slider.midi:
+                continue
+            widget = slider.widget
+            current = widget.getValue()
+            values = []
+            for preset in presets:
+                try:
+                    values.append(preset['userSliders'][name][0])
+                except:
+                    values.append(current)
+            count = 1
+            if isinstance(current, list):
+                count = len(current)
+                values = [v if isinstance(v, list) and len(v) == count else current for v in values]
+                columns.extend(zip(*values))
+            else:
+                columns.append(values)
+            targets.append((slider.setValue, len(logs), count))
+            widgets.append((widget.setValue, len(logs), count))
+            logs.extend([widget.getLog()] * count)
+
+        for i in range(NUM_OF_PLUGINS):
+            plugin = self.pluginObjs[i]
+            if plugin is None or plugin.name == "None":
+                continue
+            for which in range(3):
+                if getattr(plugin, "play_p%d" % (which + 1)) != 0 or getattr(plugin, "midi_p%d" % (which + 1)):
+                    continue
+                knob = getattr(plugin, "widget_p%d" % (which + 1))
+                current = knob.getValue()
+                values = []
+                for preset in presets:
+                    try:
+                        params = preset['plugins'][i]
+                        if params[0] == plugin.name:
+                            values.append(params[1][which])
+                        else:
+                            values.append(current)
+                    except:
+                        values.append(current)
+                columns.append(values)
+                targets.append((lambda x, plugin=plugin, which=which: plugin.setValue(which, x), len(logs), 1))
+                widgets.append((knob.setValue, len(logs), 1))
+                logs.append(knob.getLog())
+
+        logs = _Numeric.array(logs, dtype=bool)
+        if columns:
+            table = _Numeric.array(columns, dtype=_Numeric.float64).T
+            table[:, logs] = _Numeric.log10(table[:, logs])
+        else:
+            table = _Numeric.zeros((len(presets), 0))
+        # swapped in one assignment, process runs in the audio thread
+        self.morphData = (table, logs, targets, widgets)
+        self.lastPos = None
+
+    def process(self):
+        pos = [source.get() for source in self.sources]
+        if len(pos) == 0 or pos == self.lastPos:
+            return
+        self.lastPos = pos
+        x = min(max(pos[0], 0.0), 1.0)
+        if len(pos) == 1:
+            weights = _Numeric.array([1.0 - x, x])
+        else:
+            y = min(max(pos[1], 0.0), 1.0)
+            weights = _Numeric.array([(1.0 - x) * (1.0 - y), x * (1.0 - y), (1.0 - x) * y, x * y])
+        table, logs, targets, widgets = self.morphData
+        values = _Numeric.dot(weights, table)
+        values[logs] = _Numeric.power(10.0, values[logs])
+        self.values = values = values.tolist()
+        for setValue, start, count in targets:
+            if count == 1:
+                setValue(values[start])
+            else:
+                setValue(values[start:start + count])
+
+    def postWidgetValues(self):
+        "Called in the audio thread, posts the interpolated values to the GUI only when they changed."
+        values = self.values
+        if values is not self.shownValues:
+            self.shownValues = values
+            wx.CallAfter(self.updateWidgets, values)
+
+    def updateWidgets(self, values):
+        "Called on the GUI thread, shows the interpolated values."
+        table, logs, targets, widgets = self.morphData
+        if len(values) != len(logs):
+            return
+        for setValue, start, count in widgets:
+            if count == 1:
+                setValue(values[start])
+            else:
+                setValue(values[start:start + count])
+
 class AudioServer():
     def __init__(self):
         self.amp = 1.0
@@ -1489,10 +1763,20 @@ class AudioServer():
             self.server.setJackAuto(True, True)
         self.setTimeCallable()
         self.timeOpened = True
+        self.bootConfig = None
+        self.soundInfoCache = None
+        self.soundInfoLock = threading.Lock()
+        self.peakBuilds = set()
+        self.peakArrays = {}
         self.recording = False
         self.withTimer = False
         self.withSpectrum = False
         self.pluginObjs = [None] * NUM_OF_PLUGINS
+        self.morph = None
+        self.widgetQueue = []
+        self.midiDispatcher = MidiDispatcher()
+        self.midiLearnSlider = None
+        self.oscSender = OscBundleSender(CeciliaLib.getVar("oscOutRate"))
         self.out = self.spectrum = None
         self.pluginDict = {"Reverb": CeciliaReverbPlugin, "WGVerb": CeciliaWGReverbPlugin, "Filter": CeciliaFilterPlugin, "Para EQ": CeciliaEQPlugin,
                            "Chorus": CeciliaChorusPlugin, "3 Bands EQ": CeciliaEQ3BPlugin, "Compress": CeciliaCompressPlugin, "Gate": CeciliaGatePlugin,
@@ -1518,6 +1802,23 @@ class AudioServer():
         firstout = CeciliaLib.getVar("defaultFirstOutput")
         return sr, bufsize, nchnls, duplex, host, outdev, indev, firstin, firstout
 
+    def getBootConfig(self):
+        return (self.getPrefs(), CeciliaLib.getVar("toDac"), CeciliaLib.getVar("useMidi"),
+                CeciliaLib.getVar("midiDeviceIn"), CeciliaLib.getVar("jack").get("client", "cecilia5"))
+
+    def prepare(self):
+        """
+        Gets the server ready for a new performance. In warm server mode, a
+        booted real-time server is kept as is if its configuration has not
+        changed, only the DSP graph will be rebuilt by `loadModule`.
+        """
+        if CeciliaLib.getVar("warmServer") and CeciliaLib.getVar("toDac") and serverBooted():
+            if self.bootConfig == self.getBootConfig():
+                return
+        self.shutdown()
+        self.reinit()
+        self.boot()
+
     def dump(self, l):
         pass
 
@@ -1525,6 +1826,7 @@ class AudioServer():
         if CeciliaLib.getVar("DEBUG"):
             print("Audio server start: begin")
         self.timeOpened = True
+        self.oscSender.rate = CeciliaLib.getVar("oscOutRate")
         fade = CeciliaLib.getVar("globalFade")
         self.globalamp = Fader(fadein=fade, fadeout=fade, dur=CeciliaLib.getVar("totalTime")).play()
         self.out.mul = self.globalamp
@@ -1532,9 +1834,7 @@ class AudioServer():
             if CeciliaLib.getVar("DEBUG"):
                 print("Audio server start: use midi")
                 print("midi input device: %d" % CeciliaLib.getVar("midiDeviceIn"))
-            self.checkCtl7 = Midictl(ctlnumber=7, minscale=-48, maxscale=18, init=0)
-            self.onNewCtl7Value = Change(self.checkCtl7)
-            self.ctl7TrigFunc = TrigFunc(self.onNewCtl7Value, self.newCtl7Value)
+            self.midiDispatcher.addTarget(7, 0, MidiTarget(None, -48, 18, function=self.newCtl7Value))
         if rec:
             self.recording = True
             fileformat = AUDIO_FILE_FORMATS[CeciliaLib.getVar("audioFileType")]
@@ -1554,7 +1854,8 @@ class AudioServer():
             self.server.start()
         else:
             self.server.start()
-            CeciliaLib.resetControls()
+            if not CeciliaLib.getVar("headless"):
+                CeciliaLib.resetControls()
         if CeciliaLib.getVar("DEBUG"):
             print("Audio server start: end\n")
 
@@ -1572,6 +1873,7 @@ class AudioServer():
             self.spectrum.poll(False)
             self.spectrum.stop()
         self.timeOpened = False
+        self.morph = None
         if CeciliaLib.getVar("grapher") is not None:
             CeciliaLib.getVar("grapher").cursorPanel.setTime(CeciliaLib.getVar("startOffset"))
         time.sleep(.15)
@@ -1581,9 +1883,11 @@ class AudioServer():
             print("Audio server stop: end\n")
 
     def shutdown(self):
+        self.bootConfig = None
         self.server.shutdown()
 
     def boot(self):
+        CeciliaLib.waitDeviceQuery()
         sr, bufsize, nchnls, duplex, host, outdev, indev, firstin, firstout = self.getPrefs()
         if CeciliaLib.getVar("DEBUG"):
             print("AUDIO CONFIG:")
@@ -1602,6 +1906,9 @@ class AudioServer():
         if CeciliaLib.getVar("useMidi"):
             self.server.setMidiInputDevice(CeciliaLib.getVar("midiDeviceIn"))
         self.server.boot()
+        if CeciliaLib.getVar("useMidi"):
+            self.midiDispatcher.play()
+        self.bootConfig = self.getBootConfig()
 
     def reinit(self):
         jackname = CeciliaLib.getVar("jack").get("client", "cecilia5")
@@ -1609,7 +1916,10 @@ class AudioServer():
             sr, bufsize, nchnls, duplex, host, outdev, indev, firstin, firstout = self.getPrefs()
             self.server.reinit(audio=host, jackname=jackname)
         else:
-            self.server.reinit(audio="offline_nb", jackname=jackname)
+            if CeciliaLib.getVar("headless"):
+                self.server.reinit(audio="offline", jackname=jackname)
+            else:
+                self.server.reinit(audio="offline_nb", jackname=jackname)
             dur = CeciliaLib.getVar("totalTime")
             filename = CeciliaLib.getVar("outputFile")
             fileformat = AUDIO_FILE_FORMATS[CeciliaLib.getVar("audioFileType")]
@@ -1623,7 +1933,18 @@ class AudioServer():
         self.server._server.setTimeCallable(self)
 
     def setTime(self, *args):
+        "Time callback of the server, the GUI is updated by showTime."
+        if CeciliaLib.getVar("headless"):
+            return
         if len(args) >= 4 and self.timeOpened:
+            CeciliaLib.postGuiUpdate("time", args)
+        else:
+            CeciliaLib.postGuiUpdate("time", None)
+
+    def showTime(self, args):
+        if CeciliaLib.getVar("interface") is None or CeciliaLib.getVar("grapher") is None:
+            return
+        if args is not None and self.timeOpened:
             time = args[1] * 60 + args[2] + args[3] * 0.001
             CeciliaLib.getVar("grapher").cursorPanel.setTime(time)
             CeciliaLib.getVar("interface").controlPanel.setTime(time, args[1], args[2], args[3] // 10)
@@ -1641,9 +1962,8 @@ class AudioServer():
     def recstop(self):
         self.server.recstop()
 
-    def newCtl7Value(self):
-        val = self.checkCtl7.get()
-        CeciliaLib.getControlPanel().gainSlider.SetValue(val)
+    def newCtl7Value(self, val):
+        wx.CallAfter(CeciliaLib.getControlPanel().gainSlider.SetValue, val)
 
     def setAmp(self, x):
         self.amp = math.pow(10.0, x * 0.05)
@@ -1684,9 +2004,9 @@ class AudioServer():
     def compileRuntimeError(self, filepath, title, msg):
         error = traceback.format_exc()
         #print("============== Error:\n", error, "=====================\n")
-        if "exec(f.read(), globals())" in error:
-            pos = error.find("exec(f.read(), globals())")
-            error = error[pos:].replace("exec(f.read(), globals())", "")
+        if "exec(self.compileCecFile(filepath), globals())" in error:
+            pos = error.find("exec(self.compileCecFile(filepath), globals())")
+            error = error[pos:].replace("exec(self.compileCecFile(filepath), globals())", "")
 
         linenum = -1
         if "line " in error:
@@ -1718,6 +2038,38 @@ class AudioServer():
         msg = msg + tracelines + codeline
         CeciliaLib.showErrorDialog(title, msg)
 
+    def compileCecFile(self, filepath):
+        """
+        Returns the code object of a module file. Code objects are cached
+        with marshal (like .pyc files) in MODULE_CACHE_PATH, one file per
+        module path. The cached file size, modification time and Python
+        version are stored with the code and checked before it is used.
+        """
+        stat = os.stat(filepath)
+        header = (stat.st_size, stat.st_mtime, sys.version)
+        name = hashlib.sha1(os.path.abspath(filepath).encode("utf-8")).hexdigest()
+        cachefile = os.path.join(MODULE_CACHE_PATH, name)
+        if os.path.isfile(cachefile):
+            try:
+                with open(cachefile, "rb") as f:
+                    size, mtime, version, code = marshal.load(f)
+                if (size, mtime, version) == header:
+                    return code
+            except:
+                pass
+        with open(filepath, "r") as f:
+            code = compile(f.read(), "<string>", "exec")
+        try:
+            if not os.path.isdir(MODULE_CACHE_PATH):
+                os.mkdir(MODULE_CACHE_PATH)
+            tmp = "%s.%d.tmp" % (cachefile, os.getpid())
+            with open(tmp, "wb") as f:
+                marshal.dump(header + (code,), f)
+            os.replace(tmp, cachefile)
+        except:
+            pass
+        return code
+
     def openCecFile(self, filepath):
         CeciliaLib.setVar("currentModule", None)
         CeciliaLib.setVar("currentModuleRef", None)
@@ -1733,13 +2085,16 @@ class AudioServer():
             del CECILIA_PRESETS
         except:
             pass
-        if not serverBooted():
+        # A headless render boots the server later, once its output settings are known.
+        if not serverBooted() and not CeciliaLib.getVar("headless"):
             self.boot()
         try:
-            with open(filepath, "r") as f:
-                exec(f.read(), globals())
+            exec(self.compileCecFile(filepath), globals())
         except Exception as e:
             # If it fails, show the error and reload the current module.
+            if CeciliaLib.getVar("headless"):
+                self.compileRuntimeError(filepath, "Syntax Error!", "Cecilia can't compile the chosen module.\n\n")
+                return False
             msg = "Cecilia can't compile the chosen module, Current module (or a random one if this failed too) will be reloaded.\n\n"
             self.compileRuntimeError(filepath, "Syntax Error!", msg)
             if os.path.isfile(MODULE_COMPILE_BACKUP_PATH):
@@ -1751,16 +2106,32 @@ class AudioServer():
 
         CeciliaLib.setVar("currentModuleRef", copy.deepcopy(Module))
         CeciliaLib.setVar("interfaceWidgets", copy.deepcopy(Interface))
-
-        try:
-            CeciliaLib.setVar("presets", copy.deepcopy(CECILIA_PRESETS))
-        except:
-            CeciliaLib.setVar("presets", {})
-        CeciliaLib.getVar("mainFrame").onUpdateInterface(None)
+        CeciliaLib.setVar("morphPresets", [])
+        if CeciliaLib.getVar("presetMorph"):
+            labels = ["Preset Morph", "Preset Morph Y"]
+            for i in range(min(CeciliaLib.getVar("presetMorph"), 2)):
+                CeciliaLib.getVar("interfaceWidgets").append(cslider(name=PRESET_MORPH_NAMES[i], label=labels[i], min=0,
+                                                                     max=1, init=0, unit="",
+                                                                     help="Position between the morph presets."))
+
+        store = PresetStore(filepath)
+        if store.exists():
+            CeciliaLib.setVar("presets", store.load())
+            CeciliaLib.setVar("presetStore", store)
+        else:
+            CeciliaLib.setVar("presetStore", None)
+            try:
+                CeciliaLib.setVar("presets", copy.deepcopy(CECILIA_PRESETS))
+            except:
+                CeciliaLib.setVar("presets", {})
+        if not CeciliaLib.getVar("headless"):
+            CeciliaLib.getVar("mainFrame").onUpdateInterface(None)
 
         return True
 
     def loadModule(self, module):
+        self.morph = None
+        self.midiDispatcher.clear()
         for i in range(NUM_OF_PLUGINS):
             if self.pluginObjs[i] is not None:
                del self.pluginObjs[i].out
@@ -1788,12 +2159,6 @@ class AudioServer():
                 del self.recamp
             except:
                 pass
-            try:
-                del self.checkCtl7
-                del self.onNewCtl7Value
-                del self.ctl7TrigFunc
-            except:
-                pass
         try:
             CeciliaLib.getVar("currentModule").__del__()
             CeciliaLib.setVar("currentModule", None)
@@ -1804,6 +2169,9 @@ class AudioServer():
             currentModule = module()
         except Exception as e:
             # If it fails, show the error and reload the current module.
+            if CeciliaLib.getVar("headless"):
+                self.compileRuntimeError(CeciliaLib.getVar("currentCeciliaFile"), "Runtime Error!", "Cecilia can't run the current module.\n\n")
+                return False
             msg = "Cecilia can't run the current module, last valid module (or a random one if this failed too) will be reloaded.\n\n"
             self.compileRuntimeError(CeciliaLib.getVar("currentCeciliaFile"), "Runtime Error!", msg)
             if os.path.isfile(MODULE_RUNTIME_BACKUP_PATH):
@@ -1837,6 +2205,9 @@ class AudioServer():
         CeciliaLib.setVar("currentModule", currentModule)
         currentModule._setWidgetValues()
 
+        if PRESET_MORPH_NAMES[0] in currentModule._sliders:
+            self.morph = CeciliaMorph(currentModule, self.pluginObjs)
+
         CeciliaLib.saveRuntimeBackupFile(CeciliaLib.getVar("currentCeciliaFile"))
 
         return True
@@ -1876,6 +2247,33 @@ class AudioServer():
         else:
             self.pluginObjs[order].out.out()
         del tmp
+        self.updateMorph()
+
+    def queueWidgetValue(self, setter, value):
+        self.widgetQueue.append((setter, value))
+
+    def flushWidgetValues(self):
+        "Sends the values queued during a widget update in a single GUI call."
+        if self.widgetQueue:
+            queue, self.widgetQueue = self.widgetQueue, []
+            wx.CallAfter(self.setWidgetValues, queue)
+
+    def setWidgetValues(self, queue):
+        for setter, value in queue:
+            try:
+                setter(value)
+            except Exception:
+                # the widget may have been destroyed with its interface
+                if CeciliaLib.getVar("DEBUG"):
+                    traceback.print_exc()
+
+    def updateMorph(self):
+        if self.morph is not None:
+            self.morph.setTargets()
+
+    def updateMorphWidgets(self):
+        if self.morph is not None:
+            self.morph.postWidgetValues()
 
     def checkForAutomation(self):
         plugins = CeciliaLib.getVar("plugins")
@@ -1910,33 +2308,55 @@ class AudioServer():
                 self.pluginObjs[order].setGraph(which, func)
 
     def getMidiCtlNumber(self, number, midichnl=1):
+        if self.midiLearnSlider is None:
+            return
         if not self.midiLearnRange:
             self.midiLearnSlider.setMidiChannel(midichnl)
             self.midiLearnSlider.setMidiCtl(number)
-            if CeciliaLib.getVar("systemPlatform") == "darwin":
-                self.tmpScanCallback = CallAfter(self.stop, .25)
-            else:
-                wx.CallLater(250, self.stop)
+            self.midiDispatcher.rebind(self.midiLearnSlider, number, midichnl)
+            self.endMidiLearn()
         else:
             tmp = [number, midichnl]
             if tmp not in self.midiLearnCtlsAndChnls:
                 self.midiLearnCtlsAndChnls.append(tmp)
                 if len(self.midiLearnCtlsAndChnls) == 2:
-                    self.midiLearnSlider.setMidiChannel([self.midiLearnCtlsAndChnls[0][1], self.midiLearnCtlsAndChnls[1][1]])
-                    self.midiLearnSlider.setMidiCtl([self.midiLearnCtlsAndChnls[0][0], self.midiLearnCtlsAndChnls[1][0]])
-                    if CeciliaLib.getVar("systemPlatform") == "darwin":
-                        self.tmpScanCallback = CallAfter(self.stop, .25)
-                    else:
-                        wx.CallLater(250, self.stop)
+                    channels = [self.midiLearnCtlsAndChnls[0][1], self.midiLearnCtlsAndChnls[1][1]]
+                    ctls = [self.midiLearnCtlsAndChnls[0][0], self.midiLearnCtlsAndChnls[1][0]]
+                    self.midiLearnSlider.setMidiChannel(channels)
+                    self.midiLearnSlider.setMidiCtl(ctls)
+                    self.midiDispatcher.rebind(self.midiLearnSlider, ctls, channels)
+                    self.endMidiLearn()
 
     def midiLearn(self, slider, rangeSlider=False):
+        """
+        Binds the next controller(s) moved to `slider`. If the server is
+        playing, MIDI learn doesn't interrupt the performance and the
+        controllers already bound to the widget are moved right away.
+        """
         self.midiLearnSlider = slider
         self.midiLearnRange = rangeSlider
         self.midiLearnCtlsAndChnls = []
-        self.shutdown()
-        self.boot()
-        self.scan = CtlScan2(self.getMidiCtlNumber, False)
-        self.server.start()
+        self.midiLearnStop = not self.isAudioServerRunning()
+        if self.midiLearnStop:
+            if not serverBooted():
+                self.boot()
+            # a warm server still holds the last performance, keep it silent
+            self.server.amp = 0
+            self.server.start()
+        self.midiDispatcher.setLearn(lambda ctl, chnl: wx.CallAfter(self.getMidiCtlNumber, ctl, chnl))
+
+    def endMidiLearn(self):
+        self.midiDispatcher.setLearn(None)
+        self.midiLearnSlider = None
+        if self.midiLearnStop:
+            wx.CallLater(250, self.stopMidiLearnServer)
+
+    def stopMidiLearnServer(self):
+        self.stop()
+        self.server.amp = self.amp
+
+    def removeMidiBinding(self, widget):
+        self.midiDispatcher.unbind(widget)
 
     def getAvailableAudioMidiDrivers(self):
         inputDriverList, inputDriverIndexes = pa_get_input_devices()
@@ -1960,6 +2380,23 @@ class AudioServer():
         return inputDriverList, inputDriverIndexes, defaultInputDriver, outputDriverList, outputDriverIndexes, \
                 defaultOutputDriver, midiDriverList, midiDriverIndexes, defaultMidiDriver
 
+    def getHostDefaultDevices(self):
+        if sys.platform.startswith("win"):
+            def_in, def_out = pa_get_default_devices_from_host("directsound")
+        elif sys.platform.startswith("darwin"):
+            def_in, def_out = pa_get_default_devices_from_host("core")
+        else:
+            def_in, def_out = pa_get_default_devices_from_host("alsa")
+        return max(def_in, 0), max(def_out, 0)
+
+    def getDeviceFingerprint(self):
+        """
+        Identifies the audio setup the device list was enumerated with. A
+        cached device list is only used if its fingerprint is the same.
+        """
+        return repr((sys.platform, CeciliaLib.getVar("audioHostAPI"), getVersion(), pa_count_host_apis(),
+                     pa_get_default_host_api(), pa_get_devices_infos(), pm_count_devices()))
+
     def validateAudioFile(self, path):
         if sndinfo(path) is not None:
             return True
@@ -2004,23 +2441,185 @@ class AudioServer():
             print('Unable to get sound infos. "%s" bypassed!' % path)
             return None
 
-    def getSoundsFromList(self, pathList):
+    def loadSoundInfoCache(self):
+        with self.soundInfoLock:
+            if self.soundInfoCache is None:
+                self.soundInfoCache = {}
+                if os.path.isfile(SOUND_INFO_CACHE_PATH):
+                    try:
+                        with open(SOUND_INFO_CACHE_PATH, "rb") as f:
+                            self.soundInfoCache = marshal.load(f)
+                    except:
+                        pass
+            return self.soundInfoCache
+
+    def saveSoundInfoCache(self):
+        with self.soundInfoLock:
+            try:
+                with open(SOUND_INFO_CACHE_PATH + ".tmp", "wb") as f:
+                    marshal.dump(self.soundInfoCache or {}, f)
+                os.replace(SOUND_INFO_CACHE_PATH + ".tmp", SOUND_INFO_CACHE_PATH)
+            except:
+                pass
+
+    def getCachedSoundInfo(self, path, scan=True):
+        """
+        Returns (found, infos) for a sound file. Infos are kept in a persistent
+        cache keyed on the file path, size and modification time, non-sound
+        files are cached as None. If `scan` is False, files not in the cache
+        are not read and (False, None) is returned.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True, None
+        cache = self.loadSoundInfoCache()
+        entry = cache.get(path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            return True, entry[2]
+        if not scan:
+            return False, None
+        infos = self.getSoundInfo(path)
+        if infos is not None:
+            infos = {'samprate': infos[1], 'chnls': infos[0], 'dur': infos[2],
+                     'bitrate': infos[5], 'type': infos[6], 'path': path}
+        with self.soundInfoLock:
+            cache[path] = [stat.st_size, stat.st_mtime, infos]
+        return True, infos
+
+    def getSoundsFromList(self, pathList, pending=None, save=True):
+        """
+        Returns a dict of sound infos keyed on file names. If a `pending` list
+        is given, files missing from the cache are appended to it instead
+        of being read. If `save` is False, newly read infos are not written
+        to the cache file.
+        """
         soundDict = dict()
+        scanned = False
         for path in pathList:
             if os.path.isfile(path):
-                infos = self.getSoundInfo(path)
+                found, infos = self.getCachedSoundInfo(path, False)
+                if not found:
+                    if pending is not None:
+                        pending.append(path)
+                        continue
+                    found, infos = self.getCachedSoundInfo(path)
+                    scanned = True
                 if infos is not None:
                     sndfile = os.path.split(path)[1]
                     if sndfile not in soundDict.keys():
-                        soundDict[CeciliaLib.ensureNFD(sndfile)] = {'samprate': infos[1],
-                                        'chnls': infos[0],
-                                        'dur': infos[2],
-                                        'bitrate': infos[5],
-                                        'type': infos[6],
-                                        'path': path}
+                        soundDict[CeciliaLib.ensureNFD(sndfile)] = dict(infos)
             else:
                 if CeciliaLib.getVar("DEBUG"):
                     print('not a file')
         if CeciliaLib.getVar("DEBUG"):
             print()
-        return soundDict
\ No newline at end of file
+        if scanned and save:
+            self.saveSoundInfoCache()
+        return soundDict
+
+    def scanSounds(self, pathList, callback, chunk=64):
+        """
+        Reads the sound infos of `pathList` in a background thread. `callback`
+        is called from that thread with a dict of sound infos and the stop
+        Event every `chunk` files. Returns the Event, the scan stops when
+        it is set. The cache file is written once, when the scan ends.
+        """
+        stop = threading.Event()
+        def scan():
+            try:
+                for i in range(0, len(pathList), chunk):
+                    if stop.is_set():
+                        break
+                    sounds = self.getSoundsFromList(pathList[i:i+chunk], save=False)
+                    if sounds and not stop.is_set():
+                        callback(sounds, stop)
+            finally:
+                self.saveSoundInfoCache()
+        thread = threading.Thread(target=scan)
+        thread.daemon = True
+        thread.start()
+        return stop
+
+    def getPeakFiles(self, path):
+        stat = os.stat(path)
+        key = "%s:%d:%f" % (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return [os.path.join(PEAK_CACHE_PATH, "%s_%d.npy" % (name, level)) for level in range(PEAK_LEVELS)]
+
+    def buildPeaks(self, path, callback=None):
+        """
+        Builds the waveform peak files of a sound in a child process, if
+        they don't exist yet. A background thread waits for the process,
+        `callback` is called from that thread when the files are ready.
+        """
+        try:
+            files = self.getPeakFiles(path)
+        except OSError:
+            return
+        if os.path.isfile(files[-1]) or path in self.peakBuilds:
+            return
+        self.peakBuilds.add(path)
+        def build():
+            # Forking a process running a wx application is not safe.
+            context = multiprocessing.get_context("spawn")
+            process = context.Process(target=PeakFiles.writePeakFiles, args=(path, files))
+            process.daemon = True
+            try:
+                process.start()
+                process.join()
+            except:
+                pass
+            if process.exitcode != 0:
+                print('Unable to build the waveform overview of "%s".' % path)
+            else:
+                CeciliaLib.pruneCacheFolder(PEAK_CACHE_PATH, PEAK_CACHE_MAX_SIZE, lambda name: name.split("_")[0])
+            self.peakBuilds.discard(path)
+            if callback is not None:
+                callback()
+        thread = threading.Thread(target=build)
+        thread.daemon = True
+        thread.start()
+
+    def openPeakFiles(self, files):
+        "Returns the memory-mapped levels of a sound's peak files, kept open for the next calls."
+        if files[-1] in self.peakArrays:
+            return self.peakArrays[files[-1]]
+        if not os.path.isfile(files[-1]):
+            return None
+        try:
+            levels = [_Numeric.load(file, mmap_mode="r") for file in files]
+        except:
+            return None
+        # marks the sound as recently used for the cache pruning
+        os.utime(files[-1], None)
+        if len(self.peakArrays) >= PEAK_OPEN_SOUNDS:
+            del self.peakArrays[list(self.peakArrays.keys())[0]]
+        self.peakArrays[files[-1]] = levels
+        return levels
+
+    def getPeaks(self, path, start, end, width):
+        """
+        Returns a (columns, channels, 2) array of min/max values between `start`
+        and `end` (fractions of the sound duration), with at most `width`
+        columns, or None if the peak files are not built yet. Reads the
+        coarsest level that still has a block per column, memory-mapped.
+        """
+        try:
+            files = self.getPeakFiles(path)
+        except OSError:
+            return None
+        levels = self.openPeakFiles(files)
+        if levels is None:
+            return None
+        for peaks in reversed(levels):
+            if (end - start) * len(peaks) >= width:
+                break
+        first = max(0, int(start * len(peaks)))
+        last = min(len(peaks), max(first + 1, int(math.ceil(end * len(peaks)))))
+        peaks = peaks[first:last]
+        if len(peaks) <= width:
+            return _Numeric.array(peaks)
+        edges = _Numeric.linspace(0, len(peaks), width + 1).astype(int)[:-1]
+        return _Numeric.stack((_Numeric.minimum.reduceat(peaks[..., 0], edges, axis=0),
+                               _Numeric.maximum.reduceat(peaks[..., 1], edges, axis=0)), -1)
\ No newline at end of file
@@ -18,7 +18,7 @@ You should have received a copy of the GNU General Public License
 along with Cecilia 5.  If not, see <http://www.gnu.org/licenses/>.
 """
 import os, sys
-from .images import *
+from .ImageCatalog import ImageCatalog
 
 BUILD_RST = False
 
@@ -26,6 +26,7 @@ APP_NAME = 'Cecilia5'
 APP_VERSION = '5.3.5'
 APP_COPYRIGHT = 'iACT,  2017'
 FILE_EXTENSION = "c5"
+PRESET_STORE_EXTENSION = "presets"
 PRESETS_DELIMITER = "####################################\n" \
                     "##### Cecilia reserved section #####\n" \
                     "#### Presets saved from the app ####\n" \
@@ -50,11 +51,28 @@ if not os.path.isdir(RESOURCES_PATH) and sys.platform == "win32":
 TMP_PATH = os.path.join(os.path.expanduser('~'), '.cecilia5')
 PREFERENCES_FILE = os.path.join(TMP_PATH, 'ceciliaPrefs.txt')
 DOC_PATH = os.path.join(TMP_PATH, 'doc')
+DOC_INDEX_FILE = os.path.join(TMP_PATH, 'doc_index')
 MODULES_PATH = os.path.join(RESOURCES_PATH, 'modules')
 AUTOMATION_SAVE_PATH = os.path.join(TMP_PATH, 'automation_save')
+RENDER_CACHE_PATH = os.path.join(TMP_PATH, 'render_cache')
+MODULE_CACHE_PATH = os.path.join(TMP_PATH, 'module_cache')
+MODULE_CATALOG_FILE = os.path.join(TMP_PATH, 'module_catalog')
+SOUND_INFO_CACHE_PATH = os.path.join(TMP_PATH, 'soundinfo_cache')
+PEAK_CACHE_PATH = os.path.join(TMP_PATH, 'peak_cache')
+DEVICE_CACHE_FILE = os.path.join(TMP_PATH, 'devices_cache')
 SPLASH_FILE_PATH = os.path.join(RESOURCES_PATH, "Cecilia_splash.png")
 MODULE_COMPILE_BACKUP_PATH = os.path.join(TMP_PATH, 'moduleCompileBackup.c5')
 MODULE_RUNTIME_BACKUP_PATH = os.path.join(TMP_PATH, 'moduleRuntimeBackup.c5')
+IMAGE_PACK_PATH = os.path.join(TMP_PATH, 'images.pack')
+
+# Size limits (in bytes) of the caches, the least recently used files are removed first
+RENDER_CACHE_MAX_SIZE = 1024 * 1048576
+PEAK_CACHE_MAX_SIZE = 256 * 1048576
+
+# Images are read from the pack file and decoded on first use
+IMAGE_CACHE_SIZE = 64
+catalog = ImageCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images.py'),
+                       IMAGE_PACK_PATH, IMAGE_CACHE_SIZE)
 
 # Meter icons
 ICON_VUMETER = catalog['vu-metre2.png']
@@ -170,11 +188,63 @@ PLUGINS_CHOICE = ['None', 'Reverb', 'WGVerb', 'Filter', 'Chorus', 'Para EQ', '3
                   'Disto', 'AmpMod', 'Phaser', 'Delay', 'Flange', 'Harmonizer', 'Resonators', 'DeadReson', 'ChaosMod']
 NUM_OF_PLUGINS = 4
 
+# Knob definitions (name template, min, max, log) of the post-processing plugins.
+PLUGIN_KNOBS = {'Reverb': [('plugin_%d_reverb_mix', 0, 1, False), ('plugin_%d_reverb_time', 0.01, 10, False),
+                           ('plugin_%d_reverb_damp', 0, 1, False)],
+                'WGVerb': [('plugin_%d_wgreverb_mix', 0, 1, False), ('plugin_%d_wgreverb_feed', 0., 1, False),
+                           ('plugin_%d_wgreverb_lp', 100, 15000, True)],
+                'Filter': [('plugin_%d_filter_level', 0, 2, False), ('plugin_%d_filter_freq', 20, 18000, True),
+                           ('plugin_%d_filter_q', 0.5, 10, False)],
+                'Para EQ': [('plugin_%d_eq_freq', 20, 18000, True), ('plugin_%d_eq_q', .5, 10, False),
+                            ('plugin_%d_eq_gain', -48, 18, False)],
+                '3 Bands EQ': [('plugin_%d_eq3b_low', -60, 18, False), ('plugin_%d_eq3b_mid', -60, 18, False),
+                               ('plugin_%d_eq3b_high', -60, 18, False)],
+                'Chorus': [('plugin_%d_chorus_mix', 0, 1, False), ('plugin_%d_chorus_depth', 0.001, 5., False),
+                           ('plugin_%d_chorus_feed', 0, 1, False)],
+                'Compress': [('plugin_%d_comp_thresh', -80, 0, False), ('plugin_%d_comp_ratio', 0.125, 20, False),
+                             ('plugin_%d_comp_gain', -36, 36, False)],
+                'Gate': [('plugin_%d_gate_thresh', -120, 0, False), ('plugin_%d_gate_rise', 0.0005, .5, True),
+                         ('plugin_%d_gate_fall', 0.0005, .5, True)],
+                'Disto': [('plugin_%d_disto_drive', 0, 1, False), ('plugin_%d_disto_slope', 0, 1, False),
+                          ('plugin_%d_disto_gain', -60, 0, False)],
+                'AmpMod': [('plugin_%d_ampmod_freq', 0.01, 1000, True), ('plugin_%d_ampmod_amp', 0, 1, False),
+                           ('plugin_%d_ampmod_stereo', 0, 0.5, False)],
+                'Phaser': [('plugin_%d_phaser_freq', 20, 1000, True), ('plugin_%d_phaser_q', 1, 20, False),
+                           ('plugin_%d_phaser_spread', .5, 2, False)],
+                'Delay': [('plugin_%d_delay_delay', 0.01, 1, False), ('plugin_%d_delay_feed', 0, .999, False),
+                          ('plugin_%d_delay_mix', 0, 1, False)],
+                'Flange': [('plugin_%d_flange_depth', 0.001, .99, False), ('plugin_%d_flange_freq', 0.001, 20, True),
+                           ('plugin_%d_flange_feed', 0, .999, False)],
+                'Harmonizer': [('plugin_%d_harmonizer_transpo', -24, 24, False), ('plugin_%d_harmonizer_feed', 0, .999, False),
+                               ('plugin_%d_harmonizer_mix', 0, 1, False)],
+                'Resonators': [('plugin_%d_resonators_freq', 20, 1000, True), ('plugin_%d_resonators_spread', .25, 4, False),
+                               ('plugin_%d_resonators_mix', 0, 1, False)],
+                'DeadReson': [('plugin_%d_deadresonators_freq', 20, 1000, True), ('plugin_%d_deadresonators_detune', 0, 1, False),
+                              ('plugin_%d_deadresonators_mix', 0, 1, False)],
+                'ChaosMod': [('plugin_%d_chaosmod_freq', 0.001, 1, True), ('plugin_%d_chaosmod_chaos', 0, 1, False),
+                             ('plugin_%d_chaosmod_amp', 0, 1, False)]}
+
 # Audio settings
 SAMPLE_RATES = ['22050', '44100', '48000', '88200', '96000']
 BIT_DEPTHS = {'16 bits int': 0, '24 bits int': 1, '32 bits int': 2, '32 bits float': 3}
 BUFFER_SIZES = ['8', '16', '32', '64', '128', '256', '512', '1024', '2048']
+# Waveform overview: min/max per PEAK_BLOCK_SIZE frames, each level PEAK_LEVEL_FACTOR times coarser
+PEAK_BLOCK_SIZE = 256
+PEAK_LEVEL_FACTOR = 16
+PEAK_LEVELS = 3
+# Number of sounds whose peak files are kept open (memory-mapped) for drawing
+PEAK_OPEN_SOUNDS = 8
+# Preset morphing: sliders added to the interface and control period in seconds
+PRESET_MORPH_NAMES = ["presetMorph", "presetMorphY"]
+PRESET_MORPH_CHOICES = ["Off", "Two presets", "Four presets"]
+PRESET_MORPH_PERIOD = 0.01
+# Smallest change, relative to the widget range, sent back to a widget from the audio side
+WIDGET_FEEDBACK_EPSILON = 0.0001
+# NRPNs are routed by the MIDI dispatcher as controller number MIDI_NRPN_OFFSET + parameter number
+MIDI_NRPN_OFFSET = 128
 AUDIO_FILE_FORMATS = {'wav': 0, 'aif': 1, 'au': 2, 'sd2': 4, 'flac': 5, 'caf': 6, 'ogg': 7}
+AUDIO_FILE_EXTENSIONS = {'.wav': 'wav', '.wave': 'wav', '.aif': 'aif', '.aiff': 'aif', '.aifc': 'aif', '.ogg': 'ogg',
+                         '.flac': 'flac', '.au': 'au', '.sd2': 'sd2', '.caf': 'caf'}
 AUDIO_FILE_WILDCARD = "All files|*.*|" \
             "Wave file|*.wave;*.WAV;*.WAVE;*.Wav;*.Wave;*.wav|" \
             "AIFF file|*.aif;*.aiff;*.aifc;*.AIF;*.AIFF;*.Aif;*.Aiff|" \
@@ -294,6 +364,9 @@ TR_PLAY_NORMAL_COLOUR = '#009911'
 TR_PLAY_CLICK_COLOUR = '#007A29'
 TR_RECORD_OFF_COLOUR = '#6E3131'
 TR_RECORD_ON_COLOUR = '#FF0000'
+WAVEFORM_BACK_COLOUR = "#444444"
+WAVEFORM_COLOUR = "#99A7CC"
+WAVEFORM_REGION_COLOUR = (255, 255, 255, 40)
 PREFS_FOREGROUND = '#222222'
 PREFS_PATH_BACKGROUND = '#AAAAAA'
 
@@ -410,6 +483,14 @@ TT_PRESET = """PRESET
 Choose a preset to load.
 """
 
+TT_PRESET_MORPH = """PRESET MORPH
+Choose the presets to morph between.
+
+The morph sliders go from the first
+to the second preset (and from the
+third to the fourth on the Y axis).
+"""
+
 TT_PRESET_TOOLS = """PRESET MANAGEMENT
 Floppy: Save a preset.
 